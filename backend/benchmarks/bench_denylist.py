@@ -0,0 +1,44 @@
+"""Per-request cost and memory of the revocation check.
+
+Loads REVOKED jtis into the denylist the way the periodic refresh does,
+then times checks of live tokens, which is what almost every request
+sees. Memory is compared with holding every jti in a plain set.
+
+Run from backend/: python -m benchmarks.bench_denylist
+"""
+
+import sys
+import time
+from uuid import uuid4
+
+from joker_task.service.denylist import Denylist
+
+ROUNDS = 100_000
+REVOKED = (1_000, 100_000)
+
+
+def main() -> None:
+    live = [uuid4().hex for _ in range(ROUNDS)]
+
+    for count in REVOKED:
+        revoked = [uuid4().hex for _ in range(count)]
+        denylist = Denylist()
+        denylist.load(revoked)
+
+        start = time.process_time()
+        hits = sum(denylist.check(jti) is None for jti in live)
+        elapsed = time.process_time() - start
+
+        exact = set(revoked)
+        exact_bytes = sys.getsizeof(exact) + sum(map(sys.getsizeof, exact))
+        print(
+            f'{count:7} revoked: '
+            f'{elapsed / ROUNDS * 1_000_000:5.2f} us/check, '
+            f'{hits / ROUNDS:6.2%} go to the table, '
+            f'filter {denylist.stats()["filter_bytes"] / 1024:8.1f} KiB '
+            f'vs set {exact_bytes / 1024:8.1f} KiB'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Per-request CPU of building task list queries with and without the
+filter-query cache.
+
+Run from backend/: python -m benchmarks.bench_filter_cache
+"""
+
+import asyncio
+import time
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from joker_task.db.models import User, table_registry
+from joker_task.schemas import TaskQuery
+from joker_task.service import task_collector
+from joker_task.service.filter_cache import FilterQueryCache
+from joker_task.service.task_collector import TaskCollector
+
+ROUNDS = 2000
+QUERY = TaskQuery(
+    title='%test%',
+    tags=['a', 'b'],
+    state=['ToDo', 'InProgress'],
+    priority=(10, 90),
+    order_by='priority',
+)
+
+
+async def run(cache: FilterQueryCache) -> float:
+    task_collector.filter_query_cache = cache
+    engine = create_async_engine('sqlite+aiosqlite:///:memory:')
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    user = User('bench@example.com', 'bench', 'x')
+
+    async with AsyncSession(engine) as session:
+        collector = TaskCollector(session)
+        await collector.collect_task_page(user, QUERY)
+
+        start = time.process_time()
+        for _ in range(ROUNDS):
+            await collector.collect_task_page(user, QUERY)
+        elapsed = time.process_time() - start
+
+    await engine.dispose()
+    return elapsed / ROUNDS * 1_000_000
+
+
+async def main() -> None:
+    logger.remove()
+    uncached = await run(FilterQueryCache(maxsize=0))
+    cache = FilterQueryCache()
+    cached = await run(cache)
+
+    print(f'uncached: {uncached:8.1f} us/request')
+    print(f'cached:   {cached:8.1f} us/request')
+    print(f'saved:    {uncached - cached:8.1f} us/request')
+    print(f'cache:    {cache.stats()}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+"""Latency of GET /tasks/ while bursts of logins hash passwords.
+
+Runs the app in-process on one event loop, with a reader issuing
+sequential task listings while concurrent login bursts run alongside.
+It compares password checks made inline on the loop with checks sent
+to the password pool.
+
+Run from backend/: python -m benchmarks.bench_login_burst
+"""
+
+import asyncio
+import statistics
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from httpx import ASGITransport, AsyncClient
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from joker_task.app import app
+from joker_task.db.database import get_session
+from joker_task.db.models import Task, User, table_registry
+from joker_task.router import auth
+from joker_task.service.security import (
+    check_password,
+    get_hash_password,
+    verify_password,
+)
+
+EMAIL = 'bench@example.com'
+PASSWORD = 'secret'
+READS = 60
+BURST = 4
+TASKS = 200
+
+
+async def inline_check(password: str, hash: str) -> bool:
+    return verify_password(password, hash)
+
+
+async def seed(url: str) -> None:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        user = User(EMAIL, 'bench', get_hash_password(PASSWORD))
+        session.add(user)
+        session.add_all(
+            Task(
+                user_email=EMAIL,
+                title=f'task {i}',
+                description=None,
+                done=False,
+                tags=[],
+                workbenches=[],
+                reminder=None,
+                repetition=None,
+                state=None,
+            )
+            for i in range(TASKS)
+        )
+        await session.commit()
+    await engine.dispose()
+
+
+async def login(client: AsyncClient) -> None:
+    rsp = await client.post(
+        '/login', data={'username': EMAIL, 'password': PASSWORD}
+    )
+    rsp.raise_for_status()
+
+
+async def measure(client: AsyncClient, burst: int) -> list[float]:
+    done = asyncio.Event()
+
+    async def bursts():
+        while burst and not done.is_set():
+            await asyncio.gather(*(login(client) for _ in range(burst)))
+
+    burster = asyncio.create_task(bursts())
+    latencies = []
+    for _ in range(READS):
+        start = time.perf_counter()
+        rsp = await client.get('/tasks/', params={'limit': 20})
+        rsp.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    done.set()
+    await burster
+    return latencies
+
+
+def percentile(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1]
+
+
+async def main() -> None:
+    logger.remove()
+
+    with TemporaryDirectory() as tmp:
+        url = f'sqlite+aiosqlite:///{Path(tmp) / "bench.db"}'
+        await seed(url)
+        engine = create_async_engine(url)
+
+        async def session_override():
+            async with AsyncSession(engine, expire_on_commit=False) as s:
+                yield s
+
+        app.dependency_overrides[get_session] = session_override
+        transport = ASGITransport(app=app)
+
+        for name, check, burst in (
+            ('idle', check_password, 0),
+            ('inline', inline_check, BURST),
+            ('pool', check_password, BURST),
+        ):
+            auth.check_password = check
+            async with AsyncClient(
+                transport=transport, base_url='http://test'
+            ) as client:
+                await login(client)
+                latencies = await measure(client, burst)
+            print(
+                f'{name:7} p50 {percentile(latencies, 50):7.2f} ms  '
+                f'p99 {percentile(latencies, 99):7.2f} ms  '
+                f'max {max(latencies):7.2f} ms'
+            )
+
+        auth.check_password = check_password
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,236 @@
+"""Per-user query latency before and after hash partitioning tasks.
+
+Seeds many users into the regular schema, times the per-user queries
+the API issues, then applies the opt-in partitioning migration
+(c3f8a2d6e915) in place and times the same queries again. Also prints
+the plan of one filter query so partition pruning can be checked.
+
+Postgres only. Run from backend/:
+    BENCH_DATABASE_URL=postgresql+psycopg://... \\
+        python -m benchmarks.bench_partitions
+"""
+
+import asyncio
+import importlib.util
+import os
+import random
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from loguru import logger
+from sqlalchemy import Connection, Executable, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from joker_task.db.models import (
+    Tag,
+    Task,
+    User,
+    table_registry,
+    task_tag,
+)
+from joker_task.schemas import FilterSchema
+from joker_task.service.task_collector import TaskCollector
+
+DATABASE_URL = os.environ.get('BENCH_DATABASE_URL', '')
+USERS = 200
+TASKS_PER_USER = 2_000
+TAGS_PER_USER = 10
+PARTITIONS = 16
+SAMPLE = 50
+DONE_RATIO = 0.3
+MIGRATIONS = Path(__file__).parents[1] / 'migrations/versions'
+PARTITIONING = MIGRATIONS / 'c3f8a2d6e915_hash_partition_tasks.py'
+TAG_IDS = MIGRATIONS / 'd5a1c7e3f920_add_task_tag_ids.py'
+
+
+def email(n: int) -> str:
+    return f'user{n}@example.com'
+
+
+async def seed(session: AsyncSession) -> None:
+    rng = random.Random(42)
+    await session.execute(
+        insert(User),
+        [
+            {'email': email(n), 'username': f'user{n}', 'password': 'x'}
+            for n in range(USERS)
+        ],
+    )
+    for n in range(USERS):
+        tag_ids = list(
+            await session.scalars(
+                insert(Tag).returning(Tag.id_tag),
+                [
+                    {
+                        'name': f'tag{i}',
+                        'color_hex': None,
+                        'user_email': email(n),
+                    }
+                    for i in range(TAGS_PER_USER)
+                ],
+            )
+        )
+        tag_sets = [
+            rng.sample(tag_ids, rng.randint(0, 3))
+            for _ in range(TASKS_PER_USER)
+        ]
+        task_ids = await session.scalars(
+            insert(Task).returning(Task.id_task, sort_by_parameter_order=True),
+            [
+                {
+                    'user_email': email(n),
+                    'title': f'task {i}',
+                    'done': rng.random() < DONE_RATIO,
+                    'priority': rng.randint(1, 200),
+                    'tag_ids': sorted(tag_set),
+                }
+                for i, tag_set in enumerate(tag_sets)
+            ],
+        )
+        await session.execute(
+            insert(task_tag),
+            [
+                {'id_task': id_task, 'id_tag': id_tag}
+                for id_task, tag_set in zip(task_ids, tag_sets)
+                for id_tag in tag_set
+            ],
+        )
+        await session.commit()
+
+
+def load(path: Path) -> Any:
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    migration = importlib.util.module_from_spec(spec)  # type: ignore
+    spec.loader.exec_module(migration)  # type: ignore
+    return migration
+
+
+def partition(connection: Connection) -> None:
+    partitioning, tag_ids = load(PARTITIONING), load(TAG_IDS)
+
+    # the schema comes from the models, so replay the real revision
+    # order: tag_ids is added after tasks is partitioned
+    with Operations.context(MigrationContext.configure(connection)) as op:
+        for statement in tag_ids.POSTGRESQL_DOWNGRADE:
+            op.execute(statement)
+        partitioning._rebuild(PARTITIONS)
+        for statement in tag_ids.POSTGRESQL_UPGRADE:
+            op.execute(statement)
+        op.execute(tag_ids.POSTGRESQL_INDEX.format(''))
+
+
+def queries(
+    session: AsyncSession,
+) -> dict[str, Callable[[str], tuple[Executable, dict[str, Any]]]]:
+    collector = TaskCollector(session)
+
+    def listing(**filters: Any) -> Callable:
+        def build(user_email: str) -> tuple[Executable, dict[str, Any]]:
+            statement = collector.make_filter_query(
+                User(user_email, '', ''), FilterSchema(**filters)
+            )
+            return statement.order_by(Task.id_task).limit(50), {}
+
+        return build
+
+    def tag_load(user_email: str) -> tuple[Executable, dict[str, Any]]:
+        page = (
+            select(Task.id_task)
+            .where(Task.user_email == user_email)
+            .order_by(Task.id_task)
+            .limit(50)
+        )
+        return select(task_tag).where(task_tag.c.id_task.in_(page)), {}
+
+    def touch(user_email: str) -> tuple[Executable, dict[str, Any]]:
+        first = (
+            select(Task.id_task)
+            .where(Task.user_email == user_email)
+            .order_by(Task.id_task)
+            .limit(1)
+            .scalar_subquery()
+        )
+        return (
+            update(Task)
+            .where(Task.user_email == user_email, Task.id_task == first)
+            .values(priority=Task.priority + 1)
+            .execution_options(synchronize_session=False)
+        ), {}
+
+    return {
+        'page': listing(),
+        'done': listing(done=True),
+        'tags': listing(tags=['tag1', 'tag2']),
+        'tags_any': listing(tags_any=['tag3', 'tag4']),
+        'tag load': tag_load,
+        'update': touch,
+    }
+
+
+async def measure(session: AsyncSession) -> dict[str, float]:
+    users = random.Random(7).sample(range(USERS), SAMPLE)
+    timings = {}
+    for name, build in queries(session).items():
+        start = time.perf_counter()
+        for n in users:
+            statement, params = build(email(n))
+            await session.execute(statement, params)
+        await session.rollback()
+        timings[name] = (time.perf_counter() - start) / SAMPLE * 1000
+    return timings
+
+
+async def explain(session: AsyncSession) -> str:
+    statement, _ = queries(session)['done'](email(0))
+    sql = statement.compile(
+        dialect=session.bind.dialect,  # type: ignore
+        compile_kwargs={'literal_binds': True},
+    )
+    rows = await session.execute(text(f'EXPLAIN {sql}'))
+    await session.rollback()
+    return '\n'.join(f'    {row[0]}' for row in rows)
+
+
+async def main() -> None:
+    if not DATABASE_URL.startswith('postgresql'):
+        raise SystemExit('set BENCH_DATABASE_URL to a Postgres database')
+
+    logger.remove()
+    engine = create_async_engine(DATABASE_URL)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    async with AsyncSession(engine) as session:
+        await seed(session)
+    async with engine.begin() as conn:
+        await conn.execute(text('ANALYZE'))
+
+    async with AsyncSession(engine) as session:
+        before = await measure(session)
+        print('plain plan:')
+        print(await explain(session))
+
+    async with engine.begin() as conn:
+        await conn.run_sync(partition)
+
+    async with AsyncSession(engine) as session:
+        after = await measure(session)
+        print(f'hash({PARTITIONS}) plan:')
+        print(await explain(session))
+
+    print(f'{USERS} users x {TASKS_PER_USER} tasks, mean of {SAMPLE} users')
+    for name in before:
+        print(f'  {name:10} {before[name]:8.2f} ms -> {after[name]:8.2f} ms')
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""Latency of authenticated GET /tags/ with and without the principal
+cache.
+
+Runs the app in-process against a SQLite file and issues sequential
+requests with one access token, so every request after the first is a
+cache hit when the cache is on.
+
+Run from backend/: python -m benchmarks.bench_principal_cache
+"""
+
+import asyncio
+import statistics
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from httpx import ASGITransport, AsyncClient
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from joker_task.app import app
+from joker_task.db.database import get_session
+from joker_task.db.models import User, table_registry
+from joker_task.service import security
+from joker_task.service.principal import PrincipalCache
+from joker_task.service.security import generate_access_token
+
+EMAIL = 'bench@example.com'
+REQUESTS = 500
+
+
+async def seed(url: str) -> None:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        session.add(User(EMAIL, 'bench', 'x'))
+        await session.commit()
+    await engine.dispose()
+
+
+async def measure(client: AsyncClient) -> list[float]:
+    latencies = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        rsp = await client.get('/tags/')
+        rsp.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def main() -> None:
+    logger.remove()
+
+    with TemporaryDirectory() as tmp:
+        url = f'sqlite+aiosqlite:///{Path(tmp) / "bench.db"}'
+        await seed(url)
+        engine = create_async_engine(url)
+
+        async def session_override():
+            async with AsyncSession(engine, expire_on_commit=False) as s:
+                yield s
+
+        app.dependency_overrides[get_session] = session_override
+        transport = ASGITransport(app=app)
+        token = generate_access_token({'sub': EMAIL})
+
+        for name, cache in (
+            ('uncached', PrincipalCache(maxsize=0)),
+            ('cached', PrincipalCache()),
+        ):
+            security.principal_cache = cache
+            async with AsyncClient(
+                transport=transport,
+                base_url='http://test',
+                cookies={'access_token': token},
+            ) as client:
+                latencies = await measure(client)
+            print(
+                f'{name:8} p50 {statistics.median(latencies):6.2f} ms  '
+                f'mean {statistics.fmean(latencies):6.2f} ms'
+            )
+            print(f'         {cache.stats()}')
+
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
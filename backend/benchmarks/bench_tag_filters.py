@@ -0,0 +1,176 @@
+"""Plans and timings of the tag-matching strategies on a seeded dataset.
+
+Compares the old join + GROUP BY/HAVING query with the correlated EXISTS
+and INTERSECT variants of FilterWithTags and the tasks.tag_ids
+containment used by FilterWithTagIds, plus tags_any/tags_none both ways.
+
+Run from backend/: python -m benchmarks.bench_tag_filters
+Set BENCH_DATABASE_URL to a postgresql+psycopg URL to benchmark Postgres.
+"""
+
+import asyncio
+import os
+import random
+import time
+from typing import Any
+
+from loguru import logger
+from sqlalchemy import Select, bindparam, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from joker_task.db.models import Tag, Task, User, table_registry, task_tag
+from joker_task.service import make_filters
+from joker_task.service.make_filters import (
+    FilterWithAnyTagIds,
+    FilterWithAnyTags,
+    FilterWithoutTagIds,
+    FilterWithoutTags,
+    FilterWithTagIds,
+    FilterWithTags,
+)
+
+DATABASE_URL = os.environ.get(
+    'BENCH_DATABASE_URL', 'sqlite+aiosqlite:///:memory:'
+)
+EMAIL = 'bench@example.com'
+TASKS = 100_000
+TAGS = 50
+ROUNDS = 5
+CHUNK = 5_000
+
+
+def group_by(values: list[str]) -> Select:
+    return (
+        select(Task)
+        .where(Task.user_email == EMAIL)
+        .join(task_tag, task_tag.c.id_task == Task.id_task)
+        .join(Tag, Tag.id_tag == task_tag.c.id_tag)
+        .where(Tag.name.in_(values))
+        .group_by(Task.id_task)
+        .having(func.count(func.distinct(Tag.name)) == len(values))
+    )
+
+
+def strategy(
+    make_filter: Any, values: list[str], threshold: int | None = None
+) -> tuple[Select, dict[str, Any]]:
+    if threshold is not None:
+        make_filters.TAGS_INTERSECT_THRESHOLD = threshold
+    stmt = make_filter.make(
+        select(Task).where(Task.user_email == bindparam('user_email')),
+        values,
+        'tags',
+    )
+    return stmt, {'user_email': EMAIL, **make_filter.bind(values, 'tags')}
+
+
+async def seed(session: AsyncSession) -> None:
+    rng = random.Random(42)
+    session.add(User(EMAIL, 'bench', 'x'))
+    await session.flush()
+
+    await session.execute(
+        insert(Tag),
+        [
+            {'name': f'tag{i}', 'color_hex': None, 'user_email': EMAIL}
+            for i in range(TAGS)
+        ],
+    )
+    for start in range(0, TASKS, CHUNK):
+        tag_sets = [
+            # skewed: low tag ids are common, high ones are rare
+            {
+                min(int(rng.expovariate(0.15)), TAGS - 1) + 1
+                for _ in range(rng.randint(0, 4))
+            }
+            for _ in range(CHUNK)
+        ]
+        ids = await session.scalars(
+            insert(Task).returning(Task.id_task, sort_by_parameter_order=True),
+            [
+                {
+                    'user_email': EMAIL,
+                    'title': f'task {start + i}',
+                    'priority': 100,
+                    'tag_ids': sorted(tag_set),
+                }
+                for i, tag_set in enumerate(tag_sets)
+            ],
+        )
+        await session.execute(
+            insert(task_tag),
+            [
+                {'id_task': id_task, 'id_tag': id_tag}
+                for id_task, tag_set in zip(ids, tag_sets)
+                for id_tag in tag_set
+            ],
+        )
+    await session.commit()
+
+
+async def explain(
+    session: AsyncSession, stmt: Select, params: dict[str, Any]
+) -> str:
+    dialect = session.bind.dialect  # type: ignore
+    sql = stmt.params(**params).compile(
+        dialect=dialect, compile_kwargs={'literal_binds': True}
+    )
+    prefix = 'EXPLAIN QUERY PLAN' if dialect.name == 'sqlite' else 'EXPLAIN'
+    rows = await session.execute(text(f'{prefix} {sql}'))
+    return '\n'.join(f'    {row[-1]}' for row in rows)
+
+
+async def measure(
+    session: AsyncSession, stmt: Select, params: dict[str, Any]
+) -> tuple[float, int]:
+    found = 0
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        found = len(
+            (
+                await session.execute(
+                    stmt.with_only_columns(Task.id_task), params
+                )
+            ).all()
+        )
+    return (time.perf_counter() - start) / ROUNDS * 1000, found
+
+
+async def main() -> None:
+    logger.remove()
+    engine = create_async_engine(DATABASE_URL)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    async with AsyncSession(engine) as session:
+        await seed(session)
+
+        for values in (
+            ['tag1'],
+            ['tag1', 'tag2'],
+            ['tag1', 'tag30'],
+            ['tag1', 'tag2', 'tag3', 'tag4'],
+        ):
+            cases = {
+                'group by': (group_by(values), {}),
+                'exists': strategy(FilterWithTags(), values, 0),
+                'intersect': strategy(FilterWithTags(), values, len(values)),
+                'tag_ids': strategy(FilterWithTagIds(), values),
+                'any': strategy(FilterWithAnyTags(), values),
+                'any ids': strategy(FilterWithAnyTagIds(), values),
+                'none': strategy(FilterWithoutTags(), values),
+                'none ids': strategy(FilterWithoutTagIds(), values),
+            }
+            print(f'tags={values}')
+            for name, (stmt, params) in cases.items():
+                elapsed, found = await measure(session, stmt, params)
+                print(f'  {name:10} {elapsed:8.2f} ms  {found:6} rows')
+                print(await explain(session, stmt, params))
+
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+"""Per-request CPU of verifying an access token with and without the
+verified-token cache.
+
+Run from backend/: python -m benchmarks.bench_token_cache
+"""
+
+import time
+
+from loguru import logger
+
+from joker_task.service import security
+from joker_task.service.security import decode_token, generate_access_token
+from joker_task.service.token_cache import TokenCache
+from joker_task.settings import get_settings
+
+ROUNDS = 20000
+RATES = (100, 1000, 5000)
+
+
+def run(cache: TokenCache, token: str) -> float:
+    security.token_cache = cache
+    settings = get_settings()
+    decode_token(token, settings)
+
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        decode_token(token, settings)
+    elapsed = time.process_time() - start
+
+    return elapsed / ROUNDS * 1_000_000
+
+
+def main() -> None:
+    logger.remove()
+    token = generate_access_token({'sub': 'bench@example.com'})
+
+    uncached = run(TokenCache(maxsize=0), token)
+    cache = TokenCache()
+    cached = run(cache, token)
+
+    print(f'uncached: {uncached:8.2f} us/request')
+    print(f'cached:   {cached:8.2f} us/request')
+    for rate in RATES:
+        saved = (uncached - cached) * rate / 1000
+        print(f'saved at {rate:5} req/s: {saved:8.2f} ms CPU per second')
+    print(f'cache:    {cache.stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,29 @@
+import asyncio
+import signal
 import sys
+from contextlib import asynccontextmanager
 from http import HTTPStatus
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
+from joker_task.db import database
+from joker_task.db.database import settings, warm_pool
 from joker_task.router.auth import auth_router
+from joker_task.router.metrics import metrics_router
 from joker_task.router.tags import tags_router
 from joker_task.router.tasks import tasks_router
 from joker_task.router.views import views_router
 from joker_task.router.workbenches import workbenches_router
 from joker_task.schemas import Message
+from joker_task.service.archive_service import archive_periodically
+from joker_task.service.password_pool import password_pool
+from joker_task.service.security import (
+    load_revocations_periodically,
+    prune_revocations_periodically,
+)
+from joker_task.settings import reload_settings
 
 logger.remove()
 logger.add(
@@ -21,8 +34,71 @@ logger.add(
 logger.add('app.log', level='DEBUG', rotation='1 MB')
 
 
+def watch_sighup() -> bool:
+    try:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGHUP, reload_settings
+        )
+    except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+        # no SIGHUP on windows, and only the main thread may own handlers
+        logger.info('settings reload on SIGHUP is not available')
+        return False
+    return True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    watching = watch_sighup()
+    primaries = database.primaries()
+    for primary in primaries:
+        await warm_pool(
+            primary, min(settings.DB_POOL_WARMUP, settings.DB_POOL_SIZE)
+        )
+    archivers = []
+    if settings.ARCHIVE_INTERVAL_SECONDS > 0:
+        archivers = [
+            asyncio.create_task(
+                archive_periodically(
+                    primary,
+                    settings.archive_after,
+                    settings.ARCHIVE_INTERVAL_SECONDS,
+                    settings.ARCHIVE_BATCH_SIZE,
+                )
+            )
+            for primary in primaries
+        ]
+    pruners = []
+    if settings.REVOCATION_PRUNE_SECONDS > 0:
+        pruners = [
+            asyncio.create_task(
+                prune_revocations_periodically(
+                    primary, settings.REVOCATION_PRUNE_SECONDS
+                )
+            )
+            for primary in primaries
+        ]
+    refresher = None
+    if settings.REVOCATION_REFRESH_SECONDS > 0:
+        refresher = asyncio.create_task(
+            load_revocations_periodically(
+                primaries, settings.REVOCATION_REFRESH_SECONDS
+            )
+        )
+    yield
+    for archiver in archivers:
+        archiver.cancel()
+    for pruner in pruners:
+        pruner.cancel()
+    if refresher is not None:
+        refresher.cancel()
+    if watching:
+        asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+    password_pool.shutdown()
+    await database.dispose()
+
+
 logger.info('starting api...')
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -37,6 +113,7 @@ app.include_router(tasks_router)
 app.include_router(tags_router)
 app.include_router(views_router)
 app.include_router(workbenches_router)
+app.include_router(metrics_router)
 
 
 @app.get('/hello_world/', response_model=Message, status_code=HTTPStatus.OK)
@@ -1,14 +1,209 @@
+import asyncio
+from functools import partial
+from typing import Any, Iterable
+
+from fastapi import Request, Response
 from loguru import logger
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import Executable, delete, make_url, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+
+from joker_task.db.models import UsernameClaim
+from joker_task.db.pool import InstrumentedPool, instrument
+from joker_task.db.routing import ReplicaRouter
+from joker_task.db.sharding import DEFAULT_SHARD, ShardMap, ShardSession
+from joker_task.db.versions import ON_WRITE
+from joker_task.settings import Settings, get_settings
+
+
+def engine_options(
+    settings: Settings, database_url: str | None = None
+) -> dict[str, Any]:
+    url = make_url(database_url or settings.DATABASE_URL)
+    options: dict[str, Any] = {
+        'pool_pre_ping': settings.DB_POOL_PRE_PING,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+        'query_cache_size': settings.DB_QUERY_CACHE_SIZE,
+    }
+
+    # sqlite picks its own pool (StaticPool for :memory:), leave it alone
+    if url.get_backend_name() == 'sqlite':
+        return options
+
+    options.update({
+        'poolclass': InstrumentedPool,
+        'pool_size': settings.DB_POOL_SIZE,
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'pool_timeout': settings.DB_POOL_TIMEOUT,
+    })
+
+    driver = url.get_driver_name()
+    if driver == 'asyncpg':
+        options['connect_args'] = {
+            'prepared_statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE
+        }
+    elif driver == 'psycopg' and settings.DB_STATEMENT_CACHE_SIZE == 0:
+        options['connect_args'] = {'prepare_threshold': None}
+
+    return options
+
+
+async def warm_pool(engine: AsyncEngine, connections: int) -> None:
+    if connections <= 0:
+        return
+
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text('SELECT 1'))
+
+    logger.info(f'warming {connections} database connections')
+    await asyncio.gather(*(ping() for _ in range(connections)))
+
+
+def create_engine(settings: Settings, database_url: str) -> AsyncEngine:
+    engine = create_async_engine(
+        database_url, **engine_options(settings, database_url)
+    )
+    instrument(engine)
+    return engine
+
+
+settings = get_settings()
+engine = create_engine(settings, settings.DATABASE_URL)
+router = ReplicaRouter(
+    engine,
+    [create_engine(settings, url) for url in settings.DATABASE_REPLICA_URLS],
+    settings.REPLICA_STICKY_SECONDS,
+    secure_cookie=settings.PROD,
+)
+
+
+def create_shards(settings: Settings, default: ReplicaRouter) -> ShardMap:
+    if DEFAULT_SHARD in settings.DATABASE_SHARD_URLS:
+        raise ValueError(f'shard name {DEFAULT_SHARD!r} is DATABASE_URL')
+
+    routers = {DEFAULT_SHARD: default}
+    for name, url in settings.DATABASE_SHARD_URLS.items():
+        routers[name] = ReplicaRouter(
+            create_engine(settings, url),
+            [],
+            settings.REPLICA_STICKY_SECONDS,
+            secure_cookie=settings.PROD,
+        )
+
+    logger.info(f'sharding users over {sorted(routers)}')
+    return ShardMap(routers, settings.SHARD_VIRTUAL_NODES)
+
+
+shards = (
+    create_shards(settings, router) if settings.DATABASE_SHARD_URLS else None
+)
+
+
+def primaries() -> list[AsyncEngine]:
+    if shards is None:
+        return [router.primary]
+    return [shard.primary for shard in shards.routers.values()]
+
+
+def named_engines() -> dict[str, AsyncEngine]:
+    routers = {DEFAULT_SHARD: router} if shards is None else shards.routers
+    engines = {}
+    for name, shard in routers.items():
+        engines[name] = shard.primary
+        for index, replica in enumerate(shard.replicas):
+            engines[f'{name}/replica{index}'] = replica
+    return engines
+
+
+async def dispose() -> None:
+    if shards is None:
+        await router.dispose()
+    else:
+        await shards.dispose()
+
+
+def open_session(request: Request) -> AsyncSession:
+    info: dict[str, Any] = {'request': request}
+    if shards is None:
+        info['router'] = router
+    else:
+        info['shards'] = shards
+
+    # the engine is picked per statement, so once use_shard names the
+    # user a recent write of theirs can pin reads to the primary
+    return AsyncSession(
+        sync_session_class=ShardSession, info=info, expire_on_commit=False
+    )
+
+
+def mark_write(
+    request: Request, response: Response, emails: Iterable[str]
+) -> None:
+    for email in emails:
+        target = router if shards is None else shards.router_for(email)
+        target.mark_write(request, response, email)
+
+
+async def scalar_on_other_shards(email: str, statement: Executable) -> Any:
+    if shards is None:
+        return None
+
+    home = shards.shard_for(email)
+    for name, shard in shards.routers.items():
+        if name == home:
+            continue
+        async with AsyncSession(shard.primary) as session:
+            if (found := await session.scalar(statement)) is not None:
+                return found
+
+    return None
+
+
+async def claim_username(email: str, username: str) -> bool:
+    # users.username is unique within a database, across shards the
+    # primary key of the index on the default shard is
+    if shards is None:
+        return True
+
+    engine = shards.routers[DEFAULT_SHARD].primary
+    async with AsyncSession(engine) as session:
+        session.add(UsernameClaim(username, email))
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            owner = await session.scalar(
+                select(UsernameClaim.email).where(
+                    UsernameClaim.username == username
+                )
+            )
+            # a retry after a failed sign up finds its own claim
+            return owner == email
+
+    return True
+
 
-from joker_task.settings import Settings
+async def release_username(username: str) -> None:
+    if shards is None:
+        return
 
-engine = create_async_engine(Settings().DATABASE_URL)  # type: ignore
+    engine = shards.routers[DEFAULT_SHARD].primary
+    async with AsyncSession(engine) as session:
+        await session.execute(
+            delete(UsernameClaim).where(UsernameClaim.username == username)
+        )
+        await session.commit()
 
 
-async def get_session():
+async def get_session(request: Request, response: Response):
     logger.info('starting a session in the database')  # pragma: no cover
-    async with AsyncSession(
-        engine,
-    ) as session:  # pragma: no cover
+    async with open_session(request) as session:  # pragma: no cover
+        # set on commits that changed user data, and the cookie only
+        # reaches the client when the endpoint returns normally
+        session.info[ON_WRITE] = partial(mark_write, request, response)
         yield session
@@ -2,47 +2,73 @@ from datetime import datetime
 from typing import List, Sequence
 
 from sqlalchemy import (
+    DDL,
     JSON,
     Boolean,
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Table,
     UniqueConstraint,
+    column,
+    event,
     func,
+    table,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 
+from joker_task.db.tag_ids import TagIds
+from joker_task.settings import get_settings
+
 table_registry = registry()
 
+HOT_TASKS = text('archived_at IS NULL')
+
+# once tasks is hash partitioned (c3f8a2d6e915) the identity includes the
+# owner, so ORM UPDATE/DELETE statements carry user_email and prune to
+# one partition; tasks are then looked up by (id_task, user_email)
+TASK_IDENTITY = (
+    ['id_task', 'user_email']
+    if get_settings().TASKS_PARTITIONED
+    else ['id_task']
+)
+
 
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
+    __mapper_args__ = {'eager_defaults': True}
 
     email: Mapped[str] = mapped_column(String, primary_key=True)
     username: Mapped[str] = mapped_column(String, unique=True)
     password: Mapped[str] = mapped_column(String, nullable=False)
+    data_version: Mapped[int] = mapped_column(
+        Integer, init=False, default=0, server_default=text('0')
+    )
 
     tasks: Mapped[List['Task']] = relationship(
-        back_populates='user', init=False
+        back_populates='user', init=False, lazy='raise'
+    )
+    tags: Mapped[List['Tag']] = relationship(
+        back_populates='user', init=False, lazy='raise'
     )
-    tags: Mapped[List['Tag']] = relationship(back_populates='user', init=False)
 
     workbenches: Mapped[List['Workbench']] = relationship(
-        back_populates='user', init=False
+        back_populates='user', init=False, lazy='raise'
     )
     views: Mapped[List['View']] = relationship(
-        back_populates='user', init=False
+        back_populates='user', init=False, lazy='raise'
     )
 
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
         init=False,
         server_default=func.now(),
-        server_onupdate=func.now(),
+        onupdate=func.now(),
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime, init=False, server_default=func.now()
@@ -54,6 +80,7 @@ task_tag = Table(
     table_registry.metadata,
     Column('id_task', ForeignKey('tasks.id_task'), primary_key=True),
     Column('id_tag', ForeignKey('tags.id_tag'), primary_key=True),
+    Index('ix_task_tag_id_tag_id_task', 'id_tag', 'id_task'),
 )
 
 
@@ -66,18 +93,49 @@ task_workbench = Table(
         ForeignKey('workbenches.id_workbench'),
         primary_key=True,
     ),
+    Index('ix_task_workbench_id_workbench_id_task', 'id_workbench', 'id_task'),
 )
 
 
 @table_registry.mapped_as_dataclass
 class Task:
     __tablename__ = 'tasks'
+    __table_args__ = (
+        Index('ix_tasks_user_email_id_task', 'user_email', 'id_task'),
+        Index('ix_tasks_user_email_done', 'user_email', 'done'),
+        Index('ix_tasks_user_email_reminder', 'user_email', 'reminder'),
+        Index('ix_tasks_user_email_priority', 'user_email', 'priority'),
+        Index('ix_tasks_user_email_updated_at', 'user_email', 'updated_at'),
+        Index(
+            'ix_tasks_user_email_id_task_hot',
+            'user_email',
+            'id_task',
+            postgresql_where=HOT_TASKS,
+            sqlite_where=HOT_TASKS,
+        ),
+        Index(
+            'ix_tasks_done_updated_at_hot',
+            'done',
+            'updated_at',
+            postgresql_where=HOT_TASKS,
+            sqlite_where=HOT_TASKS,
+        ),
+        Index('ix_tasks_tag_ids', 'tag_ids', postgresql_using='gin').ddl_if(
+            dialect='postgresql'
+        ),
+    )
+    __mapper_args__ = {
+        'eager_defaults': True,
+        'primary_key': TASK_IDENTITY,
+    }
 
     id_task: Mapped[int] = mapped_column(
         Integer, primary_key=True, init=False, autoincrement=True
     )
     user_email: Mapped[str] = mapped_column(ForeignKey('users.email'))
-    user: Mapped['User'] = relationship(back_populates='tasks')
+    user: Mapped['User'] = relationship(
+        back_populates='tasks', init=False, lazy='raise'
+    )
 
     title: Mapped[str] = mapped_column(String, nullable=False)
     description: Mapped[str | None] = mapped_column(String, nullable=True)
@@ -93,21 +151,33 @@ class Task:
         'Tag',
         secondary=task_tag,
         back_populates='tasks',
-        lazy='selectin',
+        lazy='raise',
+    )
+    # copy of the task_tag rows so tag filters are a containment check on
+    # the row itself; task_tag stays the source of truth
+    tag_ids: Mapped[list[int]] = mapped_column(
+        TagIds,
+        nullable=False,
+        init=False,
+        default_factory=list,
+        insert_default=list,
     )
     workbenches: Mapped[List['Workbench']] = relationship(
         'Workbench',
         secondary=task_workbench,
         back_populates='tasks',
-        lazy='selectin',
+        lazy='raise',
     )
     priority: Mapped[int] = mapped_column(Integer, default=100, nullable=False)
+    archived_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, init=False, default=None
+    )
 
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
         init=False,
         server_default=func.now(),
-        server_onupdate=func.now(),
+        onupdate=func.now(),
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime, init=False, server_default=func.now()
@@ -117,6 +187,7 @@ class Task:
 @table_registry.mapped_as_dataclass
 class Tag:
     __tablename__ = 'tags'
+    __mapper_args__ = {'eager_defaults': True}
     __table_args__ = (UniqueConstraint('user_email', 'name'),)
 
     id_tag: Mapped[int] = mapped_column(
@@ -126,13 +197,15 @@ class Tag:
     color_hex: Mapped[str | None] = mapped_column(String, nullable=True)
 
     user_email: Mapped[str] = mapped_column(ForeignKey('users.email'))
-    user: Mapped['User'] = relationship(back_populates='tags')
+    user: Mapped['User'] = relationship(
+        back_populates='tags', init=False, lazy='raise'
+    )
 
     tasks: Mapped[List['Task']] = relationship(
         'Task',
         secondary=task_tag,
         back_populates='tags',
-        lazy='selectin',
+        lazy='raise',
         init=False,
     )
 
@@ -140,7 +213,7 @@ class Tag:
         DateTime,
         init=False,
         server_default=func.now(),
-        server_onupdate=func.now(),
+        onupdate=func.now(),
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime, init=False, server_default=func.now()
@@ -150,16 +223,19 @@ class Tag:
 @table_registry.mapped_as_dataclass
 class Workbench:
     __tablename__ = 'workbenches'
+    __mapper_args__ = {'eager_defaults': True}
     __table_args__ = (UniqueConstraint('user_email', 'name'),)
 
     user_email: Mapped[str] = mapped_column(ForeignKey('users.email'))
-    user: Mapped['User'] = relationship(back_populates='workbenches')
+    user: Mapped['User'] = relationship(
+        back_populates='workbenches', init=False, lazy='raise'
+    )
 
     tasks: Mapped[List['Task']] = relationship(
         'Task',
         secondary=task_workbench,
         back_populates='workbenches',
-        lazy='selectin',
+        lazy='raise',
         init=False,
     )
 
@@ -173,7 +249,7 @@ class Workbench:
         DateTime,
         init=False,
         server_default=func.now(),
-        server_onupdate=func.now(),
+        onupdate=func.now(),
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime, init=False, server_default=func.now()
@@ -183,16 +259,20 @@ class Workbench:
 @table_registry.mapped_as_dataclass
 class View:
     __tablename__ = 'views'
+    __mapper_args__ = {'eager_defaults': True}
     __table_args__ = (UniqueConstraint('user_email', 'name'),)
 
     user_email: Mapped[str] = mapped_column(ForeignKey('users.email'))
-    user: Mapped['User'] = relationship(back_populates='views')
+    user: Mapped['User'] = relationship(
+        back_populates='views', init=False, lazy='raise'
+    )
 
     name: Mapped[str] = mapped_column(String, nullable=False)
     filters: Mapped[List['Filter']] = relationship(
         back_populates='view',
         init=False,
         cascade='all, delete-orphan',
+        lazy='raise',
     )
     id_view: Mapped[int] = mapped_column(
         Integer, primary_key=True, init=False, autoincrement=True
@@ -202,7 +282,7 @@ class View:
         DateTime,
         init=False,
         server_default=func.now(),
-        server_onupdate=func.now(),
+        onupdate=func.now(),
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime, init=False, server_default=func.now()
@@ -212,9 +292,11 @@ class View:
 @table_registry.mapped_as_dataclass
 class Filter:
     __tablename__ = 'filters'
+    __mapper_args__ = {'eager_defaults': True}
+    __table_args__ = (Index('ix_filters_id_view', 'id_view'),)
 
     id_view: Mapped[int] = mapped_column(ForeignKey('views.id_view'))
-    view: Mapped['View'] = relationship(back_populates='filters')
+    view: Mapped['View'] = relationship(back_populates='filters', lazy='raise')
 
     id_filter: Mapped[int] = mapped_column(
         Integer, primary_key=True, init=False, autoincrement=True
@@ -228,9 +310,18 @@ class Filter:
     done: Mapped[bool | None] = mapped_column(
         Boolean, nullable=True, default=None
     )
+    archived: Mapped[bool | None] = mapped_column(
+        Boolean, nullable=True, default=None
+    )
     tags: Mapped[Sequence[str] | None] = mapped_column(
         JSON, nullable=True, default=None
     )
+    tags_any: Mapped[Sequence[str] | None] = mapped_column(
+        JSON, nullable=True, default=None
+    )
+    tags_none: Mapped[Sequence[str] | None] = mapped_column(
+        JSON, nullable=True, default=None
+    )
     reminder: Mapped[Sequence[str | None] | None] = mapped_column(
         JSON, nullable=True, default=None
     )
@@ -240,7 +331,7 @@ class Filter:
     state: Mapped[Sequence[str] | None] = mapped_column(
         JSON, nullable=True, default=None
     )
-    priority: Mapped[tuple[int | None, int | None]] = mapped_column(
+    priority: Mapped[Sequence[int | None] | None] = mapped_column(
         JSON, nullable=True, default=None
     )
 
@@ -251,8 +342,81 @@ class Filter:
         DateTime,
         init=False,
         server_default=func.now(),
-        server_onupdate=func.now(),
+        onupdate=func.now(),
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, init=False, server_default=func.now()
+    )
+
+
+@table_registry.mapped_as_dataclass
+class RevokedToken:
+    __tablename__ = 'revoked_tokens'
+    __table_args__ = (
+        Index('ix_revoked_tokens_expires_at', 'expires_at'),
+        Index('ix_revoked_tokens_user_email', 'user_email'),
     )
+
+    jti: Mapped[str] = mapped_column(String, primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # no foreign key: a revocation may outlive the user's row on a shard
+    user_email: Mapped[str | None] = mapped_column(String, nullable=True)
+
     created_at: Mapped[datetime] = mapped_column(
         DateTime, init=False, server_default=func.now()
     )
+
+
+@table_registry.mapped_as_dataclass
+class UsernameClaim:
+    # the global username index, kept on the default shard only
+    __tablename__ = 'usernames'
+
+    username: Mapped[str] = mapped_column(String, primary_key=True)
+    email: Mapped[str] = mapped_column(String, nullable=False)
+
+
+SEARCH_CONFIG = 'simple'
+
+tasks_fts = table('tasks_fts', column('rowid', Integer))
+
+_SEARCH_DDL = {
+    'postgresql': [
+        'ALTER TABLE tasks ADD COLUMN search_vector tsvector '
+        + f"GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', "
+        + "coalesce(title, '') || ' ' || coalesce(description, ''))) STORED",
+        'CREATE INDEX ix_tasks_search_vector ON tasks '
+        + 'USING GIN (search_vector)',
+    ],
+    'sqlite': [
+        'CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5('
+        + "title, description, content='tasks', content_rowid='id_task', "
+        + "tokenize='unicode61 remove_diacritics 2')",
+        'CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks '
+        + 'BEGIN INSERT INTO tasks_fts(rowid, title, description) '
+        + 'VALUES (new.id_task, new.title, new.description); END',
+        'CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks '
+        + 'BEGIN INSERT INTO tasks_fts(tasks_fts, rowid, title, description) '
+        + "VALUES ('delete', old.id_task, old.title, old.description); END",
+        'CREATE TRIGGER IF NOT EXISTS tasks_fts_au '
+        + 'AFTER UPDATE OF title, description ON tasks '
+        + 'BEGIN INSERT INTO tasks_fts(tasks_fts, rowid, title, description) '
+        + "VALUES ('delete', old.id_task, old.title, old.description); "
+        + 'INSERT INTO tasks_fts(rowid, title, description) '
+        + 'VALUES (new.id_task, new.title, new.description); END',
+    ],
+}
+
+for _dialect, _statements in _SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            Task.__table__,
+            'after_create',
+            DDL(_statement).execute_if(dialect=_dialect),
+        )
+
+event.listen(
+    Task.__table__,
+    'before_drop',
+    DDL('DROP TABLE IF EXISTS tasks_fts').execute_if(dialect='sqlite'),
+)
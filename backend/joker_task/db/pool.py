@@ -0,0 +1,132 @@
+from time import perf_counter
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from loguru import logger
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+CHECKOUT_AT = 'checkout_at'
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.checkout_total = 0.0
+        self.checkout_max = 0.0
+
+    def observe_wait(self, seconds: float) -> None:
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+    def observe_checkout(self, seconds: float) -> None:
+        self.checkout_total += seconds
+        self.checkout_max = max(self.checkout_max, seconds)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'connects': self.connects,
+            'checkouts': self.checkouts,
+            'checkins': self.checkins,
+            'in_use': self.checkouts - self.checkins,
+            'invalidations': self.invalidations,
+            'timeouts': self.timeouts,
+            'wait_avg_ms': self._avg_ms(self.wait_total, self.checkouts),
+            'wait_max_ms': self.wait_max * 1000,
+            'checkout_avg_ms': self._avg_ms(
+                self.checkout_total, self.checkins
+            ),
+            'checkout_max_ms': self.checkout_max * 1000,
+        }
+
+    @staticmethod
+    def _avg_ms(total: float, count: int) -> float:
+        return total / count * 1000 if count else 0.0
+
+
+_engine_metrics: WeakKeyDictionary[Engine, PoolMetrics] = WeakKeyDictionary()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    metrics: PoolMetrics | None = None
+
+    def recreate(self) -> 'InstrumentedPool':
+        # engine.dispose() swaps in a recreated pool; events carry over
+        # on their own, the metrics have to be handed on
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool  # type: ignore
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            logger.error(f'connection pool exhausted: {self.status()}')
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_wait(perf_counter() - start)
+
+
+def instrument(engine: AsyncEngine) -> PoolMetrics:
+    pool = engine.sync_engine.pool
+    metrics = PoolMetrics()
+    _engine_metrics[engine.sync_engine] = metrics
+    if isinstance(pool, InstrumentedPool):
+        pool.metrics = metrics
+
+    @event.listens_for(pool, 'connect')
+    def on_connect(dbapi_connection, record):
+        metrics.connects += 1
+
+    @event.listens_for(pool, 'checkout')
+    def on_checkout(dbapi_connection, record, proxy):
+        metrics.checkouts += 1
+        record.info[CHECKOUT_AT] = perf_counter()
+
+    @event.listens_for(pool, 'checkin')
+    def on_checkin(dbapi_connection, record):
+        checkout_at = record.info.pop(CHECKOUT_AT, None)
+        if checkout_at is None:
+            return
+        metrics.checkins += 1
+        metrics.observe_checkout(perf_counter() - checkout_at)
+
+    @event.listens_for(pool, 'invalidate')
+    def on_invalidate(dbapi_connection, record, exception):
+        metrics.invalidations += 1
+
+    return metrics
+
+
+def pool_metrics(engine: AsyncEngine) -> PoolMetrics:
+    return _engine_metrics.setdefault(engine.sync_engine, PoolMetrics())
+
+
+def pool_status(engine: AsyncEngine) -> dict[str, Any]:
+    pool = engine.sync_engine.pool
+    status = {'pool': type(pool).__name__, **pool_metrics(engine).stats()}
+
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+        })
+
+    return status
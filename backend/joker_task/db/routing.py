@@ -0,0 +1,74 @@
+from hashlib import blake2b
+from itertools import cycle
+from math import ceil
+from time import time
+from typing import Sequence
+
+from fastapi import Request, Response
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+PRIMARY_COOKIE = 'read_primary_until'
+READ_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: Sequence[AsyncEngine],
+        sticky_seconds: float,
+        secure_cookie: bool = False,
+    ):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.sticky_seconds = sticky_seconds
+        self.secure_cookie = secure_cookie
+        self._replicas = cycle(self.replicas)
+
+    def engine_for(
+        self, request: Request, email: str | None = None
+    ) -> AsyncEngine:
+        if not self.replicas or request.method not in READ_METHODS:
+            return self.primary
+
+        if email is not None and self._is_sticky(request, email):
+            logger.debug('recent write, reading from primary')
+            return self.primary
+
+        return next(self._replicas)
+
+    def mark_write(
+        self, request: Request, response: Response, email: str
+    ) -> None:
+        if not self.replicas or request.method in READ_METHODS:
+            return
+
+        response.set_cookie(
+            key=PRIMARY_COOKIE,
+            value=f'{time() + self.sticky_seconds:.3f}:{sticky_owner(email)}',
+            httponly=True,
+            secure=self.secure_cookie,
+            samesite='strict',
+            max_age=ceil(self.sticky_seconds),
+            path='/',
+        )
+
+    @staticmethod
+    def _is_sticky(request: Request, email: str) -> bool:
+        cookie = request.cookies.get(PRIMARY_COOKIE, '')
+        until, _, owner = cookie.partition(':')
+        try:
+            return owner == sticky_owner(email) and float(until) > time()
+        except ValueError:
+            return False
+
+    async def dispose(self) -> None:
+        await self.primary.dispose()
+        for replica in self.replicas:
+            await replica.dispose()
+
+
+def sticky_owner(email: str) -> str:
+    # another user on the same browser must not inherit the stickiness
+    return blake2b(email.encode(), digest_size=8).hexdigest()
@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+from datetime import datetime
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from loguru import logger
+from sqlalchemy import ColumnElement, Table, delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from joker_task.db import database
+from joker_task.db.models import (
+    Filter,
+    RevokedToken,
+    Tag,
+    Task,
+    User,
+    View,
+    Workbench,
+    task_tag,
+    task_workbench,
+)
+from joker_task.db.sharding import ShardMap
+
+users = User.__table__
+tags = Tag.__table__
+workbenches = Workbench.__table__
+tasks = Task.__table__
+views = View.__table__
+filters = Filter.__table__
+revoked_tokens = RevokedToken.__table__
+
+
+async def _copy(
+    source: AsyncConnection,
+    target: AsyncConnection,
+    table: Table,
+    where: ColumnElement[bool],
+    key: str | None = None,
+    **remap: dict[int, int],
+) -> dict[int, int]:
+    statement = select(table).where(where).order_by(*table.primary_key)
+    rows = (await source.execute(statement)).mappings().all()
+    if not rows:
+        return {}
+
+    values: list[dict[str, Any]] = []
+    for row in rows:
+        value = {name: row[name] for name in row.keys() if name != key}
+        for name, ids in remap.items():
+            if name == 'tag_ids':
+                value[name] = sorted(ids[id] for id in row[name])
+            else:
+                value[name] = ids[row[name]]
+        values.append(value)
+
+    if key is None:
+        await target.execute(insert(table), values)
+        return {}
+
+    new_ids = await target.scalars(
+        insert(table).returning(table.c[key], sort_by_parameter_order=True),
+        values,
+    )
+    return dict(zip((row[key] for row in rows), new_ids))
+
+
+async def _copy_user(
+    source: AsyncConnection, target: AsyncConnection, email: str
+) -> dict[str, int]:
+    user_tasks = select(tasks.c.id_task).where(tasks.c.user_email == email)
+    user_views = select(views.c.id_view).where(views.c.user_email == email)
+
+    await _copy(source, target, users, users.c.email == email)
+    tag_ids = await _copy(
+        source, target, tags, tags.c.user_email == email, 'id_tag'
+    )
+    workbench_ids = await _copy(
+        source,
+        target,
+        workbenches,
+        workbenches.c.user_email == email,
+        'id_workbench',
+    )
+    task_ids = await _copy(
+        source,
+        target,
+        tasks,
+        tasks.c.user_email == email,
+        'id_task',
+        tag_ids=tag_ids,
+    )
+    await _copy(
+        source,
+        target,
+        task_tag,
+        task_tag.c.id_task.in_(user_tasks),
+        id_task=task_ids,
+        id_tag=tag_ids,
+    )
+    await _copy(
+        source,
+        target,
+        task_workbench,
+        task_workbench.c.id_task.in_(user_tasks),
+        id_task=task_ids,
+        id_workbench=workbench_ids,
+    )
+    view_ids = await _copy(
+        source, target, views, views.c.user_email == email, 'id_view'
+    )
+    await _copy(
+        source,
+        target,
+        filters,
+        filters.c.id_view.in_(user_views),
+        'id_filter',
+        id_view=view_ids,
+    )
+
+    # get_user asks the owner's shard, so revocations move with the user
+    now = datetime.now(ZoneInfo('UTC')).replace(tzinfo=None)
+    await _copy(
+        source,
+        target,
+        revoked_tokens,
+        (revoked_tokens.c.user_email == email)
+        & (revoked_tokens.c.expires_at > now),
+    )
+
+    return {
+        'tags': len(tag_ids),
+        'workbenches': len(workbench_ids),
+        'tasks': len(task_ids),
+        'views': len(view_ids),
+    }
+
+
+async def _delete_user(source: AsyncConnection, email: str) -> None:
+    user_tasks = select(tasks.c.id_task).where(tasks.c.user_email == email)
+    user_views = select(views.c.id_view).where(views.c.user_email == email)
+
+    await source.execute(
+        delete(filters).where(filters.c.id_view.in_(user_views))
+    )
+    await source.execute(delete(views).where(views.c.user_email == email))
+    await source.execute(
+        delete(task_workbench).where(task_workbench.c.id_task.in_(user_tasks))
+    )
+    await source.execute(
+        delete(task_tag).where(task_tag.c.id_task.in_(user_tasks))
+    )
+    await source.execute(delete(tasks).where(tasks.c.user_email == email))
+    await source.execute(
+        delete(workbenches).where(workbenches.c.user_email == email)
+    )
+    await source.execute(delete(tags).where(tags.c.user_email == email))
+    await source.execute(delete(users).where(users.c.email == email))
+    await source.execute(
+        delete(revoked_tokens).where(revoked_tokens.c.user_email == email)
+    )
+
+
+async def _has_user(engine: AsyncEngine, email: str) -> bool:
+    async with engine.connect() as conn:
+        found = await conn.scalar(
+            select(users.c.email).where(users.c.email == email)
+        )
+    return found is not None
+
+
+async def move_user(
+    email: str, source: AsyncEngine, target: AsyncEngine
+) -> dict[str, int]:
+    logger.info(f'moving {email} from {source.url} to {target.url}')
+
+    # the copy commits before the source is cleared, so a user found on
+    # both sides is a move whose delete failed: only finish the delete
+    moved: dict[str, int] = {}
+    if await _has_user(target, email):
+        logger.warning(f'{email} already on target, removing the old copy')
+    else:
+        async with source.connect() as conn, target.begin() as copy:
+            moved = await _copy_user(conn, copy, email)
+
+    async with source.begin() as conn:
+        await _delete_user(conn, email)
+
+    logger.info(f'moved {email}: {moved}')
+    return moved
+
+
+async def move_to_home(shards: ShardMap, email: str) -> list[str]:
+    home = shards.shard_for(email)
+    found = [
+        name
+        for name, shard in shards.routers.items()
+        if await _has_user(shard.primary, email)
+    ]
+    if not found:
+        raise ValueError(f'{email} not found on any shard')
+
+    moved_from = [name for name in found if name != home]
+    for name in moved_from:
+        await move_user(
+            email, shards.routers[name].primary, shards.routers[home].primary
+        )
+    return moved_from
+
+
+async def misplaced(shards: ShardMap) -> list[tuple[str, str, str]]:
+    result = []
+    for name, shard in shards.routers.items():
+        async with shard.primary.connect() as conn:
+            emails = await conn.scalars(select(users.c.email))
+            result.extend(
+                (email, name, shards.shard_for(email))
+                for email in emails
+                if shards.shard_for(email) != name
+            )
+    return result
+
+
+async def rebalance(shards: ShardMap, dry_run: bool = False) -> int:
+    moves = await misplaced(shards)
+    for email, current, home in moves:
+        logger.info(f'{email}: {current} -> {home}')
+        if not dry_run:
+            await move_user(
+                email,
+                shards.routers[current].primary,
+                shards.routers[home].primary,
+            )
+    return len(moves)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='move users to the shard the hash ring assigns them; '
+        'run with the new DATABASE_SHARD_URLS before the API uses it, '
+        'while the users being moved are not writing'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+    move = commands.add_parser('move', help='move one user to its shard')
+    move.add_argument('email')
+    balance = commands.add_parser(
+        'rebalance', help='move every misplaced user'
+    )
+    balance.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    if database.shards is None:
+        raise SystemExit('DATABASE_SHARD_URLS is not set')
+
+    try:
+        if args.command == 'move':
+            moved_from = await move_to_home(database.shards, args.email)
+            home = database.shards.shard_for(args.email)
+            print(f'{args.email}: {moved_from or "already"} -> {home}')
+        else:
+            moved = await rebalance(database.shards, args.dry_run)
+            print(f'{moved} users {"to move" if args.dry_run else "moved"}')
+    finally:
+        await database.shards.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
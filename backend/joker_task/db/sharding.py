@@ -0,0 +1,64 @@
+from bisect import bisect
+from hashlib import blake2b
+from typing import Any, Sequence
+
+from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from joker_task.db.routing import ReplicaRouter
+
+DEFAULT_SHARD = 'default'
+SHARD_KEY = 'shard_key'
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(blake2b(key.encode(), digest_size=8).digest())
+
+
+class HashRing:
+    def __init__(self, nodes: Sequence[str], vnodes: int):
+        ring = sorted(
+            (_hash(f'{node}#{replica}'), node)
+            for node in nodes
+            for replica in range(vnodes)
+        )
+        self._points = [point for point, _ in ring]
+        self._nodes = [node for _, node in ring]
+
+    def node_for(self, key: str) -> str:
+        index = bisect(self._points, _hash(key)) % len(self._points)
+        return self._nodes[index]
+
+
+class ShardMap:
+    def __init__(self, routers: dict[str, ReplicaRouter], vnodes: int):
+        self.routers = routers
+        self.ring = HashRing(list(routers), vnodes)
+
+    def shard_for(self, email: str) -> str:
+        return self.ring.node_for(email)
+
+    def router_for(self, email: str | None) -> ReplicaRouter:
+        if email is None:
+            return self.routers[DEFAULT_SHARD]
+        return self.routers[self.shard_for(email)]
+
+    async def dispose(self) -> None:
+        for router in self.routers.values():
+            await router.dispose()
+
+
+class ShardSession(Session):
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kw) -> Engine:
+        email = self.info.get(SHARD_KEY)
+        shards: ShardMap | None = self.info.get('shards')
+        if shards is None:
+            router: ReplicaRouter = self.info['router']
+        else:
+            router = shards.router_for(email)
+        return router.engine_for(self.info['request'], email).sync_engine
+
+
+def use_shard(session: AsyncSession, email: str) -> None:
+    session.info[SHARD_KEY] = email
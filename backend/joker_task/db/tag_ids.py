@@ -0,0 +1,100 @@
+from sqlalchemy import JSON, Boolean, Integer
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.compiler import SQLCompiler
+from sqlalchemy.sql.functions import FunctionElement
+
+TagIds = JSON().with_variant(postgresql.ARRAY(Integer), 'postgresql')
+
+
+class contains_tag_ids(FunctionElement):
+    type = Boolean()
+    inherit_cache = True
+    name = 'contains_tag_ids'
+
+
+class overlaps_tag_ids(FunctionElement):
+    type = Boolean()
+    inherit_cache = True
+    name = 'overlaps_tag_ids'
+
+
+class by_dialect(FunctionElement):
+    type = Boolean()
+    inherit_cache = True
+    name = 'by_dialect'
+
+
+class remove_tag_id(FunctionElement):
+    type = TagIds
+    inherit_cache = True
+    name = 'remove_tag_id'
+
+
+def _split(
+    element: FunctionElement, compiler: SQLCompiler, **kw
+) -> tuple[str, list[str]]:
+    column, *args = (
+        compiler.process(clause, **kw) for clause in element.clauses
+    )
+    return column, args
+
+
+@compiles(contains_tag_ids, 'postgresql')
+def _contains_postgresql(element, compiler, **kw):
+    column, ids = _split(element, compiler, **kw)
+    return f'({column} @> ARRAY[{", ".join(ids)}]::integer[])'
+
+
+@compiles(contains_tag_ids)
+def _contains(element, compiler, **kw):
+    column, ids = _split(element, compiler, **kw)
+    return '({})'.format(
+        ' AND '.join(
+            f'EXISTS (SELECT 1 FROM json_each({column}) AS tag_id '
+            f'WHERE tag_id.value = {id})'
+            for id in ids
+        )
+    )
+
+
+@compiles(overlaps_tag_ids, 'postgresql')
+def _overlaps_postgresql(element, compiler, **kw):
+    column, (ids,) = _split(element, compiler, **kw)
+    return f'({column} && ARRAY{ids})'
+
+
+@compiles(overlaps_tag_ids)
+def _overlaps(element, compiler, **kw):
+    column, (ids,) = _split(element, compiler, **kw)
+    return (
+        f'EXISTS (SELECT 1 FROM json_each({column}) AS tag_id '
+        f'WHERE tag_id.value IN {ids})'
+    )
+
+
+@compiles(by_dialect, 'postgresql')
+def _by_dialect_postgresql(element, compiler, **kw):
+    clause, _ = element.clauses
+    return compiler.process(clause, **kw)
+
+
+@compiles(by_dialect)
+def _by_dialect(element, compiler, **kw):
+    _, clause = element.clauses
+    return compiler.process(clause, **kw)
+
+
+@compiles(remove_tag_id, 'postgresql')
+def _remove_postgresql(element, compiler, **kw):
+    column, (id,) = _split(element, compiler, **kw)
+    return f'array_remove({column}, {id})'
+
+
+@compiles(remove_tag_id)
+def _remove(element, compiler, **kw):
+    column, (id,) = _split(element, compiler, **kw)
+    return (
+        f'(SELECT json_group_array(tag_id.value) FROM json_each({column}) '
+        f'AS tag_id WHERE tag_id.value != {id})'
+    )
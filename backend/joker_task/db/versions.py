@@ -0,0 +1,79 @@
+from typing import Any
+
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from joker_task.db.models import Filter, Tag, Task, User, View, Workbench
+
+CHANGED_USERS = 'changed_users'
+CHANGED_VIEWS = 'changed_views'
+WRITTEN_USERS = 'written_users'
+ON_WRITE = 'on_write'
+
+OWNED = (Task, Tag, Workbench, View)
+
+
+def mark_changed(session: AsyncSession | Session, *emails: str) -> None:
+    session.info.setdefault(CHANGED_USERS, set()).update(emails)
+
+
+def _mark(session: Session, obj: Any) -> None:
+    if isinstance(obj, OWNED):
+        mark_changed(session, obj.user_email)
+    elif isinstance(obj, Filter):
+        session.info.setdefault(CHANGED_VIEWS, set()).add(obj.id_view)
+    elif isinstance(obj, User):
+        # an account change has no data version but is read back too
+        session.info.setdefault(WRITTEN_USERS, set()).add(obj.email)
+
+
+@event.listens_for(Session, 'before_flush')
+def _track_flush(session: Session, flush_context: Any, instances: Any):
+    for obj in (*session.new, *session.deleted):
+        _mark(session, obj)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            _mark(session, obj)
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_versions(session: Session):
+    # commit runs this hook before its own final flush
+    session.flush()
+
+    emails: set[str] = session.info.pop(CHANGED_USERS, set())
+    views = session.info.pop(CHANGED_VIEWS, set())
+    if views:
+        emails.update(
+            session.scalars(
+                select(View.user_email).where(View.id_view.in_(views))
+            )
+        )
+    session.info.setdefault(WRITTEN_USERS, set()).update(emails)
+    if not emails:
+        return
+
+    # the bump commits with the change itself and row locks serialize
+    # concurrent writers, so a newer commit always gets a newer version
+    session.execute(
+        update(User)
+        .where(User.email.in_(sorted(emails)))
+        .values(data_version=User.data_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+@event.listens_for(Session, 'after_commit')
+def _report_writes(session: Session):
+    emails = session.info.pop(WRITTEN_USERS, set())
+    on_write = session.info.get(ON_WRITE)
+    if emails and on_write is not None:
+        on_write(emails)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changes(session: Session):
+    session.info.pop(CHANGED_USERS, None)
+    session.info.pop(CHANGED_VIEWS, None)
+    session.info.pop(WRITTEN_USERS, None)
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Any, Sequence
+from datetime import timedelta
+from typing import Any, AsyncIterator, Hashable, Iterable, Sequence
 
+from fastapi import HTTPException, Request, Response
 from sqlalchemy import Select
 
 from joker_task.db.models import Filter, Tag, Task, User, View, Workbench
@@ -9,7 +11,13 @@ from joker_task.schemas import (
     FilterSchema,
     TagPublic,
     TagSchema,
+    TaskBulkUpdate,
+    TaskPartial,
+    TaskProjection,
     TaskPublic,
+    TaskQuery,
+    TaskSchema,
+    TaskSearch,
     UserPublic,
     ViewPublic,
     ViewResult,
@@ -18,83 +26,163 @@ from joker_task.schemas import (
     ViewUpdate,
     WorkbenchPublic,
 )
+from joker_task.service.principal import Principal
 
 
 class TaskCollectorInterface(ABC):
     @abstractmethod
-    async def collect_task_by_id(self, user: User, id_task: int) -> Task:
+    async def collect_task_by_id(
+        self,
+        user: Principal,
+        id_task: int,
+        projection: TaskProjection | None = None,
+    ) -> Task:
         pass  # pragma: no cover
 
     @abstractmethod
     async def collect_task_by_filter(
-        self, user: User, filter: FilterSchema
+        self, user: Principal, filter: FilterSchema
     ) -> list[Task]:
         pass  # pragma: no cover
 
+    @abstractmethod
+    async def collect_task_page(
+        self, user: Principal, query: TaskQuery
+    ) -> tuple[list[Task], str | None]:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def stream_task_by_filter(
+        self, user: Principal, query: TaskQuery
+    ) -> AsyncIterator[Task]:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    async def count_task_by_filter(
+        self, user: Principal, filter: FilterSchema, facets: Sequence[str]
+    ) -> tuple[int, dict[str, dict[str, int]]]:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def make_filter_query(
+        self, user: Principal, filter: FilterSchema, tag_ids: bool = False
+    ) -> Select:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    async def search_tasks(
+        self, user: Principal, search: TaskSearch
+    ) -> list[tuple[Task, float, str | None]]:
+        pass  # pragma: no cover
+
 
 class StrategyMakeFilterInterface(ABC):
     @abstractmethod
     def make(self, cur_filter: Select, values: Any, campo: str) -> Select:
         pass  # pragma: no cover
 
+    @abstractmethod
+    def bind(self, values: Any, campo: str) -> dict[str, Any]:
+        pass  # pragma: no cover
+
+    @staticmethod
+    def shape(values: Any) -> Hashable:
+        return None
+
 
 class TagServiceInterface(ABC):
     @abstractmethod
     async def get_or_create_tags(
-        self, user: User, tags: Sequence[TagSchema] | None
+        self, user: Principal, tags: Sequence[TagSchema] | None
     ) -> list[Tag]:
         pass  # pragma: no cover
 
     @abstractmethod
-    async def collect_tag_by_id(self, user: User, id: int) -> Tag:
+    async def collect_tags_by_name(
+        self, user: Principal, names: Sequence[str]
+    ) -> dict[str, Tag]:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    async def create_tags(
+        self, user: Principal, tags: Sequence[TagSchema]
+    ) -> dict[str, Tag]:
+        pass  # pragma: no cover
+
+    @staticmethod
+    @abstractmethod
+    def tag_ids(tags: Iterable[Tag]) -> list[int]:
+        pass  # pragma: no cover
+
+    @staticmethod
+    @abstractmethod
+    def check_color_hex(color_hex: str | None) -> None:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    async def collect_tag_by_id(self, user: Principal, id: int) -> Tag:
         pass  # pragma: no cover
 
     @abstractmethod
-    async def collect_tags(self, user: User) -> Sequence[Tag]:
+    async def collect_tags(self, user: Principal) -> Sequence[Tag]:
         pass  # pragma: no cover
 
     @abstractmethod
     async def check_tag_name_exists(
-        self, user: User, name: str, id: int
+        self, user: Principal, name: str, id: int
     ) -> None:
         pass  # pragma: no cover
 
     @abstractmethod
     async def update_tags_of_task(
         self,
-        user: User,
+        user: Principal,
         task: Task,
         tags_add: Sequence[TagSchema] | None,
         tags_remove: Sequence[TagSchema] | None,
     ) -> None:
         pass  # pragma: no cover
 
+    @abstractmethod
+    async def delete_tag(self, user: Principal, tag: Tag) -> None:
+        pass  # pragma: no cover
+
 
 class WorkbenchServiceInterface(ABC):
     @abstractmethod
     async def collect_workbench_by_id(
-        self, user: User, id_workbench: int
+        self, user: Principal, id_workbench: int, with_tasks: bool = False
     ) -> Workbench:
         pass  # pragma: no cover
 
     @abstractmethod
     async def collect_workbenches_by_id(
-        self, user: User, id_workbenches: Sequence[int]
+        self, user: Principal, id_workbenches: Sequence[int]
     ) -> Sequence[Workbench]:
         pass  # pragma: no cover
 
     @abstractmethod
-    async def collect_workbenches(self, user: User) -> Sequence[Workbench]:
+    async def collect_workbenches_indexed(
+        self, user: Principal, id_workbenches: Sequence[int]
+    ) -> dict[int, Workbench]:
         pass  # pragma: no cover
 
     @abstractmethod
-    async def check_workbench_name_exists(self, user: User, name: str) -> None:
+    async def collect_workbenches(
+        self, user: Principal
+    ) -> Sequence[Workbench]:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    async def check_workbench_name_exists(
+        self, user: Principal, name: str
+    ) -> None:
         pass  # pragma: no cover
 
     @abstractmethod
     async def update_workbenches_of_task(
         self,
-        user: User,
+        user: Principal,
         task: Task,
         workbenches_add: Sequence[int] | None,
         workbenches_remove: Sequence[int] | None,
@@ -102,41 +190,96 @@ class WorkbenchServiceInterface(ABC):
         pass  # pragma: no cover
 
 
+class TaskBulkServiceInterface(ABC):
+    @abstractmethod
+    async def create_tasks(
+        self, user: Principal, tasks: Sequence[TaskSchema]
+    ) -> list[Task | HTTPException]:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    async def update_tasks_by_filter(
+        self, user: Principal, filter: FilterSchema, task: TaskBulkUpdate
+    ) -> int:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    async def delete_tasks_by_filter(
+        self, user: Principal, filter: FilterSchema
+    ) -> int:
+        pass  # pragma: no cover
+
+
+class ArchiveServiceInterface(ABC):
+    @abstractmethod
+    async def archive_done_tasks(
+        self, older_than: timedelta, batch_size: int
+    ) -> int:
+        pass  # pragma: no cover
+
+
+class ETagServiceInterface(ABC):
+    @abstractmethod
+    async def tasks_etag(self, user: Principal) -> str:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    async def tags_etag(self, user: Principal) -> str:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    async def workbenches_etag(self, user: Principal) -> str:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    async def view_etag(self, user: Principal, id_view: int) -> str:
+        pass  # pragma: no cover
+
+    @staticmethod
+    @abstractmethod
+    def check_not_modified(
+        request: Request, response: Response, etag: str
+    ) -> Response | None:
+        pass  # pragma: no cover
+
+
 class ViewServiceInterface(ABC):
     @abstractmethod
-    async def create_view(self, user: User, view_schema: ViewSchema) -> View:
+    async def create_view(
+        self, user: Principal, view_schema: ViewSchema
+    ) -> View:
         pass  # pragma: no cover
 
     @abstractmethod
-    async def list_views(self, user: User) -> Sequence[View]:
+    async def list_views(self, user: Principal) -> Sequence[View]:
         pass  # pragma: no cover
 
     @abstractmethod
-    async def get_view_by_id(self, user: User, id_view: int) -> View:
+    async def get_view_by_id(self, user: Principal, id_view: int) -> View:
         pass  # pragma: no cover
 
     @abstractmethod
     async def apply_view(
-        self, user: User, id_view: int
+        self, user: Principal, id_view: int
     ) -> dict[int, list[Task]]:
         pass  # pragma: no cover
 
     @abstractmethod
     async def update_view(
-        self, user: User, id_view: int, view: ViewUpdate
+        self, user: Principal, id_view: int, view: ViewUpdate
     ) -> View:
         pass  # pragma: no cover
 
     @abstractmethod
     async def create_view_filter(
-        self, user: User, id_view: int, filter_schema: FilterSchema
+        self, user: Principal, id_view: int, filter_schema: FilterSchema
     ) -> Filter:
         pass  # pragma: no cover
 
     @abstractmethod
     async def update_view_filter(
         self,
-        user: User,
+        user: Principal,
         id_view: int,
         id_filter: int,
         filter_schema: FilterSchema,
@@ -145,12 +288,12 @@ class ViewServiceInterface(ABC):
 
     @abstractmethod
     async def delete_view_filter(
-        self, user: User, id_view: int, id_filter: int
+        self, user: Principal, id_view: int, id_filter: int
     ) -> None:
         pass  # pragma: no cover
 
     @abstractmethod
-    async def delete_view(self, user: User, id_view: int) -> None:
+    async def delete_view(self, user: Principal, id_view: int) -> None:
         pass  # pragma: no cover
 
 
@@ -165,6 +308,13 @@ class MapperInterface(ABC):
     def map_task_public(task_db: Task) -> TaskPublic:
         pass  # pragma: no cover
 
+    @staticmethod
+    @abstractmethod
+    def map_task_projection(
+        task_db: Task, projection: TaskProjection
+    ) -> TaskPublic | TaskPartial:
+        pass  # pragma: no cover
+
     @staticmethod
     @abstractmethod
     def map_tag_public(tag_db: Tag) -> TagPublic:
@@ -3,22 +3,30 @@ from http import HTTPStatus
 from fastapi import APIRouter, HTTPException, Request, Response
 from sqlalchemy import select
 
+from joker_task.db.database import (
+    claim_username,
+    release_username,
+    scalar_on_other_shards,
+)
 from joker_task.db.models import User
+from joker_task.db.sharding import use_shard
 from joker_task.schemas import UserPublic, UserSchema, UserUpdate
 from joker_task.service.dependencies import (
     T_Mapper,
     T_OAuth2PRF,
     T_Session,
+    T_Settings,
     T_User,
 )
+from joker_task.service.principal import principal_cache
 from joker_task.service.security import (
+    check_password,
     generate_access_token,
     generate_refresh_token,
-    get_hash_password,
-    verify_password,
+    hash_password,
+    revoke_tokens,
     verify_refresh,
 )
-from joker_task.settings import Settings
 
 auth_router = APIRouter(prefix='', tags=['auth'])
 
@@ -27,22 +35,28 @@ auth_router = APIRouter(prefix='', tags=['auth'])
     '/users/', response_model=UserPublic, status_code=HTTPStatus.OK
 )
 async def create_user(user: UserSchema, session: T_Session, mapper: T_Mapper):
-    exist_conflict = await session.scalar(
-        select(User).where(
-            (User.email == user.email) | (User.username == user.username)
-        )
+    use_shard(session, user.email)
+    conflict = select(User.email).where(
+        (User.email == user.email) | (User.username == user.username)
     )
+    exist_conflict = await session.scalar(conflict)
+    if not exist_conflict:
+        exist_conflict = await scalar_on_other_shards(user.email, conflict)
 
-    if exist_conflict:
+    if exist_conflict or not await claim_username(user.email, user.username):
         raise HTTPException(
             HTTPStatus.CONFLICT, detail='email or username already in use'
         )
 
-    user_db = User(user.email, user.username, get_hash_password(user.password))
-
-    session.add(user_db)
-    await session.commit()
-    await session.refresh(user_db)
+    try:
+        user_db = User(
+            user.email, user.username, await hash_password(user.password)
+        )
+        session.add(user_db)
+        await session.commit()
+    except Exception:
+        await release_username(user.username)
+        raise
 
     return mapper.map_user_public(user_db)
 
@@ -55,22 +69,29 @@ async def create_user(user: UserSchema, session: T_Session, mapper: T_Mapper):
     include_in_schema=False,
 )
 async def login(
-    response: Response, form_data: T_OAuth2PRF, session: T_Session
+    response: Response,
+    form_data: T_OAuth2PRF,
+    session: T_Session,
+    settings: T_Settings,
 ):
     # autenticação do usuário
+    use_shard(session, form_data.username)
     user = await session.scalar(
         select(User).where(User.email == form_data.username)
     )
-    if user is None or not verify_password(form_data.password, user.password):
+    if user is None or not await check_password(
+        form_data.password, user.password
+    ):
         raise HTTPException(
             HTTPStatus.UNAUTHORIZED, detail='invalid email or password'
         )
 
-    access_token = generate_access_token({'sub': user.email})
+    access_token = generate_access_token({
+        'sub': user.email,
+        'username': user.username,
+    })
     refresh_token = generate_refresh_token({'sub': user.email})
 
-    settings = Settings()  # type: ignore
-
     # 🍪 ACCESS TOKEN (curto)
     response.set_cookie(
         key='access_token',
@@ -101,7 +122,10 @@ async def login(
     include_in_schema=False,
 )
 async def refresh_token(
-    request: Request, response: Response, session: T_Session
+    request: Request,
+    response: Response,
+    session: T_Session,
+    settings: T_Settings,
 ):
     refresh_token = request.cookies.get('refresh_token')
 
@@ -110,8 +134,6 @@ async def refresh_token(
 
     new_access_token = await verify_refresh(refresh_token, session)
 
-    settings = Settings()  # type: ignore
-
     response.set_cookie(
         key='access_token',
         value=new_access_token,
@@ -130,7 +152,13 @@ async def refresh_token(
     status_code=HTTPStatus.OK,
     include_in_schema=False,
 )
-async def logout(response: Response):
+async def logout(request: Request, response: Response, session: T_Session):
+    await revoke_tokens(
+        session,
+        request.cookies.get('access_token'),
+        request.cookies.get('refresh_token'),
+    )
+
     response.delete_cookie('access_token', path='/')
     response.delete_cookie('refresh_token', path='/')
 
@@ -138,28 +166,68 @@ async def logout(response: Response):
 @auth_router.put(
     '/update_user/', response_model=UserPublic, status_code=HTTPStatus.OK
 )
-async def update_user(
+async def update_user(  # noqa: PLR0913, PLR0917
     user_update: UserUpdate,
     current_user: T_User,
     session: T_Session,
     mapper: T_Mapper,
+    request: Request,
+    response: Response,
+    settings: T_Settings,
 ):
     if user_update.username != current_user.username:
-        have_conflict = await session.scalar(
-            select(User).where(User.username == user_update.username)
+        conflict = select(User.email).where(
+            User.username == user_update.username
         )
+        have_conflict = await session.scalar(conflict)
+        if not have_conflict:
+            have_conflict = await scalar_on_other_shards(
+                current_user.email, conflict
+            )
 
-        if have_conflict:
+        if have_conflict or not await claim_username(
+            current_user.email, user_update.username
+        ):
             raise HTTPException(
                 HTTPStatus.CONFLICT, 'username is already in use'
             )
 
-        current_user.username = user_update.username
+    try:
+        user_db = await session.scalar(
+            select(User).where(User.email == current_user.email)
+        )
+        if user_db is None:  # pragma: no cover
+            raise HTTPException(
+                HTTPStatus.UNAUTHORIZED, 'invalid access token'
+            )
+
+        user_db.username = user_update.username
+        user_db.password = await hash_password(user_update.password)
+        await session.commit()
+    except Exception:
+        if user_update.username != current_user.username:
+            await release_username(user_update.username)
+        raise
 
-    current_user.password = get_hash_password(user_update.password)
+    if user_update.username != current_user.username:
+        await release_username(current_user.username)
 
-    session.add(current_user)
-    await session.commit()
-    await session.refresh(current_user)
+    # other workers keep the old principal until PRINCIPAL_CACHE_TTL
+    principal_cache.invalidate(user_db.email)
 
-    return mapper.map_user_public(current_user)
+    # a stateless token carries the username, so swap it for a new one
+    await revoke_tokens(session, request.cookies.get('access_token'))
+    response.set_cookie(
+        key='access_token',
+        value=generate_access_token({
+            'sub': user_db.email,
+            'username': user_db.username,
+        }),
+        httponly=True,
+        secure=settings.PROD,
+        samesite='strict',
+        max_age=60 * 15,
+        path='/',
+    )
+
+    return mapper.map_user_public(user_db)
@@ -0,0 +1,58 @@
+from hmac import compare_digest
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from loguru import logger
+
+from joker_task.db import database
+from joker_task.db.pool import pool_status
+from joker_task.schemas import MetricsPublic
+from joker_task.service.denylist import denylist
+from joker_task.service.dependencies import T_Settings
+from joker_task.service.filter_cache import filter_query_cache
+from joker_task.service.password_pool import password_pool
+from joker_task.service.principal import principal_cache
+from joker_task.service.token_cache import token_cache
+
+
+def check_metrics_token(
+    settings: T_Settings,
+    x_metrics_token: Annotated[str | None, Header()] = None,
+) -> None:
+    # pool and queue internals are for operators: with a token set it is
+    # required, and production without one does not expose them at all
+    if not settings.METRICS_TOKEN:
+        if settings.PROD:
+            raise HTTPException(HTTPStatus.NOT_FOUND, 'Not Found')
+        return
+
+    if not x_metrics_token or not compare_digest(
+        x_metrics_token, settings.METRICS_TOKEN
+    ):
+        logger.info('metrics request with a missing or wrong token')
+        raise HTTPException(HTTPStatus.UNAUTHORIZED, 'invalid metrics token')
+
+
+metrics_router = APIRouter(
+    prefix='/metrics',
+    tags=['metrics'],
+    dependencies=[Depends(check_metrics_token)],
+)
+
+
+@metrics_router.get(
+    '/', response_model=MetricsPublic, status_code=HTTPStatus.OK
+)
+async def get_metrics():
+    return {
+        'pools': {
+            name: pool_status(engine)
+            for name, engine in database.named_engines().items()
+        },
+        'filter_cache': filter_query_cache.stats(),
+        'passwords': password_pool.stats(),
+        'principals': principal_cache.stats(),
+        'tokens': token_cache.stats(),
+        'denylist': denylist.stats(),
+    }
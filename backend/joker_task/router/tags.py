@@ -1,7 +1,7 @@
 from http import HTTPStatus
 from typing import Sequence
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 
 from joker_task.schemas import (
     TagPublic,
@@ -9,6 +9,7 @@ from joker_task.schemas import (
     TagUpdate,
 )
 from joker_task.service.dependencies import (
+    T_ETagService,
     T_Mapper,
     T_Session,
     T_TagService,
@@ -32,16 +33,24 @@ async def create_tag(
 
     await session.commit()
 
-    for tag in tags_db:
-        await session.refresh(tag)
-
     return [mapper.map_tag_public(tag_db) for tag_db in tags_db]
 
 
 @tags_router.get(
     '/', response_model=list[TagPublic], status_code=HTTPStatus.OK
 )
-async def list_tags(user: T_User, tags_srv: T_TagService, mapper: T_Mapper):
+async def list_tags(  # noqa: PLR0913, PLR0917
+    request: Request,
+    response: Response,
+    user: T_User,
+    tags_srv: T_TagService,
+    mapper: T_Mapper,
+    etag_srv: T_ETagService,
+):
+    etag = await etag_srv.tags_etag(user)
+    if not_modified := etag_srv.check_not_modified(request, response, etag):
+        return not_modified
+
     tags_db = await tags_srv.collect_tags(user)
 
     return [mapper.map_tag_public(tag) for tag in tags_db]
@@ -70,7 +79,6 @@ async def update_tag(  # noqa: PLR0913, PLR0917
     session.add(tag_db)
 
     await session.commit()
-    await session.refresh(tag_db)
 
     return mapper.map_tag_public(tag_db)
 
@@ -84,5 +92,5 @@ async def delete_tag(
 ):
     tag_db = await tags_srv.collect_tag_by_id(user, id)
 
-    await session.delete(tag_db)
+    await tags_srv.delete_tag(user, tag_db)
     await session.commit()
@@ -1,26 +1,48 @@
 from http import HTTPStatus
+from typing import AsyncIterator, Sequence
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from joker_task.db.models import Task
+from joker_task.interfaces.interfaces import (
+    MapperInterface,
+    TaskCollectorInterface,
+)
 from joker_task.schemas import (
+    ResponseAffected,
+    ResponseBulkTasks,
+    ResponseSearchTasks,
     ResponseTasks,
+    TaskBulkUpdate,
+    TaskPartial,
     TaskPublic,
+    TaskQuery,
     TaskSchema,
     TaskUpdate,
 )
 from joker_task.service.dependencies import (
+    T_BulkFilter,
     T_CollectorTask,
+    T_ETagService,
     T_Filter,
     T_Mapper,
+    T_Projection,
+    T_Search,
     T_Session,
     T_TagService,
+    T_TaskBulkService,
     T_User,
     T_WorkbenchService,
 )
+from joker_task.service.principal import Principal
 
 tasks_router = APIRouter(prefix='/tasks', tags=['tasks'])
 
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
 
 @tasks_router.post(
     '/', response_model=TaskPublic, status_code=HTTPStatus.CREATED
@@ -40,7 +62,6 @@ async def create_task(  # noqa: PLR0913, PLR0917
 
     task_db = Task(
         user_email=user.email,
-        user=user,
         title=task.title,
         description=task.description,
         done=task.done or False,
@@ -51,40 +72,168 @@ async def create_task(  # noqa: PLR0913, PLR0917
         state=task.state,
         priority=task.priority,
     )
+    task_db.tag_ids = tag_srv.tag_ids(tags_db)
 
     session.add(task_db)
 
     await session.commit()
-    await session.refresh(task_db)
 
     return mapper.map_task_public(task_db)
 
 
+@tasks_router.post(
+    '/bulk', response_model=ResponseBulkTasks, status_code=HTTPStatus.OK
+)
+async def create_tasks_bulk(
+    tasks: Sequence[TaskSchema],
+    session: T_Session,
+    user: T_User,
+    bulk_srv: T_TaskBulkService,
+    mapper: T_Mapper,
+):
+    results = await bulk_srv.create_tasks(user, tasks)
+
+    responses = []
+    for index, result in enumerate(results):
+        if isinstance(result, HTTPException):
+            responses.append({
+                'index': index,
+                'status_code': result.status_code,
+                'detail': result.detail,
+            })
+        else:
+            responses.append({
+                'index': index,
+                'status_code': HTTPStatus.CREATED,
+                'task': mapper.map_task_public(result),
+            })
+
+    await session.commit()
+
+    return {'responses': responses}
+
+
 @tasks_router.get(
-    '/{id_task}', response_model=TaskPublic, status_code=HTTPStatus.OK
+    '/search', response_model=ResponseSearchTasks, status_code=HTTPStatus.OK
+)
+async def search_tasks(
+    search: T_Search,
+    user: T_User,
+    collector: T_CollectorTask,
+    mapper: T_Mapper,
+):
+    results = await collector.search_tasks(user, search)
+
+    return {
+        'responses': [
+            {
+                'task': mapper.map_task_public(task),
+                'rank': rank,
+                'snippet': snippet,
+            }
+            for task, rank, snippet in results
+        ]
+    }
+
+
+@tasks_router.get(
+    '/{id_task}',
+    response_model=TaskPublic | TaskPartial,
+    response_model_exclude_unset=True,
+    status_code=HTTPStatus.OK,
 )
 async def get_task_by_id(
     id_task: int,
+    projection: T_Projection,
     user: T_User,
     collector: T_CollectorTask,
     mapper: T_Mapper,
 ):
-    task = await collector.collect_task_by_id(user, id_task)
-    return mapper.map_task_public(task)
+    task = await collector.collect_task_by_id(user, id_task, projection)
+    return mapper.map_task_projection(task, projection)
 
 
-@tasks_router.get('/', response_model=ResponseTasks, status_code=HTTPStatus.OK)
-async def get_tasks_by_filters(
+@tasks_router.get(
+    '/',
+    response_model=ResponseTasks,
+    response_model_exclude_unset=True,
+    status_code=HTTPStatus.OK,
+)
+async def get_tasks_by_filters(  # noqa: PLR0913, PLR0917
+    request: Request,
+    response: Response,
     filter: T_Filter,
     user: T_User,
+    session: T_Session,
     collector: T_CollectorTask,
     mapper: T_Mapper,
+    etag_srv: T_ETagService,
+):
+    etag = await etag_srv.tasks_etag(user)
+    if not_modified := etag_srv.check_not_modified(request, response, etag):
+        return not_modified
+
+    ndjson = NDJSON_MEDIA_TYPE in request.headers.get('accept', '')
+    if ndjson or filter.stream:
+        return StreamingResponse(
+            _stream_tasks(user, filter, session, collector, mapper, ndjson),
+            media_type=NDJSON_MEDIA_TYPE if ndjson else 'application/json',
+            headers=response.headers,
+        )
+
+    tasks, next_cursor = await collector.collect_task_page(user, filter)
+
+    tasks_rsp = [mapper.map_task_projection(task, filter) for task in tasks]
+
+    response = {
+        'responses': tasks_rsp,
+        'next_cursor': next_cursor,
+        'total': None,
+        'facets': None,
+    }
+
+    if filter.with_count or filter.facets:
+        total, facets = await collector.count_task_by_filter(
+            user, filter, filter.facets
+        )
+        response['total'] = total
+        if filter.facets:
+            response['facets'] = facets
+
+    return response
+
+
+@tasks_router.patch(
+    '/', response_model=ResponseAffected, status_code=HTTPStatus.OK
+)
+async def update_tasks_by_filters(
+    filter: T_BulkFilter,
+    task: TaskBulkUpdate,
+    user: T_User,
+    session: T_Session,
+    bulk_srv: T_TaskBulkService,
+):
+    affected = await bulk_srv.update_tasks_by_filter(user, filter, task)
+
+    await session.commit()
+
+    return {'affected': affected}
+
+
+@tasks_router.delete(
+    '/', response_model=ResponseAffected, status_code=HTTPStatus.OK
+)
+async def delete_tasks_by_filters(
+    filter: T_BulkFilter,
+    user: T_User,
+    session: T_Session,
+    bulk_srv: T_TaskBulkService,
 ):
-    tasks = await collector.collect_task_by_filter(user, filter)
+    affected = await bulk_srv.delete_tasks_by_filter(user, filter)
 
-    tasks_rsp = [mapper.map_task_public(task) for task in tasks]
+    await session.commit()
 
-    return {'responses': tasks_rsp}
+    return {'affected': affected}
 
 
 @tasks_router.patch(
@@ -112,15 +261,39 @@ async def update_task(  # noqa: PLR0913, PLR0917
     )
     task.workbenches_add = task.workbenches_remove = None
 
+    task_db.updated_at = func.now()
+
     for key, value in task.model_dump(
         exclude_unset=True, exclude_none=True
     ).items():
         setattr(task_db, key, value)
 
+    # a reopened task belongs to the hot set again
+    if task.done is False:
+        task_db.archived_at = None
+
     session.add(task_db)
 
     await session.commit()
-    await session.refresh(task_db)
+
+    return mapper.map_task_public(task_db)
+
+
+@tasks_router.post(
+    '/{id}/restore', response_model=TaskPublic, status_code=HTTPStatus.OK
+)
+async def restore_task(
+    id: int,
+    user: T_User,
+    session: T_Session,
+    collector: T_CollectorTask,
+    mapper: T_Mapper,
+):
+    task_db = await collector.collect_task_by_id(user, id)
+
+    if task_db.archived_at is not None:
+        task_db.archived_at = None
+        await session.commit()
 
     return mapper.map_task_public(task_db)
 
@@ -137,3 +310,33 @@ async def delete_task(
 
     await session.delete(task_db)
     await session.commit()
+
+
+async def _stream_tasks(  # noqa: PLR0913, PLR0917
+    user: Principal,
+    query: TaskQuery,
+    session: AsyncSession,
+    collector: TaskCollectorInterface,
+    mapper: MapperInterface,
+    ndjson: bool,
+) -> AsyncIterator[str]:
+    first = True
+
+    try:
+        if not ndjson:
+            yield '['
+
+        async for task in collector.stream_task_by_filter(user, query):
+            task_json = mapper.map_task_projection(
+                task, query
+            ).model_dump_json(exclude_unset=True)
+            if ndjson:
+                yield task_json + '\n'
+            else:
+                yield task_json if first else ',' + task_json
+            first = False
+
+        if not ndjson:
+            yield ']'
+    finally:
+        await session.close()
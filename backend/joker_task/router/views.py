@@ -1,6 +1,6 @@
 from http import HTTPStatus
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 
 from joker_task.schemas import (
     FilterPublic,
@@ -12,6 +12,7 @@ from joker_task.schemas import (
     ViewUpdate,
 )
 from joker_task.service.dependencies import (
+    T_ETagService,
     T_Mapper,
     T_Session,
     T_User,
@@ -34,7 +35,6 @@ async def create_view(
     view_db = await view_srv.create_view(user, view)
 
     await session.commit()
-    await session.refresh(view_db, attribute_names=['filters'])
 
     return mapper.map_view_public(view_db)
 
@@ -63,9 +63,19 @@ async def get_view(
 
 
 @views_router.get('/{id_view}/tasks', response_model=ViewResult)
-async def apply_view(
-    id_view: int, user: T_User, view_srv: T_ViewService, mapper: T_Mapper
+async def apply_view(  # noqa: PLR0913, PLR0917
+    id_view: int,
+    request: Request,
+    response: Response,
+    user: T_User,
+    view_srv: T_ViewService,
+    mapper: T_Mapper,
+    etag_srv: T_ETagService,
 ):
+    etag = await etag_srv.view_etag(user, id_view)
+    if not_modified := etag_srv.check_not_modified(request, response, etag):
+        return not_modified
+
     view_result = await view_srv.apply_view(user, id_view)
 
     return mapper.map_view_result(view_result)
@@ -85,7 +95,6 @@ async def update_view(  # noqa: PLR0913, PLR0917
     updated_view_db = await view_srv.update_view(user, id_view, view)
 
     await session.commit()
-    await session.refresh(updated_view_db)
 
     return mapper.map_view_soft(updated_view_db)
 
@@ -106,7 +115,6 @@ async def post_view_filter(  # noqa: PLR0913, PLR0917
     filter_db = await view_srv.create_view_filter(user, id_view, filter_schema)
 
     await session.commit()
-    await session.refresh(filter_db)
 
     return mapper.map_filter_public(filter_db)
 
@@ -130,7 +138,6 @@ async def update_view_filter(  # noqa: PLR0913, PLR0917
     )
 
     await session.commit()
-    await session.refresh(filter_db)
 
     return mapper.map_filter_public(filter_db)
 
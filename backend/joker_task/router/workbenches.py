@@ -1,6 +1,6 @@
 from http import HTTPStatus
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 
 from joker_task.db.models import Workbench
 from joker_task.schemas import (
@@ -10,6 +10,7 @@ from joker_task.schemas import (
     WorkbenchWithTasks,
 )
 from joker_task.service.dependencies import (
+    T_ETagService,
     T_Mapper,
     T_Session,
     T_User,
@@ -33,13 +34,11 @@ async def create_workbench(
 
     workbench_db = Workbench(
         user_email=user.email,
-        user=user,
         name=workbench.name,
         columns=sorted(workbench.columns),
     )
     session.add(workbench_db)
     await session.commit()
-    await session.refresh(workbench_db)
 
     return mapper.map_workbench_public(workbench_db)
 
@@ -47,9 +46,18 @@ async def create_workbench(
 @workbenches_router.get(
     '/', response_model=list[WorkbenchPublic], status_code=HTTPStatus.OK
 )
-async def list_workbenches(
-    user: T_User, workbench_srv: T_WorkbenchService, mapper: T_Mapper
+async def list_workbenches(  # noqa: PLR0913, PLR0917
+    request: Request,
+    response: Response,
+    user: T_User,
+    workbench_srv: T_WorkbenchService,
+    mapper: T_Mapper,
+    etag_srv: T_ETagService,
 ):
+    etag = await etag_srv.workbenches_etag(user)
+    if not_modified := etag_srv.check_not_modified(request, response, etag):
+        return not_modified
+
     workbenches_db = await workbench_srv.collect_workbenches(user)
 
     return [
@@ -68,7 +76,9 @@ async def get_workbench(
     workbench_srv: T_WorkbenchService,
     mapper: T_Mapper,
 ):
-    workbench_db = await workbench_srv.collect_workbench_by_id(user, id)
+    workbench_db = await workbench_srv.collect_workbench_by_id(
+        user, id, with_tasks=True
+    )
 
     return {
         'workbench': mapper.map_workbench_public(workbench_db),
@@ -102,7 +112,6 @@ async def update_workbench(  # noqa: PLR0913, PLR0917
 
     session.add(workbench_db)
     await session.commit()
-    await session.refresh(workbench_db)
 
     return mapper.map_workbench_public(workbench_db)
 
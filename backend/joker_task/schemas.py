@@ -1,14 +1,46 @@
 from datetime import datetime
-from typing import Sequence
+from typing import Annotated, Literal, Sequence
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, BeforeValidator, EmailStr, Field
 
 LOGIC_LIKE = 'LIKE'
 LOGIC_WITH_TAGS = 'WITH_TAGS'
+LOGIC_WITH_ANY_TAGS = 'WITH_ANY_TAGS'
+LOGIC_WITHOUT_TAGS = 'WITHOUT_TAGS'
 LOGIC_IN_LIST = 'IN_LIST'
 LOGIC_EXACT = 'EXACT'
 LOGIC_RANGE = 'RANGE'
 
+MAX_PAGE_SIZE = 500
+
+TaskField = Literal[
+    'title',
+    'description',
+    'done',
+    'reminder',
+    'repetition',
+    'state',
+    'priority',
+    'user_email',
+    'created_at',
+    'updated_at',
+    'archived_at',
+]
+TaskInclude = Literal['tags', 'workbenches']
+
+
+def split_comma_list(value: object) -> object:
+    if isinstance(value, str):
+        value = [value]
+    if isinstance(value, list):
+        return [
+            item.strip()
+            for raw in value
+            for item in str(raw).split(',')
+            if item.strip()
+        ]
+    return value
+
 
 class Message(BaseModel):
     message: str
@@ -102,12 +134,49 @@ class TaskUpdate(BaseModel):
     priority: int = 100
 
 
+class TaskBulkUpdate(BaseModel):
+    title: str | None = None
+    description: str | None = None
+    done: bool | None = None
+    reminder: datetime | None = None
+    repetition: str | None = None
+    state: str | None = None
+    priority: int | None = None
+
+
+class TaskPartial(BaseModel):
+    id_task: int
+    title: str | None = None
+    description: str | None = None
+    done: bool | None = None
+    tags: Sequence[TagPublic] | None = None
+    workbenches: Sequence[int] | None = None
+    reminder: datetime | None = None
+    repetition: str | None = None
+    state: str | None = None
+    priority: int | None = None
+    user_email: EmailStr | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    archived_at: datetime | None = None
+
+
+class TaskProjection(BaseModel):
+    fields: Annotated[
+        list[TaskField] | None, BeforeValidator(split_comma_list)
+    ] = None
+    include: Annotated[
+        list[TaskInclude] | None, BeforeValidator(split_comma_list)
+    ] = None
+
+
 class TaskPublic(TaskSchema):
     id_task: int
     tags: Sequence[TagPublic] = Field(default_factory=list)
     user_email: EmailStr
     created_at: datetime
     updated_at: datetime
+    archived_at: datetime | None = None
 
 
 class FilterPage(BaseModel):
@@ -115,6 +184,11 @@ class FilterPage(BaseModel):
     limit: int = Field(100, ge=1)
 
 
+class TaskSearch(FilterPage):
+    q: str = Field(min_length=1)
+    archived: bool | None = None
+
+
 class FilterSchema(FilterPage):
     title: str | None = Field(
         default=None, json_schema_extra={'search_logic': LOGIC_LIKE}
@@ -125,9 +199,16 @@ class FilterSchema(FilterPage):
     done: bool | None = Field(
         default=None, json_schema_extra={'search_logic': LOGIC_EXACT}
     )
+    archived: bool | None = None
     tags: Sequence[str] | None = Field(
         default=None, json_schema_extra={'search_logic': LOGIC_WITH_TAGS}
     )
+    tags_any: Sequence[str] | None = Field(
+        default=None, json_schema_extra={'search_logic': LOGIC_WITH_ANY_TAGS}
+    )
+    tags_none: Sequence[str] | None = Field(
+        default=None, json_schema_extra={'search_logic': LOGIC_WITHOUT_TAGS}
+    )
     reminder: tuple[datetime | None, datetime | None] | None = Field(
         default=None, json_schema_extra={'search_logic': LOGIC_RANGE}
     )
@@ -142,6 +223,18 @@ class FilterSchema(FilterPage):
     )
 
 
+class TaskQuery(FilterSchema, TaskProjection):
+    cursor: str | None = None
+    order_by: Literal['id_task', 'priority', 'created_at', 'updated_at'] = (
+        'id_task'
+    )
+    stream: bool = False
+    with_count: bool = False
+    facets: list[Literal['state', 'done', 'tags', 'workbenches']] = Field(
+        default_factory=list
+    )
+
+
 class FilterPublic(FilterSchema):
     id_filter: int
     created_at: datetime
@@ -176,5 +269,42 @@ class ViewUpdate(BaseModel):
     name: str
 
 
+class TaskSearchResult(BaseModel):
+    task: TaskPublic
+    rank: float
+    snippet: str | None = None
+
+
+class ResponseSearchTasks(BaseModel):
+    responses: list[TaskSearchResult]
+
+
+class BulkTaskResult(BaseModel):
+    index: int
+    status_code: int
+    task: TaskPublic | None = None
+    detail: str | None = None
+
+
+class ResponseBulkTasks(BaseModel):
+    responses: list[BulkTaskResult]
+
+
+class ResponseAffected(BaseModel):
+    affected: int
+
+
 class ResponseTasks(BaseModel):
-    responses: list[TaskPublic]
+    responses: list[TaskPublic | TaskPartial]
+    next_cursor: str | None = None
+    total: int | None = None
+    facets: dict[str, dict[str, int]] | None = None
+
+
+class MetricsPublic(BaseModel):
+    pools: dict[str, dict[str, int | float | str]]
+    filter_cache: dict[str, int]
+    passwords: dict[str, int | float]
+    principals: dict[str, int | float]
+    tokens: dict[str, int]
+    denylist: dict[str, int]
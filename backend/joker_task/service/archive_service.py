@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Annotated
+from zoneinfo import ZoneInfo
+
+from fastapi import Depends
+from loguru import logger
+from sqlalchemy import func, select, true, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from joker_task.db.database import get_session
+from joker_task.db.models import Task
+from joker_task.db.versions import mark_changed
+from joker_task.interfaces.interfaces import ArchiveServiceInterface
+
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+
+
+class ArchiveService(ArchiveServiceInterface):
+    def __init__(self, session: T_Session):
+        self.session = session
+
+    async def archive_done_tasks(
+        self, older_than: timedelta, batch_size: int
+    ) -> int:
+        cutoff = datetime.now(ZoneInfo('UTC')).replace(tzinfo=None)
+        cutoff -= older_than
+        logger.info(f'archiving tasks done before {cutoff}')
+
+        archived = 0
+        while True:
+            batch = (
+                select(Task.id_task)
+                .where(
+                    Task.done == true(),
+                    Task.archived_at.is_(None),
+                    Task.updated_at < cutoff,
+                )
+                .limit(batch_size)
+            )
+            owners = (
+                await self.session.scalars(
+                    update(Task)
+                    .where(Task.id_task.in_(batch))
+                    .values(archived_at=func.now())
+                    .returning(Task.user_email)
+                    .execution_options(synchronize_session=False)
+                )
+            ).all()
+            mark_changed(self.session, *owners)
+            # short transactions keep row locks away from user writes
+            await self.session.commit()
+
+            archived += len(owners)
+            if len(owners) < batch_size:
+                return archived
+
+
+async def archive_periodically(
+    engine: AsyncEngine,
+    older_than: timedelta,
+    interval: float,
+    batch_size: int,
+) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSession(engine) as session:
+                archived = await ArchiveService(session).archive_done_tasks(
+                    older_than, batch_size
+                )
+            logger.info(f'archived {archived} done tasks')
+        except Exception:
+            logger.exception('archiving done tasks failed')
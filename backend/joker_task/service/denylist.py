@@ -0,0 +1,112 @@
+import math
+from hashlib import sha256
+from time import time
+from typing import Iterable, Sequence
+
+PRUNE_AT = 1024
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.bits = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        # one sha256 digest gives eight 32-bit positions
+        self.hashes = min(8, max(1, round(self.bits / capacity * math.log(2))))
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = sha256(key.encode()).digest()
+        for index in range(self.hashes):
+            chunk = digest[index * 4 : index * 4 + 4]
+            yield int.from_bytes(chunk, 'big') % self.bits
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._array[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._array)
+
+
+class Denylist:
+    def __init__(self):
+        # the filter holds every revocation in the table, the exact set
+        # only the ones this worker made or has confirmed
+        self._bloom: BloomFilter | None = None
+        self._expiries: dict[str, int] = {}
+        self._cleared: set[str] = set()
+        self._prune_at = PRUNE_AT
+        self.loaded = 0
+        self.lookups = 0
+
+    def revoke(self, jti: str, exp: int) -> None:
+        self._expiries[jti] = exp
+        self._cleared.discard(jti)
+
+        # entries only matter until the token expires on its own
+        if len(self._expiries) >= self._prune_at:
+            self.prune()
+            self._prune_at = max(PRUNE_AT, 2 * len(self._expiries))
+
+    def check(self, jti: str) -> bool | None:
+        exp = self._expiries.get(jti)
+        if exp is not None:
+            return exp > time()
+        if jti in self._cleared:
+            return False
+        if self._bloom is not None and jti not in self._bloom:
+            return False
+
+        # a filter hit, or no filter loaded yet: only the table knows
+        self.lookups += 1
+        return None
+
+    def remember(self, jti: str, exp: int, revoked: bool) -> None:
+        if revoked:
+            self.revoke(jti, exp)
+        elif self._bloom is not None:
+            # a negative only holds until the next load brings in what
+            # other workers revoked, so without loads it is not kept
+            self._cleared.add(jti)
+
+    def load(self, revocations: Sequence[str]) -> None:
+        bloom = BloomFilter(max(len(revocations), PRUNE_AT))
+        for jti in revocations:
+            bloom.add(jti)
+
+        self._bloom = bloom
+        self._cleared = set()
+        self.loaded = len(revocations)
+        self.prune()
+
+    def prune(self) -> None:
+        now = time()
+        self._expiries = {
+            jti: exp for jti, exp in self._expiries.items() if exp > now
+        }
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'size': len(self._expiries),
+            'loaded': self.loaded,
+            'filter_bytes': self._bloom.size_bytes if self._bloom else 0,
+            'lookups': self.lookups,
+        }
+
+    def clear(self) -> None:
+        self._bloom = None
+        self._expiries.clear()
+        self._cleared.clear()
+        self.loaded = self.lookups = 0
+
+
+denylist = Denylist()
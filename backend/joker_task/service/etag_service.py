@@ -0,0 +1,69 @@
+from hashlib import sha256
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import Depends, Request, Response
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from joker_task.db.database import get_session
+from joker_task.db.models import User
+from joker_task.interfaces.interfaces import ETagServiceInterface
+from joker_task.service.principal import Principal
+
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+class ETagService(ETagServiceInterface):
+    def __init__(self, session: T_Session):
+        self.session = session
+
+    async def tasks_etag(self, user: Principal) -> str:
+        return await self._etag('tasks', user)
+
+    async def tags_etag(self, user: Principal) -> str:
+        return await self._etag('tags', user)
+
+    async def workbenches_etag(self, user: Principal) -> str:
+        return await self._etag('workbenches', user)
+
+    async def view_etag(self, user: Principal, id_view: int) -> str:
+        return await self._etag(f'views:{id_view}', user)
+
+    @staticmethod
+    def check_not_modified(
+        request: Request, response: Response, etag: str
+    ) -> Response | None:
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = CACHE_CONTROL
+
+        if_none_match = request.headers.get('if-none-match')
+        if not if_none_match:
+            return None
+
+        candidates = {
+            candidate.strip().removeprefix('W/')
+            for candidate in if_none_match.split(',')
+        }
+        if '*' not in candidates and etag.removeprefix('W/') not in candidates:
+            return None
+
+        logger.debug(f'not modified: {request.url.path} {etag}')
+        return Response(
+            status_code=HTTPStatus.NOT_MODIFIED,
+            headers={'ETag': etag, 'Cache-Control': CACHE_CONTROL},
+        )
+
+    async def _etag(self, kind: str, user: Principal) -> str:
+        # data_version is bumped in every transaction that writes the
+        # user's data, unlike max(updated_at) which a late commit can
+        # leave unchanged
+        version = await self.session.scalar(
+            select(User.data_version).where(User.email == user.email)
+        )
+        digest = sha256(repr((kind, user.email, version)).encode()).hexdigest()
+
+        return f'W/"{digest[:32]}"'
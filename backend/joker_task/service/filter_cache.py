@@ -0,0 +1,49 @@
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from loguru import logger
+from sqlalchemy import Select
+
+
+class FilterQueryCache:
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._statements: OrderedDict[Hashable, Select] = OrderedDict()
+
+    def get_or_build(
+        self, key: Hashable, build: Callable[[], Select]
+    ) -> Select:
+        statement = self._statements.get(key)
+
+        if statement is not None:
+            self.hits += 1
+            self._statements.move_to_end(key)
+            return statement
+
+        self.misses += 1
+        logger.debug(f'filter query cache miss: {key}')
+        statement = build()
+
+        if self.maxsize > 0:
+            self._statements[key] = statement
+            if len(self._statements) > self.maxsize:
+                self._statements.popitem(last=False)
+
+        return statement
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._statements),
+            'maxsize': self.maxsize,
+        }
+
+    def clear(self) -> None:
+        self.hits = self.misses = 0
+        self._statements.clear()
+
+
+filter_query_cache = FilterQueryCache()
@@ -1,38 +1,53 @@
-from typing import Any
+from typing import Any, Hashable
 
 from loguru import logger
-from sqlalchemy import Select, func
+from sqlalchemy import (
+    ColumnElement,
+    Exists,
+    Select,
+    bindparam,
+    exists,
+    intersect,
+    select,
+    true,
+)
 
 from joker_task.db.models import Tag, Task, task_tag
+from joker_task.db.tag_ids import (
+    by_dialect,
+    contains_tag_ids,
+    overlaps_tag_ids,
+)
 from joker_task.interfaces.interfaces import StrategyMakeFilterInterface
 from joker_task.schemas import (
     LOGIC_EXACT,
     LOGIC_IN_LIST,
     LOGIC_LIKE,
     LOGIC_RANGE,
+    LOGIC_WITH_ANY_TAGS,
     LOGIC_WITH_TAGS,
+    LOGIC_WITHOUT_TAGS,
 )
 
+# a proxy for selectivity: the number of requested tags, not how many
+# tasks carry them. each extra tag narrows an INTERSECT less than it
+# adds a full index range to it, while correlated EXISTS probes stop at
+# the first miss. per-user tag frequencies would be the real signal, but
+# reading them costs a round trip before the cached statement is chosen
+TAGS_INTERSECT_THRESHOLD = 3
 
-def factory_make_filter(type: Any) -> StrategyMakeFilterInterface:
-    dict_type_strategy = {
-        LOGIC_EXACT: FilterLogicExact,
-        LOGIC_IN_LIST: FilterLogicInList,
-        LOGIC_LIKE: FilterLogicLike,
-        LOGIC_RANGE: FilterLogicRange,
-        LOGIC_WITH_TAGS: FilterWithTags,
-    }
 
+def factory_make_filter(type: Any) -> StrategyMakeFilterInterface:
     if not isinstance(type, str):
         logger.warning(f"type isn't str: {type}")
         raise TypeError('the arg type has be a str')
 
-    if type not in dict_type_strategy:
+    if type not in DICT_TYPE_STRATEGY:
         logger.warning(f'type unknown: {type}')
         raise ValueError('value not found in dict_type_strategy')
 
     logger.debug(f'factory_make_filter type: {type}')
-    return dict_type_strategy[type]()
+    return DICT_TYPE_STRATEGY[type]
 
 
 class FilterLogicExact(StrategyMakeFilterInterface):
@@ -41,7 +56,13 @@ class FilterLogicExact(StrategyMakeFilterInterface):
 
     @staticmethod
     def make(cur_filter: Select, value: Any, campo: str) -> Select:
-        return cur_filter.where(getattr(Task, campo) == value)
+        return cur_filter.where(
+            getattr(Task, campo) == bindparam(f'filter_{campo}')
+        )
+
+    @staticmethod
+    def bind(value: Any, campo: str) -> dict[str, Any]:
+        return {f'filter_{campo}': value}
 
 
 class FilterLogicInList(StrategyMakeFilterInterface):
@@ -50,7 +71,15 @@ class FilterLogicInList(StrategyMakeFilterInterface):
 
     @staticmethod
     def make(cur_filter: Select, values: list[Any], campo: str) -> Select:
-        return cur_filter.where(getattr(Task, campo).in_(values))
+        return cur_filter.where(
+            getattr(Task, campo).in_(
+                bindparam(f'filter_{campo}', expanding=True)
+            )
+        )
+
+    @staticmethod
+    def bind(values: list[Any], campo: str) -> dict[str, Any]:
+        return {f'filter_{campo}': list(values)}
 
 
 class FilterLogicLike(StrategyMakeFilterInterface):
@@ -59,7 +88,13 @@ class FilterLogicLike(StrategyMakeFilterInterface):
 
     @staticmethod
     def make(cur_filter: Select, values: Any, campo: str) -> Select:
-        return cur_filter.where(getattr(Task, campo).like(values))
+        return cur_filter.where(
+            getattr(Task, campo).like(bindparam(f'filter_{campo}'))
+        )
+
+    @staticmethod
+    def bind(values: Any, campo: str) -> dict[str, Any]:
+        return {f'filter_{campo}': values}
 
 
 class FilterWithTags(StrategyMakeFilterInterface):
@@ -68,14 +103,160 @@ class FilterWithTags(StrategyMakeFilterInterface):
 
     @staticmethod
     def make(cur_filter: Select, values: list[Any], campo: str = '') -> Select:
-        return (
-            cur_filter.join(task_tag, task_tag.c.id_task == Task.id_task)
-            .join(Tag, Tag.id_tag == task_tag.c.id_tag)
-            .where(Tag.name.in_(values))
-            .group_by(Task.id_task)
-            .having(func.count(func.distinct(Tag.name)) == len(values))
+        if not values:
+            # every task carries all of no tags
+            return cur_filter.where(true())
+
+        tag_ids = [
+            _tag_ids(
+                Tag.name == bindparam(f'filter_{campo}_{index}')
+            ).scalar_subquery()
+            for index in range(len(values))
+        ]
+
+        if len(values) <= TAGS_INTERSECT_THRESHOLD:
+            return cur_filter.where(
+                Task.id_task.in_(
+                    intersect(
+                        *(
+                            select(task_tag.c.id_task).where(
+                                task_tag.c.id_tag == id_tag
+                            )
+                            for id_tag in tag_ids
+                        )
+                    )
+                )
+            )
+
+        return cur_filter.where(
+            *(
+                exists().where(
+                    task_tag.c.id_task == Task.id_task,
+                    task_tag.c.id_tag == id_tag,
+                )
+                for id_tag in tag_ids
+            )
         )
 
+    @staticmethod
+    def shape(values: list[Any]) -> Hashable:
+        return len(values)
+
+    @staticmethod
+    def bind(values: list[Any], campo: str = '') -> dict[str, Any]:
+        return {
+            f'filter_{campo}_{index}': value
+            for index, value in enumerate(values)
+        }
+
+
+class FilterWithAnyTags(StrategyMakeFilterInterface):
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def make(cur_filter: Select, values: list[Any], campo: str) -> Select:
+        return cur_filter.where(_has_any_tag(campo))
+
+    @staticmethod
+    def bind(values: list[Any], campo: str) -> dict[str, Any]:
+        return {f'filter_{campo}': list(values)}
+
+
+class FilterWithoutTags(StrategyMakeFilterInterface):
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def make(cur_filter: Select, values: list[Any], campo: str) -> Select:
+        return cur_filter.where(~_has_any_tag(campo))
+
+    @staticmethod
+    def bind(values: list[Any], campo: str) -> dict[str, Any]:
+        return {f'filter_{campo}': list(values)}
+
+
+class FilterWithTagIds(StrategyMakeFilterInterface):
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def make(cur_filter: Select, values: list[Any], campo: str = '') -> Select:
+        if not values:
+            return cur_filter.where(true())
+
+        return cur_filter.where(
+            contains_tag_ids(
+                Task.tag_ids,
+                *(
+                    _tag_ids(
+                        Tag.name == bindparam(f'filter_{campo}_{index}')
+                    ).scalar_subquery()
+                    for index in range(len(values))
+                ),
+            )
+        )
+
+    @staticmethod
+    def shape(values: list[Any]) -> Hashable:
+        return len(values)
+
+    @staticmethod
+    def bind(values: list[Any], campo: str = '') -> dict[str, Any]:
+        return FilterWithTags.bind(values, campo)
+
+
+class FilterWithAnyTagIds(StrategyMakeFilterInterface):
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def make(cur_filter: Select, values: list[Any], campo: str) -> Select:
+        return cur_filter.where(_overlaps_tag_ids(campo))
+
+    @staticmethod
+    def bind(values: list[Any], campo: str) -> dict[str, Any]:
+        return {f'filter_{campo}': list(values)}
+
+
+class FilterWithoutTagIds(StrategyMakeFilterInterface):
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def make(cur_filter: Select, values: list[Any], campo: str) -> Select:
+        return cur_filter.where(~_overlaps_tag_ids(campo))
+
+    @staticmethod
+    def bind(values: list[Any], campo: str) -> dict[str, Any]:
+        return {f'filter_{campo}': list(values)}
+
+
+class FilterByDialect(StrategyMakeFilterInterface):
+    def __init__(
+        self,
+        postgresql: StrategyMakeFilterInterface,
+        default: StrategyMakeFilterInterface,
+    ):
+        self.postgresql = postgresql
+        self.default = default
+
+    def make(self, cur_filter: Select, values: Any, campo: str) -> Select:
+        # both variants go into the statement and the compiler renders
+        # one, so a cached statement serves every dialect
+        return cur_filter.where(
+            by_dialect(
+                self.postgresql.make(select(), values, campo).whereclause,
+                self.default.make(select(), values, campo).whereclause,
+            )
+        )
+
+    def shape(self, values: Any) -> Hashable:
+        return self.default.shape(values)
+
+    def bind(self, values: Any, campo: str) -> dict[str, Any]:
+        return self.default.bind(values, campo)
+
 
 class FilterLogicRange(StrategyMakeFilterInterface):
     def __init__(self):
@@ -85,8 +266,68 @@ class FilterLogicRange(StrategyMakeFilterInterface):
     def make(
         cur_filter: Select, values: tuple[Any, Any], campo: str
     ) -> Select:
-        if start := values[0]:
-            cur_filter = cur_filter.where(getattr(Task, campo) >= start)
-        if end := values[1]:
-            cur_filter = cur_filter.where(getattr(Task, campo) <= end)
+        if values[0] is not None:
+            cur_filter = cur_filter.where(
+                getattr(Task, campo) >= bindparam(f'filter_{campo}_start')
+            )
+        if values[1] is not None:
+            cur_filter = cur_filter.where(
+                getattr(Task, campo) <= bindparam(f'filter_{campo}_end')
+            )
         return cur_filter
+
+    @staticmethod
+    def shape(values: tuple[Any, Any]) -> Hashable:
+        return values[0] is not None, values[1] is not None
+
+    @staticmethod
+    def bind(values: tuple[Any, Any], campo: str) -> dict[str, Any]:
+        params = {}
+        if values[0] is not None:
+            params[f'filter_{campo}_start'] = values[0]
+        if values[1] is not None:
+            params[f'filter_{campo}_end'] = values[1]
+        return params
+
+
+def _tag_ids(*where: ColumnElement[bool]) -> Select:
+    return select(Tag.id_tag).where(
+        Tag.user_email == bindparam('user_email'), *where
+    )
+
+
+def _has_any_tag(campo: str) -> Exists:
+    return exists().where(
+        task_tag.c.id_task == Task.id_task,
+        task_tag.c.id_tag.in_(
+            _tag_ids(
+                Tag.name.in_(bindparam(f'filter_{campo}', expanding=True))
+            )
+        ),
+    )
+
+
+def _overlaps_tag_ids(campo: str) -> ColumnElement[bool]:
+    return overlaps_tag_ids(
+        Task.tag_ids,
+        _tag_ids(
+            Tag.name.in_(bindparam(f'filter_{campo}', expanding=True))
+        ).scalar_subquery(),
+    )
+
+
+# tag_ids containment is served by a GIN index on postgres; elsewhere it
+# scans json per row, so the task_tag strategies stay the default there
+DICT_TYPE_STRATEGY: dict[str, StrategyMakeFilterInterface] = {
+    LOGIC_EXACT: FilterLogicExact(),
+    LOGIC_IN_LIST: FilterLogicInList(),
+    LOGIC_LIKE: FilterLogicLike(),
+    LOGIC_RANGE: FilterLogicRange(),
+    LOGIC_WITH_TAGS: FilterByDialect(FilterWithTagIds(), FilterWithTags()),
+    LOGIC_WITH_ANY_TAGS: FilterByDialect(
+        FilterWithAnyTagIds(), FilterWithAnyTags()
+    ),
+    LOGIC_WITHOUT_TAGS: FilterByDialect(
+        FilterWithoutTagIds(), FilterWithoutTags()
+    ),
+}
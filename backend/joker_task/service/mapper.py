@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Sequence
+from typing import Sequence, get_args
 
 from loguru import logger
 
@@ -8,6 +8,9 @@ from joker_task.interfaces.interfaces import MapperInterface
 from joker_task.schemas import (
     FilterPublic,
     TagPublic,
+    TaskField,
+    TaskPartial,
+    TaskProjection,
     TaskPublic,
     UserPublic,
     ViewPublic,
@@ -50,8 +53,32 @@ class Mapper(MapperInterface):
             user_email=task_db.user_email,
             created_at=task_db.created_at,
             updated_at=task_db.updated_at,
+            archived_at=task_db.archived_at,
         )
 
+    @staticmethod
+    def map_task_projection(
+        task_db: Task, projection: TaskProjection
+    ) -> TaskPublic | TaskPartial:
+        if projection.fields is None and projection.include is None:
+            return Mapper.map_task_public(task_db)
+
+        logger.debug(f'mapping task {task_db.id_task} to TaskPartial')
+        data = {
+            field: getattr(task_db, field)
+            for field in projection.fields or get_args(TaskField)
+        }
+        include = projection.include or []
+
+        if 'tags' in include:
+            data['tags'] = [Mapper.map_tag_public(tag) for tag in task_db.tags]
+        if 'workbenches' in include:
+            data['workbenches'] = [
+                workbench.id_workbench for workbench in task_db.workbenches
+            ]
+
+        return TaskPartial(id_task=task_db.id_task, **data)
+
     @staticmethod
     def map_tag_public(tag_db: Tag) -> TagPublic:
         logger.debug(f'mapping tag {tag_db.id_tag} to TagPublic')
@@ -125,7 +152,10 @@ class Mapper(MapperInterface):
             title=filter_db.title,
             description=filter_db.description,
             done=filter_db.done,
+            archived=filter_db.archived,
             tags=filter_db.tags,
+            tags_any=filter_db.tags_any,
+            tags_none=filter_db.tags_none,
             reminder=Mapper._deserialize_reminder(filter_db.reminder),
             repetition=filter_db.repetition,
             state=filter_db.state,
@@ -0,0 +1,55 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from http import HTTPStatus
+from typing import Any
+
+from fastapi import HTTPException
+from loguru import logger
+
+from joker_task.db.models import Task
+from joker_task.schemas import MAX_PAGE_SIZE
+
+DATETIME_KEYS = {'created_at', 'updated_at'}
+INT_KEYS = {'id_task', 'priority'}
+
+
+def page_size(limit: int) -> int:
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def encode_cursor(task: Task, order_by: str) -> str:
+    value = getattr(task, order_by)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+
+    raw = json.dumps([order_by, value, task.id_task], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor: str, order_by: str) -> tuple[Any, int]:
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        key, value, id_task = json.loads(
+            base64.urlsafe_b64decode(cursor + padding)
+        )
+        if key in DATETIME_KEYS:
+            value = datetime.fromisoformat(value)
+    except (binascii.Error, TypeError, ValueError):
+        logger.info('cursor decoding failed: malformed cursor')
+        raise HTTPException(HTTPStatus.BAD_REQUEST, 'invalid cursor')
+
+    if key != order_by or not _is_int(id_task):
+        logger.info('cursor decoding failed: cursor does not match order')
+        raise HTTPException(HTTPStatus.BAD_REQUEST, 'invalid cursor')
+
+    if key in INT_KEYS and not _is_int(value):
+        logger.info('cursor decoding failed: cursor does not match order')
+        raise HTTPException(HTTPStatus.BAD_REQUEST, 'invalid cursor')
+
+    return value, id_task
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from time import perf_counter
+from typing import Any, Callable, TypeVar
+
+from fastapi import HTTPException
+from loguru import logger
+
+from joker_task.settings import Settings, get_settings, on_reload
+
+T = TypeVar('T')
+
+
+class PasswordPool:
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.pending = 0
+        self.pending_max = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            # argon2-cffi releases the GIL while hashing, so threads run
+            # the work in parallel without blocking the event loop
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix='password'
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def resize(self, workers: int, queue_limit: int) -> None:
+        with self._lock:
+            self.queue_limit = queue_limit
+            if workers == self.workers:
+                return
+            self.workers = workers
+            executor, self._executor = self._executor, None
+
+        # hashes already submitted finish on the old threads and still
+        # report to _finish, new ones start a pool of the new size
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            if self.pending >= self.workers + self.queue_limit:
+                self.rejected += 1
+                full = self.pending
+            else:
+                full = None
+                self.pending += 1
+                self.pending_max = max(self.pending_max, self.pending)
+        if full is not None:
+            logger.warning(f'password pool full: {full} pending')
+            raise HTTPException(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                'too many password checks in progress',
+                headers={'Retry-After': '1'},
+            )
+
+        queued = perf_counter()
+
+        def timed() -> tuple[T, float, float]:
+            started = perf_counter()
+            result = fn(*args)
+            return result, started - queued, perf_counter() - started
+
+        # a cancelled caller does not stop a running hash, so the work is
+        # counted until the executor future itself is done
+        future = self._get_executor().submit(timed)
+        future.add_done_callback(self._finish)
+        result, _, _ = await asyncio.wrap_future(future)
+        return result
+
+    def _finish(self, future: Future) -> None:
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                return
+            _, wait, elapsed = future.result()
+            self.completed += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.run_total += elapsed
+            self.run_max = max(self.run_max, elapsed)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'queue_limit': self.queue_limit,
+            'pending': self.pending,
+            'pending_max': self.pending_max,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'wait_avg_ms': self._avg_ms(self.wait_total, self.completed),
+            'wait_max_ms': self.wait_max * 1000,
+            'run_avg_ms': self._avg_ms(self.run_total, self.completed),
+            'run_max_ms': self.run_max * 1000,
+        }
+
+    @staticmethod
+    def _avg_ms(total: float, count: int) -> float:
+        return total / count * 1000 if count else 0.0
+
+
+password_pool = PasswordPool(
+    get_settings().PASSWORD_WORKERS, get_settings().PASSWORD_QUEUE_LIMIT
+)
+
+
+@on_reload
+def _resize_password_pool(settings: Settings) -> None:
+    password_pool.resize(
+        settings.PASSWORD_WORKERS, settings.PASSWORD_QUEUE_LIMIT
+    )
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any
+
+from joker_task.settings import Settings, get_settings, on_reload
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    email: str
+    username: str
+
+
+class PrincipalCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._principals: OrderedDict[str, tuple[float, Principal]] = (
+            OrderedDict()
+        )
+        self.clear()
+
+    def get(self, sub: str) -> Principal | None:
+        entry = self._principals.get(sub)
+
+        if entry is None or entry[0] <= monotonic():
+            self._principals.pop(sub, None)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._principals.move_to_end(sub)
+        return entry[1]
+
+    def put(self, principal: Principal, lookup: float) -> None:
+        self.lookup_total += lookup
+
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+
+        self._principals[principal.email] = (
+            monotonic() + self.ttl,
+            principal,
+        )
+        self._principals.move_to_end(principal.email)
+        if len(self._principals) > self.maxsize:
+            self._principals.popitem(last=False)
+
+    def resize(self, maxsize: int, ttl: float) -> None:
+        # entries already cached keep the deadline they were given
+        self.maxsize = maxsize
+        self.ttl = ttl
+        while len(self._principals) > max(maxsize, 0):
+            self._principals.popitem(last=False)
+
+    def invalidate(self, sub: str) -> None:
+        self._principals.pop(sub, None)
+
+    def stats(self) -> dict[str, Any]:
+        lookup_avg = self.lookup_total / self.misses if self.misses else 0.0
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._principals),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'lookup_avg_ms': lookup_avg * 1000,
+            # every hit skips one lookup of about the average miss cost
+            'saved_ms': self.hits * lookup_avg * 1000,
+        }
+
+    def clear(self) -> None:
+        self.hits = self.misses = 0
+        self.lookup_total = 0.0
+        self._principals.clear()
+
+
+principal_cache = PrincipalCache(
+    get_settings().PRINCIPAL_CACHE_SIZE, get_settings().PRINCIPAL_CACHE_TTL
+)
+
+
+@on_reload
+def _resize_principal_cache(settings: Settings) -> None:
+    principal_cache.resize(
+        settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL
+    )
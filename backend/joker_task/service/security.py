@@ -1,6 +1,9 @@
-from datetime import datetime, timedelta
+import asyncio
+from datetime import datetime
 from http import HTTPStatus
-from typing import Annotated
+from time import perf_counter
+from typing import Annotated, Any, Sequence
+from uuid import uuid4
 from zoneinfo import ZoneInfo
 
 from fastapi import Depends, HTTPException, Request
@@ -8,12 +11,17 @@ from fastapi.security import OAuth2PasswordBearer
 from jwt import InvalidTokenError, decode, encode
 from loguru import logger
 from pwdlib import PasswordHash
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
 from joker_task.db.database import get_session
-from joker_task.db.models import User
-from joker_task.settings import Settings
+from joker_task.db.models import RevokedToken, User
+from joker_task.db.sharding import use_shard
+from joker_task.service.denylist import denylist
+from joker_task.service.password_pool import password_pool
+from joker_task.service.principal import Principal, principal_cache
+from joker_task.service.token_cache import token_cache
+from joker_task.settings import Settings, get_settings
 
 pwd_context = PasswordHash.recommended()
 
@@ -22,6 +30,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl='token')
 
 T_Session = Annotated[AsyncSession, Depends(get_session)]
 T_OAuth2PB = Annotated[str, Depends(oauth2_scheme)]
+T_Settings = Annotated[Settings, Depends(get_settings)]
 
 
 def get_hash_password(password: str) -> str:
@@ -32,43 +41,169 @@ def verify_password(password: str, hash: str) -> bool:
     return pwd_context.verify(password, hash)
 
 
+async def hash_password(password: str) -> str:
+    return await password_pool.run(get_hash_password, password)
+
+
+async def check_password(password: str, hash: str) -> bool:
+    return await password_pool.run(verify_password, password, hash)
+
+
 def generate_access_token(data: dict) -> str:
     logger.info(f'generating access token for user: {data["sub"]}')
-    settings = Settings()  # type: ignore
+    settings = get_settings()
 
     to_encode = data.copy()
-    delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE)
-    exp = delta + datetime.now(
+    if not settings.STATELESS_PRINCIPAL:
+        # get_user loads the principal, so the token only needs sub
+        to_encode.pop('username', None)
+    exp = settings.access_token_delta + datetime.now(
         ZoneInfo('UTC'),
     )
 
-    to_encode.update({'exp': exp, 'type': 'access'})
+    # jti tells tokens issued in the same second apart for revocation
+    to_encode.update({'exp': exp, 'type': 'access', 'jti': uuid4().hex})
 
-    return encode(to_encode, settings.SECRET_KEY, settings.ALGORITHM)
+    return encode(to_encode, settings.signing_key, settings.ALGORITHM)
 
 
 def generate_refresh_token(data: dict) -> str:
     logger.info(f'generating refresh token for user: {data["sub"]}')
-    settings = Settings()  # type: ignore
+    settings = get_settings()
 
     to_encode = data.copy()
-    delta = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE)
-    exp = delta + datetime.now(
+    exp = settings.refresh_token_delta + datetime.now(
         ZoneInfo('UTC'),
     )
 
-    to_encode.update({'exp': exp, 'type': 'refresh'})
+    to_encode.update({'exp': exp, 'type': 'refresh', 'jti': uuid4().hex})
+
+    return encode(to_encode, settings.signing_key, settings.ALGORITHM)
+
+
+def decode_token(token: str, settings: Settings) -> dict[str, Any]:
+    # a cached payload was verified before and is dropped once its exp
+    # passes, so a hit only skips the signature and claim checks
+    payload = token_cache.get(token, settings)
+    if payload is None:
+        payload = decode(
+            token, settings.signing_key, algorithms=settings.algorithms
+        )
+        token_cache.put(token, settings, payload)
+
+    return payload
+
+
+def _utc(exp: int) -> datetime:
+    return datetime.fromtimestamp(exp, ZoneInfo('UTC')).replace(tzinfo=None)
+
+
+async def revoke_tokens(session: AsyncSession, *tokens: str | None) -> None:
+    payloads = []
+    for token in tokens:
+        if not token:
+            continue
+        try:
+            payload = decode_token(token, get_settings())
+        except InvalidTokenError:
+            # expired or forged tokens are rejected anyway
+            continue
+        if 'jti' in payload and 'sub' in payload:
+            payloads.append(payload)
+
+    for payload in payloads:
+        # the row lives on the owner's shard, where get_user looks
+        use_shard(session, payload['sub'])
+        await session.merge(
+            RevokedToken(payload['jti'], _utc(payload['exp']), payload['sub'])
+        )
+        await session.flush()
+    await session.commit()
+
+    for payload in payloads:
+        denylist.revoke(payload['jti'], payload['exp'])
+
+
+async def is_revoked(session: AsyncSession, payload: dict[str, Any]) -> bool:
+    jti = payload.get('jti')
+    if jti is None:
+        # tokens issued before jti cannot be revoked, they just expire
+        return False
+
+    revoked = denylist.check(jti)
+    if revoked is None:
+        revoked = (
+            await session.scalar(
+                select(RevokedToken.jti).where(RevokedToken.jti == jti)
+            )
+            is not None
+        )
+        denylist.remember(jti, payload['exp'], revoked)
+
+    return revoked
+
+
+def _now() -> datetime:
+    return datetime.now(ZoneInfo('UTC')).replace(tzinfo=None)
+
+
+async def load_revocations(engines: Sequence[AsyncEngine]) -> None:
+    cutoff = _now()
+    jtis: list[str] = []
+    for engine in engines:
+        async with AsyncSession(engine) as session:
+            jtis.extend(
+                await session.scalars(
+                    select(RevokedToken.jti).where(
+                        RevokedToken.expires_at > cutoff
+                    )
+                )
+            )
+
+    denylist.load(jtis)
+    logger.info(f'loaded {len(jtis)} revoked tokens')
 
-    return encode(to_encode, settings.SECRET_KEY, settings.ALGORITHM)
+
+async def load_revocations_periodically(
+    engines: Sequence[AsyncEngine], interval: float
+) -> None:
+    # until the first load every check goes to the table, which is
+    # slower but never lets a revoked token through
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await load_revocations(engines)
+        except Exception:
+            logger.exception('loading revoked tokens failed')
+
+
+async def prune_revocations(engine: AsyncEngine) -> int:
+    async with AsyncSession(engine) as session:
+        result = await session.execute(
+            delete(RevokedToken).where(RevokedToken.expires_at <= _now())
+        )
+        await session.commit()
+
+    return result.rowcount  # type: ignore
+
+
+async def prune_revocations_periodically(
+    engine: AsyncEngine, interval: float
+) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            pruned = await prune_revocations(engine)
+            logger.info(f'pruned {pruned} expired revoked tokens')
+        except Exception:
+            logger.exception('pruning revoked tokens failed')
 
 
 async def verify_refresh(token: str, session: T_Session) -> str:
-    settings = Settings()  # type: ignore
+    settings = get_settings()
 
     try:
-        payload = decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_token(token, settings)
     except InvalidTokenError:
         logger.info('refresh token verification failed: invalid token')
         raise HTTPException(
@@ -94,6 +229,13 @@ async def verify_refresh(token: str, session: T_Session) -> str:
             HTTPStatus.UNAUTHORIZED, detail='invalid refresh token'
         )
 
+    use_shard(session, payload['sub'])
+    if await is_revoked(session, payload):
+        logger.info('refresh token verification failed: revoked token')
+        raise HTTPException(
+            HTTPStatus.UNAUTHORIZED, detail='invalid refresh token'
+        )
+
     user = await session.scalar(
         select(User).where(User.email == payload['sub'])
     )
@@ -104,21 +246,22 @@ async def verify_refresh(token: str, session: T_Session) -> str:
             HTTPStatus.UNAUTHORIZED, detail='invalid refresh token'
         )
 
-    return generate_access_token({'sub': payload['sub']})
+    return generate_access_token({
+        'sub': payload['sub'],
+        'username': user.username,
+    })
 
 
-async def get_user(request: Request, session: T_Session) -> User:
+async def get_user(
+    request: Request, session: T_Session, settings: T_Settings
+) -> Principal:
     token = request.cookies.get('access_token')
 
     if not token:
         raise HTTPException(HTTPStatus.UNAUTHORIZED, 'not authenticated')
 
-    settings = Settings()  # type: ignore
-
     try:
-        payload = decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_token(token, settings)
     except InvalidTokenError:
         logger.info('access token verification failed: invalid token')
         raise HTTPException(HTTPStatus.UNAUTHORIZED, 'invalid access token')
@@ -138,11 +281,34 @@ async def get_user(request: Request, session: T_Session) -> User:
         logger.info('access token verification failed: wrong token type')
         raise HTTPException(HTTPStatus.UNAUTHORIZED, 'invalid access token')
 
-    user = await session.scalar(
-        select(User).where(User.email == payload.get('sub'))
-    )
+    # the shard is picked even on a hit: the handler's queries need it
+    use_shard(session, payload['sub'])
+    if await is_revoked(session, payload):
+        logger.info('access token verification failed: revoked token')
+        raise HTTPException(HTTPStatus.UNAUTHORIZED, 'invalid access token')
 
-    if not user:
+    # tokens issued before the mode was turned on have no username and
+    # fall back to the lookup below
+    if settings.STATELESS_PRINCIPAL and 'username' in payload:
+        return Principal(payload['sub'], payload['username'])
+
+    principal = principal_cache.get(payload['sub'])
+    if principal is not None:
+        return principal
+
+    started = perf_counter()
+    row = (
+        await session.execute(
+            select(User.email, User.username).where(
+                User.email == payload['sub']
+            )
+        )
+    ).first()
+
+    if not row:
         raise HTTPException(HTTPStatus.UNAUTHORIZED, 'invalid access token')
 
-    return user
+    principal = Principal(row.email, row.username)
+    principal_cache.put(principal, perf_counter() - started)
+
+    return principal
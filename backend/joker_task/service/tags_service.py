@@ -1,26 +1,31 @@
 import re
 from http import HTTPStatus
-from typing import Annotated, Sequence
+from typing import Annotated, Iterable, Sequence
 
 from fastapi import Depends, HTTPException
 from loguru import logger
-from sqlalchemy import select
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from joker_task.db.database import get_session
-from joker_task.db.models import Tag, Task, User
+from joker_task.db.models import Tag, Task
+from joker_task.db.tag_ids import contains_tag_ids, remove_tag_id
+from joker_task.db.versions import mark_changed
 from joker_task.interfaces.interfaces import TagServiceInterface
 from joker_task.schemas import TagSchema
+from joker_task.service.principal import Principal
 
 T_Session = Annotated[AsyncSession, Depends(get_session)]
 
+COLOR_HEX_PATTERN = re.compile(r'^#([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$')
+
 
 class TagService(TagServiceInterface):
     def __init__(self, session: T_Session):
         self.session = session
 
     async def get_or_create_tags(
-        self, user: User, tags: Sequence[TagSchema] | None
+        self, user: Principal, tags: Sequence[TagSchema] | None
     ) -> list[Tag]:
         logger.info(f'getting or creating tags for user: {user.email}')
 
@@ -33,13 +38,68 @@ class TagService(TagServiceInterface):
             )
 
         result = [await self._get_or_create_tag(user, tag) for tag in tags]
+        # new tags need their ids before they go into tasks.tag_ids
+        await self.session.flush()
 
         logger.info(
             f'got or created {len(result)} tags for user: {user.email}'
         )
         return result
 
-    async def collect_tag_by_id(self, user: User, id: int) -> Tag:
+    async def collect_tags_by_name(
+        self, user: Principal, names: Sequence[str]
+    ) -> dict[str, Tag]:
+        logger.info(f'collecting {len(names)} tags by name for {user.email}')
+
+        if not names:
+            return {}
+
+        tags = await self.session.scalars(
+            select(Tag).where(
+                Tag.user_email == user.email, Tag.name.in_(names)
+            )
+        )
+
+        return {tag.name: tag for tag in tags}
+
+    async def create_tags(
+        self, user: Principal, tags: Sequence[TagSchema]
+    ) -> dict[str, Tag]:
+        logger.info(f'creating {len(tags)} tags for user {user.email}')
+
+        if not tags:
+            return {}
+
+        for tag in tags:
+            self.check_color_hex(tag.color_hex)
+
+        mark_changed(self.session, user.email)
+        tags_db = await self.session.scalars(
+            insert(Tag).returning(Tag),
+            [
+                {
+                    'name': tag.name,
+                    'color_hex': tag.color_hex,
+                    'user_email': user.email,
+                }
+                for tag in tags
+            ],
+        )
+
+        return {tag.name: tag for tag in tags_db}
+
+    @staticmethod
+    def tag_ids(tags: Iterable[Tag]) -> list[int]:
+        return sorted(tag.id_tag for tag in tags)
+
+    @staticmethod
+    def check_color_hex(color_hex: str | None) -> None:
+        if color_hex and not COLOR_HEX_PATTERN.match(color_hex):
+            raise HTTPException(
+                HTTPStatus.BAD_REQUEST, 'invalid color_hex format'
+            )
+
+    async def collect_tag_by_id(self, user: Principal, id: int) -> Tag:
         logger.info(f'collecting tag with id = {id} for user {user.email}')
         tag = await self.session.scalar(
             select(Tag).where(
@@ -53,7 +113,7 @@ class TagService(TagServiceInterface):
 
         return tag
 
-    async def collect_tags(self, user: User) -> Sequence[Tag]:
+    async def collect_tags(self, user: Principal) -> Sequence[Tag]:
         logger.info(f'collecting tags for user {user.email}')
         tags = (
             await self.session.scalars(
@@ -64,7 +124,7 @@ class TagService(TagServiceInterface):
         return tags
 
     async def check_tag_name_exists(
-        self, user: User, name: str, id: int
+        self, user: Principal, name: str, id: int
     ) -> None:
         logger.info(
             f'checking if tag name "{name}" exists for user {user.email}'
@@ -82,7 +142,7 @@ class TagService(TagServiceInterface):
 
     async def update_tags_of_task(
         self,
-        user: User,
+        user: Principal,
         task: Task,
         tags_add: Sequence[TagSchema] | None,
         tags_remove: Sequence[TagSchema] | None,
@@ -106,8 +166,28 @@ class TagService(TagServiceInterface):
         ]
 
         task.tags = await self.get_or_create_tags(user, tags)
+        task.tag_ids = self.tag_ids(task.tags)
+
+    async def delete_tag(self, user: Principal, tag: Tag) -> None:
+        logger.info(
+            f'deleting tag with id = {tag.id_tag} for user {user.email}'
+        )
+        mark_changed(self.session, user.email)
+        await self.session.execute(
+            update(Task)
+            .where(
+                Task.user_email == user.email,
+                contains_tag_ids(Task.tag_ids, tag.id_tag),
+            )
+            .values(
+                tag_ids=remove_tag_id(Task.tag_ids, tag.id_tag),
+                updated_at=Task.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.delete(tag)
 
-    async def _get_or_create_tag(self, user: User, tag: TagSchema) -> Tag:
+    async def _get_or_create_tag(self, user: Principal, tag: TagSchema) -> Tag:
         tag_db = await self.session.scalar(
             select(Tag).where(
                 Tag.user_email == user.email, Tag.name == tag.name
@@ -115,14 +195,9 @@ class TagService(TagServiceInterface):
         )
 
         if not tag_db:
-            if tag.color_hex and not re.match(
-                r'^#([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$', tag.color_hex
-            ):
-                raise HTTPException(
-                    HTTPStatus.BAD_REQUEST, 'invalid color_hex format'
-                )
-
-            tag_db = Tag(tag.name, tag.color_hex, user.email, user)
+            self.check_color_hex(tag.color_hex)
+
+            tag_db = Tag(tag.name, tag.color_hex, user.email)
             logger.debug(f'creating new tag: {tag}')
             self.session.add(tag_db)
         else:
@@ -0,0 +1,263 @@
+from http import HTTPStatus
+from typing import Annotated, Sequence
+
+from fastapi import Depends, HTTPException
+from loguru import logger
+from sqlalchemy import Select, delete, func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from joker_task.db.database import get_session
+from joker_task.db.models import (
+    Tag,
+    Task,
+    Workbench,
+    task_tag,
+    task_workbench,
+)
+from joker_task.db.versions import mark_changed
+from joker_task.interfaces.interfaces import (
+    TagServiceInterface,
+    TaskBulkServiceInterface,
+    TaskCollectorInterface,
+    WorkbenchServiceInterface,
+)
+from joker_task.schemas import (
+    FilterSchema,
+    TagSchema,
+    TaskBulkUpdate,
+    TaskSchema,
+)
+from joker_task.service.principal import Principal
+from joker_task.service.tags_service import TagService
+from joker_task.service.task_collector import TaskCollector
+from joker_task.service.workbench_service import WorkbenchService
+
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_CollectorTask = Annotated[TaskCollectorInterface, Depends(TaskCollector)]
+T_TagService = Annotated[TagServiceInterface, Depends(TagService)]
+T_WorkbenchService = Annotated[
+    WorkbenchServiceInterface, Depends(WorkbenchService)
+]
+
+MAX_BULK_SIZE = 1000
+
+
+class TaskBulkService(TaskBulkServiceInterface):
+    def __init__(
+        self,
+        session: T_Session,
+        collector: T_CollectorTask,
+        tag_srv: T_TagService,
+        workbench_srv: T_WorkbenchService,
+    ):
+        self.session = session
+        self.collector = collector
+        self.tag_srv = tag_srv
+        self.workbench_srv = workbench_srv
+
+    async def create_tasks(
+        self, user: Principal, tasks: Sequence[TaskSchema]
+    ) -> list[Task | HTTPException]:
+        logger.info(f'creating {len(tasks)} tasks in bulk for {user.email}')
+
+        if len(tasks) > MAX_BULK_SIZE:
+            raise HTTPException(
+                HTTPStatus.BAD_REQUEST,
+                f'at most {MAX_BULK_SIZE} tasks per request',
+            )
+
+        tags_db = await self.tag_srv.collect_tags_by_name(
+            user, list({tag.name for task in tasks for tag in task.tags})
+        )
+        workbenches_db = await self.workbench_srv.collect_workbenches_indexed(
+            user, list({id for task in tasks for id in task.workbenches})
+        )
+
+        errors = [
+            self._check_task(task, tags_db, workbenches_db) for task in tasks
+        ]
+        valid = [
+            (index, task)
+            for index, task in enumerate(tasks)
+            if errors[index] is None
+        ]
+        created: dict[int, Task] = {}
+
+        if not valid:
+            return [error for error in errors if error is not None]
+
+        new_tags: dict[str, TagSchema] = {}
+        for _, task in valid:
+            for tag in task.tags:
+                if tag.name not in tags_db:
+                    new_tags.setdefault(tag.name, tag)
+        tags_db.update(
+            await self.tag_srv.create_tags(user, list(new_tags.values()))
+        )
+
+        tasks_db = await self._insert_tasks(
+            user, [task for _, task in valid], tags_db
+        )
+
+        for (index, task), task_db in zip(valid, tasks_db):
+            tags = [tags_db[tag.name] for tag in task.tags]
+            workbenches = [workbenches_db[id] for id in task.workbenches]
+            set_committed_value(task_db, 'tags', tags)
+            set_committed_value(task_db, 'workbenches', workbenches)
+            created[index] = task_db
+
+        await self._insert_associations(tasks_db)
+
+        logger.info(f'created {len(tasks_db)} tasks in bulk for {user.email}')
+        return [
+            created[index] if error is None else error
+            for index, error in enumerate(errors)
+        ]
+
+    async def update_tasks_by_filter(
+        self, user: Principal, filter: FilterSchema, task: TaskBulkUpdate
+    ) -> int:
+        logger.info(f'updating tasks in bulk for user {user.email}')
+        values = task.model_dump(exclude_unset=True, exclude_none=True)
+
+        if not values:
+            raise HTTPException(HTTPStatus.BAD_REQUEST, 'nothing to update')
+        if values.get('done') is False:
+            values['archived_at'] = None
+
+        mark_changed(self.session, user.email)
+        result = await self.session.execute(
+            update(Task)
+            .where(
+                Task.user_email == user.email,
+                Task.id_task.in_(self._ids_by_filter(user, filter)),
+            )
+            .values(**values, updated_at=func.now())
+            .execution_options(synchronize_session='fetch')
+        )
+
+        logger.info(f'updated {result.rowcount} tasks for {user.email}')
+        return result.rowcount  # type: ignore
+
+    async def delete_tasks_by_filter(
+        self, user: Principal, filter: FilterSchema
+    ) -> int:
+        logger.info(f'deleting tasks in bulk for user {user.email}')
+        # the association rows go first, so tag filters read tag_ids
+        # and keep matching the same tasks in every statement
+        ids = self._ids_by_filter(user, filter, tag_ids=True)
+
+        mark_changed(self.session, user.email)
+        await self.session.execute(
+            delete(task_tag).where(task_tag.c.id_task.in_(ids))
+        )
+        await self.session.execute(
+            delete(task_workbench).where(task_workbench.c.id_task.in_(ids))
+        )
+        result = await self.session.execute(
+            delete(Task)
+            .where(Task.user_email == user.email, Task.id_task.in_(ids))
+            .execution_options(synchronize_session='fetch')
+        )
+
+        logger.info(f'deleted {result.rowcount} tasks for {user.email}')
+        return result.rowcount  # type: ignore
+
+    def _ids_by_filter(
+        self, user: Principal, filter: FilterSchema, tag_ids: bool = False
+    ) -> Select:
+        filter_fields = {
+            campo
+            for campo, field_info in FilterSchema.model_fields.items()
+            if field_info.json_schema_extra
+        }
+        if not filter_fields & {
+            campo
+            for campo in filter.model_fields_set
+            if getattr(filter, campo) is not None
+        }:
+            raise HTTPException(
+                HTTPStatus.BAD_REQUEST, 'at least one filter is required'
+            )
+
+        return self.collector.make_filter_query(
+            user, filter, tag_ids
+        ).with_only_columns(Task.id_task)
+
+    def _check_task(
+        self,
+        task: TaskSchema,
+        tags_db: dict[str, Tag],
+        workbenches_db: dict[int, Workbench],
+    ) -> HTTPException | None:
+        if len(task.tags) != len({tag.name for tag in task.tags}):
+            return HTTPException(
+                HTTPStatus.BAD_REQUEST, 'duplicate tag names in request'
+            )
+
+        for tag in task.tags:
+            if tag.name in tags_db:
+                continue
+            try:
+                self.tag_srv.check_color_hex(tag.color_hex)
+            except HTTPException as exc:
+                return exc
+
+        for id_workbench in task.workbenches:
+            if id_workbench not in workbenches_db:
+                return HTTPException(
+                    HTTPStatus.NOT_FOUND,
+                    f'workbench with id: {id_workbench}, not found',
+                )
+
+        return None
+
+    async def _insert_tasks(
+        self,
+        user: Principal,
+        tasks: Sequence[TaskSchema],
+        tags_db: dict[str, Tag],
+    ) -> list[Task]:
+        mark_changed(self.session, user.email)
+        tasks_db = await self.session.scalars(
+            insert(Task)
+            .returning(Task, sort_by_parameter_order=True)
+            .options(noload(Task.tags), noload(Task.workbenches)),
+            [
+                {
+                    'user_email': user.email,
+                    'title': task.title,
+                    'description': task.description,
+                    'done': task.done or False,
+                    'reminder': task.reminder,
+                    'repetition': task.repetition,
+                    'state': task.state,
+                    'priority': task.priority,
+                    'tag_ids': self.tag_srv.tag_ids(
+                        tags_db[tag.name] for tag in task.tags
+                    ),
+                }
+                for task in tasks
+            ],
+        )
+
+        return list(tasks_db)
+
+    async def _insert_associations(self, tasks_db: Sequence[Task]) -> None:
+        tag_rows = [
+            {'id_task': task.id_task, 'id_tag': tag.id_tag}
+            for task in tasks_db
+            for tag in task.tags
+        ]
+        workbench_rows = [
+            {'id_task': task.id_task, 'id_workbench': workbench.id_workbench}
+            for task in tasks_db
+            for workbench in task.workbenches
+        ]
+
+        if tag_rows:
+            await self.session.execute(insert(task_tag), tag_rows)
+        if workbench_rows:
+            await self.session.execute(insert(task_workbench), workbench_rows)
@@ -1,15 +1,69 @@
+from functools import cache
 from http import HTTPStatus
+from typing import Any, AsyncIterator, Hashable, Sequence
 
 from fastapi import Depends, HTTPException
 from loguru import logger
-from sqlalchemy import Select, select
+from sqlalchemy import (
+    CompoundSelect,
+    Select,
+    String,
+    bindparam,
+    case,
+    cast,
+    func,
+    literal_column,
+    null,
+    select,
+    tuple_,
+    union_all,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, raiseload, selectinload
+from sqlalchemy.orm.interfaces import ORMOption
 
 from joker_task.db.database import get_session
-from joker_task.db.models import Task, User
-from joker_task.interfaces.interfaces import TaskCollectorInterface
-from joker_task.schemas import FilterSchema
-from joker_task.service.make_filters import factory_make_filter
+from joker_task.db.models import (
+    SEARCH_CONFIG,
+    Tag,
+    Task,
+    task_tag,
+    task_workbench,
+    tasks_fts,
+)
+from joker_task.interfaces.interfaces import (
+    StrategyMakeFilterInterface,
+    TaskCollectorInterface,
+)
+from joker_task.schemas import (
+    FilterSchema,
+    TaskProjection,
+    TaskQuery,
+    TaskSearch,
+)
+from joker_task.service.filter_cache import filter_query_cache
+from joker_task.service.make_filters import (
+    FilterByDialect,
+    factory_make_filter,
+)
+from joker_task.service.pagination import (
+    decode_cursor,
+    encode_cursor,
+    page_size,
+)
+from joker_task.service.principal import Principal
+
+STREAM_CHUNK_SIZE = 200
+SCOPE_HOT = 'hot'
+SCOPE_ARCHIVED = 'archived'
+SCOPE_ALL = 'all'
+FACET_TOTAL = 'total'
+SNIPPET_START = '<mark>'
+SNIPPET_STOP = '</mark>'
+SNIPPET_OPTIONS = (
+    f'StartSel={SNIPPET_START}, StopSel={SNIPPET_STOP}, '
+    + 'MaxWords=16, MinWords=8, MaxFragments=2'
+)
 
 
 class TaskCollector(TaskCollectorInterface):
@@ -17,51 +71,428 @@ class TaskCollector(TaskCollectorInterface):
         logger.info('starting collector')
         self.session = session
 
-    async def collect_task_by_id(self, user: User, id_task: int) -> Task:
+    async def collect_task_by_id(
+        self,
+        user: Principal,
+        id_task: int,
+        projection: TaskProjection | None = None,
+    ) -> Task:
         logger.info(
             f'collecting task with id = {id_task} for user {user.email}'
         )
         task = await self.session.scalar(
-            select(Task).where(
-                Task.user_email == user.email, Task.id_task == id_task
-            )
+            select(Task)
+            .where(Task.user_email == user.email, Task.id_task == id_task)
+            .options(*self._loader_options(projection, 'id_task'))
         )
         if not task:
             raise HTTPException(HTTPStatus.NOT_FOUND, 'task not found')
         return task
 
     async def collect_task_by_filter(
-        self, user: User, filter: FilterSchema
+        self, user: Principal, filter: FilterSchema
     ) -> list[Task]:
         logger.info(f'collecting tasks for user {user.email} with filter')
-        filter_sql = select(Task).where(Task.user_email == user.email)
-
-        for campo in filter.model_fields:
-            filter_sql = self._make_filter(campo, filter, filter_sql)
+        statement, params = self._make_page_query(
+            user, filter, 'id_task', None, page_size(filter.limit)
+        )
 
         logger.debug('searching tasks')
         result: list[Task] = list(
-            (
-                await self.session.scalars(filter_sql.order_by(Task.id_task))
-            ).all()
+            (await self.session.scalars(statement, params)).all()
         )
 
         return result
 
+    async def collect_task_page(
+        self, user: Principal, query: TaskQuery
+    ) -> tuple[list[Task], str | None]:
+        logger.info(f'collecting a page of tasks for user {user.email}')
+        limit = page_size(query.limit)
+        statement, params = self._make_page_query(
+            user, query, query.order_by, query.cursor, limit + 1, query
+        )
+
+        logger.debug('searching tasks')
+        tasks = list((await self.session.scalars(statement, params)).all())
+
+        if len(tasks) <= limit:
+            return tasks, None
+
+        tasks = tasks[:limit]
+        return tasks, encode_cursor(tasks[-1], query.order_by)
+
+    async def stream_task_by_filter(
+        self, user: Principal, query: TaskQuery
+    ) -> AsyncIterator[Task]:
+        logger.info(f'streaming tasks for user {user.email}')
+        limit = query.limit if 'limit' in query.model_fields_set else None
+        statement, params = self._make_page_query(
+            user, query, query.order_by, query.cursor, limit, query
+        )
+
+        result = await self.session.stream_scalars(
+            statement.execution_options(yield_per=STREAM_CHUNK_SIZE), params
+        )
+        async for task in result:
+            yield task
+
+    async def count_task_by_filter(
+        self, user: Principal, filter: FilterSchema, facets: Sequence[str]
+    ) -> tuple[int, dict[str, dict[str, int]]]:
+        logger.info(f'counting tasks for user {user.email} with filter')
+        active = self._active_filters(filter)
+        scope = self._scope(filter)
+        statement = filter_query_cache.get_or_build(
+            ('count', self._shape(active), scope, tuple(facets)),
+            lambda: self._build_count_query(active, scope, facets),
+        )
+
+        total = 0
+        result: dict[str, dict[str, int]] = {facet: {} for facet in facets}
+        for facet, value, count in await self.session.execute(
+            statement, self._bind(user, active)
+        ):
+            if facet == FACET_TOTAL:
+                total = count
+            else:
+                result[facet]['null' if value is None else value] = count
+
+        return total, result
+
+    def make_filter_query(
+        self, user: Principal, filter: FilterSchema, tag_ids: bool = False
+    ) -> Select:
+        active = self._active_filters(filter, tag_ids)
+        scope = self._scope(filter)
+        statement = filter_query_cache.get_or_build(
+            ('filter', self._shape(active), scope, tag_ids),
+            lambda: self._build_filter_query(active, scope),
+        )
+
+        return statement.params(**self._bind(user, active))
+
+    async def search_tasks(
+        self, user: Principal, search: TaskSearch
+    ) -> list[tuple[Task, float, str | None]]:
+        logger.info(f'searching tasks for user {user.email}')
+        dialect = self.session.get_bind().dialect.name
+        scope = SCOPE_ARCHIVED if search.archived else SCOPE_HOT
+        statement = filter_query_cache.get_or_build(
+            ('search', dialect, scope),
+            lambda: self._build_search_query(dialect, scope),
+        )
+
+        result = await self.session.execute(
+            statement,
+            {
+                'user_email': user.email,
+                'search_query': self._search_query(dialect, search.q),
+                'page_offset': search.offset,
+                'page_limit': page_size(search.limit),
+            },
+        )
+
+        return [(task, rank, snippet) for task, rank, snippet in result]
+
+    def _make_page_query(  # noqa: PLR0913, PLR0917
+        self,
+        user: Principal,
+        filter: FilterSchema,
+        order_by: str,
+        cursor: str | None,
+        limit: int | None,
+        projection: TaskProjection | None = None,
+    ) -> tuple[Select, dict[str, Any]]:
+        active = self._active_filters(filter)
+        scope = self._scope(filter)
+        key = (
+            'page',
+            self._shape(active),
+            scope,
+            order_by,
+            cursor is not None,
+            limit is not None,
+            self._projection_key(projection),
+        )
+        statement = filter_query_cache.get_or_build(
+            key,
+            lambda: self._build_page_query(
+                active, scope, order_by, cursor is not None, limit is not None
+            ).options(*self._loader_options(projection, order_by)),
+        )
+
+        params = self._bind(user, active)
+        if cursor:
+            params['cursor_value'], params['cursor_id'] = decode_cursor(
+                cursor, order_by
+            )
+        else:
+            params['page_offset'] = filter.offset
+        if limit is not None:
+            params['page_limit'] = limit
+
+        return statement, params
+
+    def _build_page_query(  # noqa: PLR0913, PLR0917
+        self,
+        active: list[tuple[str, StrategyMakeFilterInterface, Any]],
+        scope: str,
+        order_by: str,
+        has_cursor: bool,
+        has_limit: bool,
+    ) -> Select:
+        order_column = getattr(Task, order_by)
+        filter_sql = self._build_filter_query(active, scope)
+
+        if not has_cursor:
+            filter_sql = filter_sql.offset(bindparam('page_offset'))
+        elif order_by == 'id_task':
+            filter_sql = filter_sql.where(
+                Task.id_task > bindparam('cursor_id')
+            )
+        else:
+            filter_sql = filter_sql.where(
+                tuple_(order_column, Task.id_task)
+                > tuple_(
+                    bindparam('cursor_value', type_=order_column.type),
+                    bindparam('cursor_id'),
+                )
+            )
+
+        if order_by != 'id_task':
+            filter_sql = filter_sql.order_by(order_column)
+        filter_sql = filter_sql.order_by(Task.id_task)
+
+        if has_limit:
+            filter_sql = filter_sql.limit(bindparam('page_limit'))
+
+        return filter_sql
+
+    def _build_count_query(
+        self,
+        active: list[tuple[str, StrategyMakeFilterInterface, Any]],
+        scope: str,
+        facets: Sequence[str],
+    ) -> CompoundSelect:
+        matched = (
+            self._build_filter_query(active, scope)
+            .with_only_columns(Task.id_task)
+            .cte('matched')
+        )
+        by_task = matched.join(Task, Task.id_task == matched.c.id_task)
+
+        def facet(name: str, value: Any) -> Select:
+            return select(
+                literal_column(f"'{name}'").label('facet'),
+                value.label('value'),
+                func.count().label('count'),
+            )
+
+        parts = [facet(FACET_TOTAL, cast(null(), String)).select_from(matched)]
+
+        if 'state' in facets:
+            parts.append(
+                facet('state', Task.state)
+                .select_from(by_task)
+                .group_by(Task.state)
+            )
+        if 'done' in facets:
+            done = case(
+                (Task.done.is_(True), 'true'), (Task.done.is_(False), 'false')
+            )
+            parts.append(
+                facet('done', done).select_from(by_task).group_by(Task.done)
+            )
+        if 'tags' in facets:
+            parts.append(
+                facet('tags', Tag.name)
+                .select_from(
+                    matched.join(
+                        task_tag, task_tag.c.id_task == matched.c.id_task
+                    ).join(Tag, Tag.id_tag == task_tag.c.id_tag)
+                )
+                .group_by(Tag.name)
+            )
+        if 'workbenches' in facets:
+            parts.append(
+                facet(
+                    'workbenches',
+                    cast(task_workbench.c.id_workbench, String),
+                )
+                .select_from(
+                    matched.join(
+                        task_workbench,
+                        task_workbench.c.id_task == matched.c.id_task,
+                    )
+                )
+                .group_by(task_workbench.c.id_workbench)
+            )
+
+        return union_all(*parts)
+
     @staticmethod
-    def _make_filter(
-        campo: str, filter: FilterSchema, filter_sql: Select
+    def _build_filter_query(
+        active: list[tuple[str, StrategyMakeFilterInterface, Any]],
+        scope: str,
     ) -> Select:
-        field_info = filter.__class__.model_fields.get(campo)
+        filter_sql = select(Task).where(
+            Task.user_email == bindparam('user_email')
+        )
+
+        if scope == SCOPE_HOT:
+            filter_sql = filter_sql.where(Task.archived_at.is_(None))
+        elif scope == SCOPE_ARCHIVED:
+            filter_sql = filter_sql.where(Task.archived_at.is_not(None))
+
+        for campo, make_filter, value in active:
+            logger.info(f'updating filter with {campo}')
+            filter_sql = make_filter.make(filter_sql, value, campo)
+
+        return filter_sql
+
+    @staticmethod
+    def _build_search_query(dialect: str, scope: str) -> Select:
+        search_query = bindparam('search_query')
+
+        if dialect == 'postgresql':
+            config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+            ts_query = func.websearch_to_tsquery(config, search_query)
+            search_vector = literal_column('tasks.search_vector')
+            rank = func.ts_rank_cd(search_vector, ts_query)
+            snippet = func.ts_headline(
+                config,
+                func.coalesce(Task.title, '')
+                + ' '
+                + func.coalesce(Task.description, ''),
+                ts_query,
+                SNIPPET_OPTIONS,
+            )
+            statement = select(Task, rank, snippet).where(
+                search_vector.op('@@')(ts_query)
+            )
+        else:
+            fts = literal_column('tasks_fts')
+            rank = -func.bm25(fts)
+            snippet = func.snippet(
+                fts, -1, SNIPPET_START, SNIPPET_STOP, '...', 16
+            )
+            statement = (
+                select(Task, rank, snippet)
+                .join(tasks_fts, tasks_fts.c.rowid == Task.id_task)
+                .where(fts.op('MATCH')(search_query))
+            )
+
+        if scope == SCOPE_HOT:
+            statement = statement.where(Task.archived_at.is_(None))
+        else:
+            statement = statement.where(Task.archived_at.is_not(None))
+
+        return (
+            statement.where(Task.user_email == bindparam('user_email'))
+            .options(selectinload(Task.tags), selectinload(Task.workbenches))
+            .order_by(rank.desc(), Task.id_task)
+            .offset(bindparam('page_offset'))
+            .limit(bindparam('page_limit'))
+        )
+
+    @staticmethod
+    def _search_query(dialect: str, q: str) -> str:
+        if dialect == 'postgresql':
+            return q
 
-        if not getattr(filter, campo) or not (
-            field_info and field_info.json_schema_extra
+        return ' '.join(
+            '"' + term.replace('"', '""') + '"' for term in q.split()
+        )
+
+    @staticmethod
+    def _projection_key(projection: TaskProjection | None) -> Hashable:
+        if projection is None:
+            return None
+
+        return tuple(
+            None if names is None else tuple(sorted(names))
+            for names in (projection.fields, projection.include)
+        )
+
+    @staticmethod
+    def _loader_options(
+        projection: TaskProjection | None, order_by: str
+    ) -> list[ORMOption]:
+        if projection is None or (
+            projection.fields is None and projection.include is None
         ):
-            logger.debug('returning filter_sql unchanged')
-            return filter_sql
+            return [selectinload(Task.tags), selectinload(Task.workbenches)]
+
+        options: list[ORMOption] = []
+        if projection.fields is not None:
+            columns = {*projection.fields, order_by}
+            options.append(
+                load_only(*(getattr(Task, column) for column in columns))
+            )
 
-        logger.info(f'updating filter with {campo}')
-        make_filter = factory_make_filter(
-            field_info.json_schema_extra.get('search_logic')
+        include = projection.include or []
+        for relationship in (Task.tags, Task.workbenches):
+            if relationship.key in include:
+                options.append(selectinload(relationship))
+            else:
+                options.append(raiseload(relationship))
+
+        return options
+
+    @staticmethod
+    def _active_filters(
+        filter: FilterSchema, tag_ids: bool = False
+    ) -> list[tuple[str, StrategyMakeFilterInterface, Any]]:
+        active = []
+        for campo, search_logic in _search_fields(type(filter)):
+            value = getattr(filter, campo)
+            if value is None:
+                continue
+
+            make_filter = factory_make_filter(search_logic)
+            # match tags on the denormalized column on every dialect
+            if tag_ids and isinstance(make_filter, FilterByDialect):
+                make_filter = make_filter.postgresql
+            active.append((campo, make_filter, value))
+
+        return active
+
+    @staticmethod
+    def _scope(filter: FilterSchema) -> str:
+        if filter.archived is not None:
+            return SCOPE_ARCHIVED if filter.archived else SCOPE_HOT
+
+        # asking for done work is the one case where old tasks matter
+        return SCOPE_ALL if filter.done else SCOPE_HOT
+
+    @staticmethod
+    def _shape(
+        active: list[tuple[str, StrategyMakeFilterInterface, Any]],
+    ) -> Hashable:
+        return tuple(
+            (campo, make_filter.shape(value))
+            for campo, make_filter, value in active
         )
-        return make_filter.make(filter_sql, getattr(filter, campo), campo)
+
+    @staticmethod
+    def _bind(
+        user: Principal,
+        active: list[tuple[str, StrategyMakeFilterInterface, Any]],
+    ) -> dict[str, Any]:
+        params: dict[str, Any] = {'user_email': user.email}
+        for campo, make_filter, value in active:
+            params.update(make_filter.bind(value, campo))
+        return params
+
+
+@cache
+def _search_fields(
+    filter_class: type[FilterSchema],
+) -> tuple[tuple[str, str], ...]:
+    return tuple(
+        (campo, field_info.json_schema_extra['search_logic'])  # type: ignore
+        for campo, field_info in filter_class.model_fields.items()
+        if isinstance(field_info.json_schema_extra, dict)
+        and 'search_logic' in field_info.json_schema_extra
+    )
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from hashlib import sha256
+from time import time
+from typing import Any
+
+from joker_task.settings import Settings, get_settings, on_reload
+
+
+class TokenCache:
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        # keyed by digest so the cache never holds usable tokens
+        self._payloads: OrderedDict[bytes, dict[str, Any]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str, settings: Settings) -> bytes:
+        # a rotated key or algorithm must miss on what the old one verified
+        return sha256(
+            b'\0'.join((
+                settings.signing_key,
+                settings.ALGORITHM.encode(),
+                token.encode(),
+            ))
+        ).digest()
+
+    def get(self, token: str, settings: Settings) -> dict[str, Any] | None:
+        key = self._key(token, settings)
+        payload = self._payloads.get(key)
+
+        if payload is None or payload['exp'] <= time():
+            self._payloads.pop(key, None)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._payloads.move_to_end(key)
+        return payload
+
+    def put(
+        self, token: str, settings: Settings, payload: dict[str, Any]
+    ) -> None:
+        # without exp there is nothing to bound the entry's lifetime
+        if self.maxsize <= 0 or not isinstance(payload.get('exp'), int):
+            return
+
+        key = self._key(token, settings)
+        self._payloads[key] = payload
+        self._payloads.move_to_end(key)
+        if len(self._payloads) > self.maxsize:
+            self._payloads.popitem(last=False)
+
+    def resize(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        while len(self._payloads) > max(maxsize, 0):
+            self._payloads.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._payloads),
+            'maxsize': self.maxsize,
+        }
+
+    def clear(self) -> None:
+        self.hits = self.misses = 0
+        self._payloads.clear()
+
+
+token_cache = TokenCache(get_settings().TOKEN_CACHE_SIZE)
+
+
+@on_reload
+def _resize_token_cache(settings: Settings) -> None:
+    token_cache.resize(settings.TOKEN_CACHE_SIZE)
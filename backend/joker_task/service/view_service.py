@@ -9,7 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from joker_task.db.database import get_session
-from joker_task.db.models import Filter, Task, User, View
+from joker_task.db.models import Filter, Task, View
 from joker_task.interfaces.interfaces import (
     MapperInterface,
     TaskCollectorInterface,
@@ -17,6 +17,7 @@ from joker_task.interfaces.interfaces import (
 )
 from joker_task.schemas import FilterSchema, ViewSchema, ViewUpdate
 from joker_task.service.mapper import Mapper
+from joker_task.service.principal import Principal
 from joker_task.service.task_collector import TaskCollector
 
 T_Session = Annotated[AsyncSession, Depends(get_session)]
@@ -32,14 +33,13 @@ class ViewService(ViewServiceInterface):
         self.collector = collector
         self.mapper = mapper
 
-    async def create_view(self, user: User, view: ViewSchema) -> View:
+    async def create_view(self, user: Principal, view: ViewSchema) -> View:
         logger.debug(
             f'Creating view for user {user.email} with name {view.name}'
         )
         await self._find_conflicting(user, view.name)
         view_db = View(
             user_email=user.email,
-            user=user,
             name=view.name,
         )
         self.session.add(view_db)
@@ -53,7 +53,7 @@ class ViewService(ViewServiceInterface):
 
         return view_db
 
-    async def list_views(self, user: User) -> Sequence[View]:
+    async def list_views(self, user: Principal) -> Sequence[View]:
         logger.debug(f'Listing views for user {user.email}')
 
         result = await self.session.scalars(
@@ -64,7 +64,7 @@ class ViewService(ViewServiceInterface):
 
         return result.all()
 
-    async def get_view_by_id(self, user: User, id_view: int) -> View:
+    async def get_view_by_id(self, user: Principal, id_view: int) -> View:
         logger.debug(f'Getting view {id_view} for user {user.email}')
 
         view_db = await self.session.scalar(
@@ -80,7 +80,7 @@ class ViewService(ViewServiceInterface):
 
     async def apply_view(
         self,
-        user: User,
+        user: Principal,
         id_view: int,
     ) -> dict[int, list[Task]]:
         logger.debug(f'Applying view {id_view} for user {user.email}')
@@ -99,7 +99,7 @@ class ViewService(ViewServiceInterface):
         return result
 
     async def update_view(
-        self, user: User, id_view: int, view: ViewUpdate
+        self, user: Principal, id_view: int, view: ViewUpdate
     ) -> View:
         logger.debug(f'Updating view {id_view} for user {user.email}')
 
@@ -119,7 +119,7 @@ class ViewService(ViewServiceInterface):
         return view_db
 
     async def create_view_filter(
-        self, user: User, id_view: int, filter_schema: FilterSchema
+        self, user: Principal, id_view: int, filter_schema: FilterSchema
     ) -> Filter:
         logger.debug(
             f'Creating filter for view {id_view} for user {user.email}'
@@ -134,7 +134,7 @@ class ViewService(ViewServiceInterface):
 
     async def update_view_filter(
         self,
-        user: User,
+        user: Principal,
         id_view: int,
         id_filter: int,
         filter_schema: FilterSchema,
@@ -161,11 +161,14 @@ class ViewService(ViewServiceInterface):
         filter_db.title = filter_schema.title
         filter_db.description = filter_schema.description
         filter_db.done = filter_schema.done
+        filter_db.archived = filter_schema.archived
         filter_db.tags = filter_schema.tags or None
+        filter_db.tags_any = filter_schema.tags_any or None
+        filter_db.tags_none = filter_schema.tags_none or None
         filter_db.reminder = self._serialize_reminder(filter_schema.reminder)
         filter_db.repetition = filter_schema.repetition
         filter_db.state = filter_schema.state or []
-        filter_db.priority = filter_schema.priority or (None, None)
+        filter_db.priority = list(filter_schema.priority or (None, None))
         filter_db.limit = filter_schema.limit
         filter_db.offset = filter_schema.offset
         self.session.add(filter_db)
@@ -173,7 +176,7 @@ class ViewService(ViewServiceInterface):
         return filter_db
 
     async def delete_view_filter(
-        self, user: User, id_view: int, id_filter: int
+        self, user: Principal, id_view: int, id_filter: int
     ) -> None:
         logger.debug(
             f'Deleting filter {id_filter} '
@@ -196,7 +199,7 @@ class ViewService(ViewServiceInterface):
 
         await self.session.delete(filter_db)
 
-    async def delete_view(self, user: User, id_view: int) -> None:
+    async def delete_view(self, user: Principal, id_view: int) -> None:
         view_db = await self.get_view_by_id(user, id_view)
         await self.session.delete(view_db)
 
@@ -208,11 +211,14 @@ class ViewService(ViewServiceInterface):
             title=filter_schema.title,
             description=filter_schema.description,
             done=filter_schema.done,
+            archived=filter_schema.archived,
             tags=filter_schema.tags or [],
+            tags_any=filter_schema.tags_any or None,
+            tags_none=filter_schema.tags_none or None,
             reminder=ViewService._serialize_reminder(filter_schema.reminder),
             repetition=filter_schema.repetition,
             state=filter_schema.state or [],
-            priority=filter_schema.priority or (None, None),
+            priority=list(filter_schema.priority or (None, None)),
             limit=filter_schema.limit,
             offset=filter_schema.offset,
         )
@@ -220,17 +226,17 @@ class ViewService(ViewServiceInterface):
     @staticmethod
     def _serialize_reminder(
         reminder: tuple[datetime | None, datetime | None] | None,
-    ) -> tuple[str | None, str | None] | None:
+    ) -> list[str | None] | None:
         if reminder is None:
             return None
 
         start, end = reminder
-        return (
+        return [
             start.isoformat() if start else None,
             end.isoformat() if end else None,
-        )
+        ]
 
-    async def _find_conflicting(self, user: User, name: str) -> None:
+    async def _find_conflicting(self, user: Principal, name: str) -> None:
         have_conflict = await self.session.scalar(
             select(View).where(
                 View.user_email == user.email, View.name == name
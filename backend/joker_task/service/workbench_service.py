@@ -5,10 +5,12 @@ from fastapi import Depends, HTTPException
 from loguru import logger
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from joker_task.db.database import get_session
-from joker_task.db.models import Task, User, Workbench
+from joker_task.db.models import Task, Workbench
 from joker_task.interfaces.interfaces import WorkbenchServiceInterface
+from joker_task.service.principal import Principal
 
 T_Session = Annotated[AsyncSession, Depends(get_session)]
 
@@ -18,19 +20,27 @@ class WorkbenchService(WorkbenchServiceInterface):
         self.session = session
 
     async def collect_workbench_by_id(
-        self, user: User, id_workbench: int
+        self, user: Principal, id_workbench: int, with_tasks: bool = False
     ) -> Workbench:
         logger.info(
             'collecting workbenches with id: '
             + f'{id_workbench} for user: {user.email}'
         )
 
-        workbench_db = await self.session.scalar(
-            select(Workbench).where(
-                Workbench.user_email == user.email,
-                Workbench.id_workbench == id_workbench,
-            )
+        statement = select(Workbench).where(
+            Workbench.user_email == user.email,
+            Workbench.id_workbench == id_workbench,
         )
+        if with_tasks:
+            tasks = selectinload(
+                Workbench.tasks.and_(Task.archived_at.is_(None))
+            )
+            statement = statement.options(
+                tasks.selectinload(Task.tags),
+                tasks.selectinload(Task.workbenches),
+            )
+
+        workbench_db = await self.session.scalar(statement)
 
         if not workbench_db:
             raise HTTPException(HTTPStatus.NOT_FOUND, 'workbench not found')
@@ -38,7 +48,7 @@ class WorkbenchService(WorkbenchServiceInterface):
         return workbench_db
 
     async def collect_workbenches_by_id(
-        self, user: User, id_workbenches: Sequence[int]
+        self, user: Principal, id_workbenches: Sequence[int]
     ) -> Sequence[Workbench]:
         logger.info(
             'collecting workbenches by id: '
@@ -75,7 +85,31 @@ class WorkbenchService(WorkbenchServiceInterface):
 
         return workbenches_db
 
-    async def collect_workbenches(self, user: User) -> Sequence[Workbench]:
+    async def collect_workbenches_indexed(
+        self, user: Principal, id_workbenches: Sequence[int]
+    ) -> dict[int, Workbench]:
+        logger.info(
+            f'indexing {len(id_workbenches)} workbenches for user: '
+            + user.email
+        )
+
+        if not id_workbenches:
+            return {}
+
+        workbenches_db = await self.session.scalars(
+            select(Workbench).where(
+                Workbench.user_email == user.email,
+                Workbench.id_workbench.in_(id_workbenches),
+            )
+        )
+
+        return {
+            workbench.id_workbench: workbench for workbench in workbenches_db
+        }
+
+    async def collect_workbenches(
+        self, user: Principal
+    ) -> Sequence[Workbench]:
         logger.info(f'collecting workbenches of user: {user.email}')
 
         result = await self.session.execute(
@@ -86,7 +120,9 @@ class WorkbenchService(WorkbenchServiceInterface):
 
         return result.scalars().all()
 
-    async def check_workbench_name_exists(self, user: User, name: str) -> None:
+    async def check_workbench_name_exists(
+        self, user: Principal, name: str
+    ) -> None:
         logger.info(
             f'checking workbench name conflict: {name} for user: {user.email}'
         )
@@ -103,7 +139,7 @@ class WorkbenchService(WorkbenchServiceInterface):
 
     async def update_workbenches_of_task(
         self,
-        user: User,
+        user: Principal,
         task: Task,
         workbenches_add: Sequence[int] | None,
         workbenches_remove: Sequence[int] | None,
@@ -1,4 +1,10 @@
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from datetime import timedelta
+from functools import cached_property, lru_cache
+from typing import Annotated, Callable
+
+from loguru import logger
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -11,3 +17,137 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE: int
     REFRESH_TOKEN_EXPIRE: int
     PROD: bool
+
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_WARMUP: int = 0
+    DB_STATEMENT_CACHE_SIZE: int = 256
+    DB_QUERY_CACHE_SIZE: int = 1000
+
+    DATABASE_REPLICA_URLS: Annotated[list[str], NoDecode] = []
+    REPLICA_STICKY_SECONDS: float = 5.0
+
+    DATABASE_SHARD_URLS: Annotated[dict[str, str], NoDecode] = {}
+    SHARD_VIRTUAL_NODES: int = 128
+
+    METRICS_TOKEN: str = ''
+
+    PASSWORD_WORKERS: int = 2
+    PASSWORD_QUEUE_LIMIT: int = 32
+
+    PRINCIPAL_CACHE_SIZE: int = 1024
+    PRINCIPAL_CACHE_TTL: float = 30.0
+    TOKEN_CACHE_SIZE: int = 4096
+    STATELESS_PRINCIPAL: bool = False
+    REVOCATION_REFRESH_SECONDS: float = 5.0
+    REVOCATION_PRUNE_SECONDS: float = 3600.0
+
+    TASKS_PARTITIONED: bool = False
+
+    ARCHIVE_AFTER_DAYS: int = 30
+    ARCHIVE_INTERVAL_SECONDS: float = 3600.0
+    ARCHIVE_BATCH_SIZE: int = 1000
+
+    @field_validator('DATABASE_REPLICA_URLS', mode='before')
+    @classmethod
+    def split_urls(cls, value: str | list[str]) -> list[str]:
+        if isinstance(value, str):
+            return [url.strip() for url in value.split(',') if url.strip()]
+        return value
+
+    @field_validator('DATABASE_SHARD_URLS', mode='before')
+    @classmethod
+    def split_shards(cls, value: str | dict[str, str]) -> dict[str, str]:
+        if isinstance(value, str):
+            pairs = (pair.split('=', 1) for pair in value.split(',') if pair)
+            return {name.strip(): url.strip() for name, url in pairs}
+        return value
+
+    @cached_property
+    def access_token_delta(self) -> timedelta:
+        return timedelta(minutes=self.ACCESS_TOKEN_EXPIRE)
+
+    @cached_property
+    def refresh_token_delta(self) -> timedelta:
+        return timedelta(minutes=self.REFRESH_TOKEN_EXPIRE)
+
+    @cached_property
+    def archive_after(self) -> timedelta:
+        return timedelta(days=self.ARCHIVE_AFTER_DAYS)
+
+    @cached_property
+    def signing_key(self) -> bytes:
+        return self.SECRET_KEY.encode()
+
+    @cached_property
+    def algorithms(self) -> list[str]:
+        return [self.ALGORITHM]
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    settings = Settings()  # type: ignore
+    # resolve the parsed forms up front so the auth path only reads them
+    settings.access_token_delta
+    settings.refresh_token_delta
+    settings.signing_key
+    settings.algorithms
+    return settings
+
+
+# engines, routers, background jobs and the tasks table are built from
+# these once at startup, so a reload only warns that they changed
+RESTART_SETTINGS = frozenset({
+    'DATABASE_URL',
+    'DB_POOL_SIZE',
+    'DB_MAX_OVERFLOW',
+    'DB_POOL_TIMEOUT',
+    'DB_POOL_RECYCLE',
+    'DB_POOL_PRE_PING',
+    'DB_POOL_WARMUP',
+    'DB_STATEMENT_CACHE_SIZE',
+    'DB_QUERY_CACHE_SIZE',
+    'DATABASE_REPLICA_URLS',
+    'REPLICA_STICKY_SECONDS',
+    'DATABASE_SHARD_URLS',
+    'SHARD_VIRTUAL_NODES',
+    'PROD',
+    'REVOCATION_REFRESH_SECONDS',
+    'REVOCATION_PRUNE_SECONDS',
+    'TASKS_PARTITIONED',
+    'ARCHIVE_AFTER_DAYS',
+    'ARCHIVE_INTERVAL_SECONDS',
+    'ARCHIVE_BATCH_SIZE',
+})
+
+_reload_hooks: list[Callable[[Settings], None]] = []
+
+
+def on_reload(
+    hook: Callable[[Settings], None],
+) -> Callable[[Settings], None]:
+    # for singletons built from settings at import, e.g. caches and pools
+    _reload_hooks.append(hook)
+    return hook
+
+
+def reload_settings() -> Settings:
+    logger.info('reloading settings')
+    before = get_settings()
+    get_settings.cache_clear()
+    settings = get_settings()
+
+    stale = sorted(
+        name
+        for name in RESTART_SETTINGS
+        if getattr(before, name) != getattr(settings, name)
+    )
+    if stale:
+        logger.warning(f'restart to apply: {", ".join(stale)}')
+
+    for hook in _reload_hooks:
+        hook(settings)
+    return settings
@@ -1,4 +1,5 @@
 import asyncio
+import re
 
 from logging.config import fileConfig
 
@@ -6,7 +7,7 @@ from alembic import context
 from sqlalchemy.ext.asyncio import async_engine_from_config
 from sqlalchemy import pool
 
-from joker_task.settings import Settings
+from joker_task.settings import get_settings
 from joker_task.db.models import table_registry
 
 
@@ -14,7 +15,7 @@ from joker_task.db.models import table_registry
 # access to the values within the .ini file in use.
 config = context.config
 config.set_main_option(
-    'sqlalchemy.url', Settings().DATABASE_URL   # type: ignore
+    'sqlalchemy.url', get_settings().DATABASE_URL
 )
 
 # Interpret the config file for Python logging.
@@ -34,8 +35,33 @@ target_metadata = table_registry.metadata
 # ... etc.
 
 
+# full-text search objects are created by DDL events and migrations, not
+# by the models, so autogenerate must not try to drop them
+SEARCH_OBJECTS = {'search_vector', 'ix_tasks_search_vector'}
+
+# indexes the models create on Postgres only (Index.ddl_if)
+POSTGRESQL_OBJECTS = {'ix_tasks_tag_ids'}
+
+# hash partitions from the opt-in partitioning migration (c3f8a2d6e915)
+PARTITION_TABLE = re.compile(r'^(tasks|task_tag|task_workbench)_p\d+$')
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table' and name.startswith('tasks_fts'):
+        return False
+    if type_ == 'table' and PARTITION_TABLE.match(name):
+        return False
+    if name in POSTGRESQL_OBJECTS:
+        return context.get_context().dialect.name == 'postgresql'
+    return name not in SEARCH_OBJECTS
+
+
 def do_run_migrations(connection):
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -74,6 +100,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
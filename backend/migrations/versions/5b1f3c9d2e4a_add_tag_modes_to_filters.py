@@ -0,0 +1,30 @@
+"""add tags_any and tags_none to filters
+
+Revision ID: 5b1f3c9d2e4a
+Revises: 0e7212850d2e
+Create Date: 2026-10-17 10:12:41.218530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1f3c9d2e4a'
+down_revision: Union[str, Sequence[str], None] = '0e7212850d2e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('filters', sa.Column('tags_any', sa.JSON(), nullable=True))
+    op.add_column('filters', sa.Column('tags_none', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('filters', 'tags_none')
+    op.drop_column('filters', 'tags_any')
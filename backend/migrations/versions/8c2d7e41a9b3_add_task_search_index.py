@@ -0,0 +1,83 @@
+"""add full-text search index for tasks
+
+Revision ID: 8c2d7e41a9b3
+Revises: 5b1f3c9d2e4a
+Create Date: 2026-10-17 11:02:17.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2d7e41a9b3'
+down_revision: Union[str, Sequence[str], None] = '5b1f3c9d2e4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+POSTGRESQL_UPGRADE = [
+    "ALTER TABLE tasks ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', "
+    "coalesce(title, '') || ' ' || coalesce(description, ''))) STORED",
+    "CREATE INDEX ix_tasks_search_vector ON tasks USING GIN (search_vector)",
+]
+
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX ix_tasks_search_vector",
+    "ALTER TABLE tasks DROP COLUMN search_vector",
+]
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+    "title, description, content='tasks', content_rowid='id_task', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks "
+    "BEGIN INSERT INTO tasks_fts(rowid, title, description) "
+    "VALUES (new.id_task, new.title, new.description); END",
+    "CREATE TRIGGER tasks_fts_ad AFTER DELETE ON tasks "
+    "BEGIN INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id_task, old.title, old.description); END",
+    "CREATE TRIGGER tasks_fts_au AFTER UPDATE OF title, description ON tasks "
+    "BEGIN INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id_task, old.title, old.description); "
+    "INSERT INTO tasks_fts(rowid, title, description) "
+    "VALUES (new.id_task, new.title, new.description); END",
+    "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER tasks_fts_au",
+    "DROP TRIGGER tasks_fts_ad",
+    "DROP TRIGGER tasks_fts_ai",
+    "DROP TABLE tasks_fts",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        statements = POSTGRESQL_UPGRADE
+    elif dialect == 'sqlite':
+        statements = SQLITE_UPGRADE
+    else:
+        return
+
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        statements = POSTGRESQL_DOWNGRADE
+    elif dialect == 'sqlite':
+        statements = SQLITE_DOWNGRADE
+    else:
+        return
+
+    for statement in statements:
+        op.execute(statement)
@@ -0,0 +1,59 @@
+"""add per-user and reverse association indexes
+
+Revision ID: a41e6f0b7c25
+Revises: 8c2d7e41a9b3
+Create Date: 2026-10-17 11:48:05.113402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41e6f0b7c25'
+down_revision: Union[str, Sequence[str], None] = '8c2d7e41a9b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_tasks_user_email_id_task', 'tasks', ['user_email', 'id_task']),
+    ('ix_tasks_user_email_done', 'tasks', ['user_email', 'done']),
+    ('ix_tasks_user_email_reminder', 'tasks', ['user_email', 'reminder']),
+    ('ix_tasks_user_email_priority', 'tasks', ['user_email', 'priority']),
+    ('ix_tasks_user_email_updated_at', 'tasks', ['user_email', 'updated_at']),
+    ('ix_task_tag_id_tag_id_task', 'task_tag', ['id_tag', 'id_task']),
+    (
+        'ix_task_workbench_id_workbench_id_task',
+        'task_workbench',
+        ['id_workbench', 'id_task'],
+    ),
+    ('ix_filters_id_view', 'filters', ['id_view']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction block on Postgres
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
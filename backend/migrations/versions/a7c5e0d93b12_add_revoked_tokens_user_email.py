@@ -0,0 +1,35 @@
+"""add the owner to revoked_tokens so shard moves can carry them
+
+Revision ID: a7c5e0d93b12
+Revises: f4a9d2c81b36
+Create Date: 2026-10-17 23:52:06.417305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c5e0d93b12'
+down_revision: Union[str, Sequence[str], None] = 'f4a9d2c81b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # rows revoked before this revision stay ownerless and simply expire
+    op.add_column(
+        'revoked_tokens', sa.Column('user_email', sa.String(), nullable=True)
+    )
+    op.create_index(
+        'ix_revoked_tokens_user_email', 'revoked_tokens', ['user_email']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_revoked_tokens_user_email', table_name='revoked_tokens')
+    op.drop_column('revoked_tokens', 'user_email')
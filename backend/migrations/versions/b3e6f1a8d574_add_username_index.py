@@ -0,0 +1,39 @@
+"""add a global username index for sharded deployments
+
+Revision ID: b3e6f1a8d574
+Revises: a7c5e0d93b12
+Create Date: 2026-10-18 00:21:37.508114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e6f1a8d574'
+down_revision: Union[str, Sequence[str], None] = 'a7c5e0d93b12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'usernames',
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('username'),
+    )
+    # before sharding every user lives in DATABASE_URL, which becomes
+    # the default shard that keeps the index
+    op.execute(
+        'INSERT INTO usernames (username, email) '
+        'SELECT username, email FROM users'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('usernames')
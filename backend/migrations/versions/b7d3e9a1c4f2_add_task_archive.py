@@ -0,0 +1,62 @@
+"""add archived_at to tasks and hot-set partial indexes
+
+Revision ID: b7d3e9a1c4f2
+Revises: a41e6f0b7c25
+Create Date: 2026-10-17 14:22:37.504117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e9a1c4f2'
+down_revision: Union[str, Sequence[str], None] = 'a41e6f0b7c25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+HOT_TASKS = sa.text('archived_at IS NULL')
+
+INDEXES = [
+    ('ix_tasks_user_email_id_task_hot', ['user_email', 'id_task']),
+    ('ix_tasks_done_updated_at_hot', ['done', 'updated_at']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'tasks', sa.Column('archived_at', sa.DateTime(), nullable=True)
+    )
+    op.add_column('filters', sa.Column('archived', sa.Boolean(), nullable=True))
+
+    # CONCURRENTLY cannot run inside a transaction block on Postgres
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(
+                name,
+                'tasks',
+                columns,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=HOT_TASKS,
+                sqlite_where=HOT_TASKS,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name='tasks',
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
+
+    op.drop_column('filters', 'archived')
+    op.drop_column('tasks', 'archived_at')
@@ -0,0 +1,169 @@
+"""optionally hash partition tasks and its association tables
+
+Opt-in, Postgres only. Nothing happens unless the partition count is
+passed explicitly:
+
+    alembic -x tasks_partitions=16 upgrade head
+
+tasks is partitioned by HASH (user_email) so every per-user query prunes
+to one partition. task_tag and task_workbench are partitioned by
+HASH (id_task): their rows carry no owner, and id_task is what selectin
+loads and association writes look up. Postgres cannot reference a
+partitioned table through a key that lacks the partition columns, so the
+association -> tasks foreign keys are dropped in partitioned mode.
+
+The tables are rebuilt and copied, which takes an exclusive lock for the
+duration; run it in a maintenance window.
+
+Revision ID: c3f8a2d6e915
+Revises: b7d3e9a1c4f2
+Create Date: 2026-10-17 16:03:51.771930
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8a2d6e915'
+down_revision: Union[str, Sequence[str], None] = 'b7d3e9a1c4f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TASK_COLUMNS = (
+    'id_task, user_email, title, description, done, reminder, '
+    'repetition, state, priority, updated_at, created_at, archived_at'
+)
+
+TASK_INDEXES = [
+    'CREATE INDEX ix_tasks_user_email_id_task ON tasks (user_email, id_task)',
+    'CREATE INDEX ix_tasks_user_email_done ON tasks (user_email, done)',
+    'CREATE INDEX ix_tasks_user_email_reminder ON tasks (user_email, reminder)',
+    'CREATE INDEX ix_tasks_user_email_priority ON tasks (user_email, priority)',
+    'CREATE INDEX ix_tasks_user_email_updated_at '
+    'ON tasks (user_email, updated_at)',
+    'CREATE INDEX ix_tasks_user_email_id_task_hot '
+    'ON tasks (user_email, id_task) WHERE archived_at IS NULL',
+    'CREATE INDEX ix_tasks_done_updated_at_hot '
+    'ON tasks (done, updated_at) WHERE archived_at IS NULL',
+    'CREATE INDEX ix_tasks_search_vector ON tasks USING GIN (search_vector)',
+    'CREATE INDEX ix_task_tag_id_tag_id_task ON task_tag (id_tag, id_task)',
+    'CREATE INDEX ix_task_workbench_id_workbench_id_task '
+    'ON task_workbench (id_workbench, id_task)',
+]
+
+
+def _partitions() -> int:
+    return int(context.get_x_argument(as_dictionary=True).get(
+        'tasks_partitions', 0
+    ))
+
+
+def _is_postgres() -> bool:
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def _is_partitioned() -> bool:
+    if context.is_offline_mode():
+        return _partitions() > 0
+
+    return bool(op.get_bind().exec_driver_sql(
+        "SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'tasks'"
+    ).scalar())
+
+
+def _create(table: str, partition_by: str | None, partitions: int) -> None:
+    clause = f' PARTITION BY HASH ({partition_by})' if partition_by else ''
+    op.execute(
+        f'CREATE TABLE {table}_new (LIKE {table} INCLUDING DEFAULTS '
+        f'INCLUDING GENERATED){clause}'
+    )
+    for remainder in range(partitions if partition_by else 0):
+        op.execute(
+            f'CREATE TABLE {table}_p{remainder} PARTITION OF {table}_new '
+            f'FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})'
+        )
+
+
+def _rebuild(partitions: int) -> None:
+    partitioned = partitions > 0
+
+    _create('tasks', 'user_email' if partitioned else None, partitions)
+    _create('task_tag', 'id_task' if partitioned else None, partitions)
+    _create('task_workbench', 'id_task' if partitioned else None, partitions)
+
+    op.execute(
+        f'INSERT INTO tasks_new ({TASK_COLUMNS}) '
+        f'SELECT {TASK_COLUMNS} FROM tasks'
+    )
+    op.execute('INSERT INTO task_tag_new SELECT * FROM task_tag')
+    op.execute('INSERT INTO task_workbench_new SELECT * FROM task_workbench')
+
+    # keep the id sequence alive when the old tasks table goes away
+    op.execute('ALTER SEQUENCE tasks_id_task_seq OWNED BY NONE')
+    op.execute('DROP TABLE task_tag, task_workbench, tasks')
+    for table in ('tasks', 'task_tag', 'task_workbench'):
+        op.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+    op.execute('ALTER SEQUENCE tasks_id_task_seq OWNED BY tasks.id_task')
+
+    tasks_key = 'user_email, id_task' if partitioned else 'id_task'
+    op.execute(
+        f'ALTER TABLE tasks ADD CONSTRAINT tasks_pkey PRIMARY KEY ({tasks_key})'
+    )
+    op.execute(
+        'ALTER TABLE task_tag ADD CONSTRAINT task_tag_pkey '
+        'PRIMARY KEY (id_task, id_tag)'
+    )
+    op.execute(
+        'ALTER TABLE task_workbench ADD CONSTRAINT task_workbench_pkey '
+        'PRIMARY KEY (id_task, id_workbench)'
+    )
+
+    op.execute(
+        'ALTER TABLE tasks ADD CONSTRAINT tasks_user_email_fkey '
+        'FOREIGN KEY (user_email) REFERENCES users (email)'
+    )
+    op.execute(
+        'ALTER TABLE task_tag ADD CONSTRAINT task_tag_id_tag_fkey '
+        'FOREIGN KEY (id_tag) REFERENCES tags (id_tag)'
+    )
+    op.execute(
+        'ALTER TABLE task_workbench ADD CONSTRAINT '
+        'task_workbench_id_workbench_fkey '
+        'FOREIGN KEY (id_workbench) REFERENCES workbenches (id_workbench)'
+    )
+    if not partitioned:
+        op.execute(
+            'ALTER TABLE task_tag ADD CONSTRAINT task_tag_id_task_fkey '
+            'FOREIGN KEY (id_task) REFERENCES tasks (id_task)'
+        )
+        op.execute(
+            'ALTER TABLE task_workbench ADD CONSTRAINT '
+            'task_workbench_id_task_fkey '
+            'FOREIGN KEY (id_task) REFERENCES tasks (id_task)'
+        )
+
+    for statement in TASK_INDEXES:
+        op.execute(statement)
+
+    for table in ('tasks', 'task_tag', 'task_workbench'):
+        op.execute(f'ANALYZE {table}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _is_postgres() or _partitions() <= 0:
+        return
+
+    _rebuild(_partitions())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not _is_postgres() or not _is_partitioned():
+        return
+
+    _rebuild(0)
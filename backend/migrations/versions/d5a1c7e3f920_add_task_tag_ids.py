@@ -0,0 +1,102 @@
+"""add denormalized tag_ids to tasks
+
+task_tag stays the source of truth; tag_ids is backfilled from it here
+and kept in step by the application.
+
+Revision ID: d5a1c7e3f920
+Revises: c3f8a2d6e915
+Create Date: 2026-10-17 17:41:09.218664
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a1c7e3f920'
+down_revision: Union[str, Sequence[str], None] = 'c3f8a2d6e915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+POSTGRESQL_UPGRADE = [
+    "ALTER TABLE tasks ADD COLUMN tag_ids integer[] NOT NULL DEFAULT '{}'",
+    "UPDATE tasks SET tag_ids = grouped.ids FROM ("
+    "SELECT id_task, array_agg(id_tag ORDER BY id_tag) AS ids "
+    "FROM task_tag GROUP BY id_task) AS grouped "
+    "WHERE tasks.id_task = grouped.id_task",
+]
+
+POSTGRESQL_INDEX = (
+    "CREATE INDEX{} IF NOT EXISTS ix_tasks_tag_ids "
+    "ON tasks USING GIN (tag_ids)"
+)
+
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_tasks_tag_ids",
+    "ALTER TABLE tasks DROP COLUMN tag_ids",
+]
+
+SQLITE_UPGRADE = [
+    "ALTER TABLE tasks ADD COLUMN tag_ids JSON NOT NULL DEFAULT '[]'",
+    "UPDATE tasks SET tag_ids = ("
+    "SELECT json_group_array(id_tag) FROM ("
+    "SELECT id_tag FROM task_tag WHERE task_tag.id_task = tasks.id_task "
+    "ORDER BY id_tag)) "
+    "WHERE id_task IN (SELECT id_task FROM task_tag)",
+]
+
+SQLITE_DOWNGRADE = [
+    "ALTER TABLE tasks DROP COLUMN tag_ids",
+]
+
+
+def _is_partitioned() -> bool:
+    if context.is_offline_mode():
+        return False
+
+    return bool(op.get_bind().exec_driver_sql(
+        "SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'tasks'"
+    ).scalar())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_context().dialect.name
+    if dialect == 'postgresql':
+        statements = POSTGRESQL_UPGRADE
+    elif dialect == 'sqlite':
+        statements = SQLITE_UPGRADE
+    else:
+        return
+
+    for statement in statements:
+        op.execute(statement)
+
+    if dialect != 'postgresql':
+        return
+
+    # partitioned parents (c3f8a2d6e915) cannot be indexed concurrently
+    if _is_partitioned():
+        op.execute(POSTGRESQL_INDEX.format(''))
+        return
+
+    # CONCURRENTLY cannot run inside a transaction block on Postgres
+    with op.get_context().autocommit_block():
+        op.execute(POSTGRESQL_INDEX.format(' CONCURRENTLY'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_context().dialect.name
+    if dialect == 'postgresql':
+        statements = POSTGRESQL_DOWNGRADE
+    elif dialect == 'sqlite':
+        statements = SQLITE_DOWNGRADE
+    else:
+        return
+
+    for statement in statements:
+        op.execute(statement)
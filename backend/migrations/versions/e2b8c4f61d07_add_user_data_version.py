@@ -0,0 +1,36 @@
+"""add a per-user data version for etags
+
+Revision ID: e2b8c4f61d07
+Revises: d5a1c7e3f920
+Create Date: 2026-10-17 19:05:42.118093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b8c4f61d07'
+down_revision: Union[str, Sequence[str], None] = 'd5a1c7e3f920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column(
+            'data_version',
+            sa.Integer(),
+            server_default=sa.text('0'),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'data_version')
@@ -0,0 +1,43 @@
+"""add revoked_tokens for token revocation
+
+Revision ID: f4a9d2c81b36
+Revises: e2b8c4f61d07
+Create Date: 2026-10-17 21:48:13.602714
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a9d2c81b36'
+down_revision: Union[str, Sequence[str], None] = 'e2b8c4f61d07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'revoked_tokens',
+        sa.Column('jti', sa.String(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column(
+            'created_at',
+            sa.DateTime(),
+            server_default=sa.text('(CURRENT_TIMESTAMP)'),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint('jti'),
+    )
+    op.create_index(
+        'ix_revoked_tokens_expires_at', 'revoked_tokens', ['expires_at']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_revoked_tokens_expires_at', table_name='revoked_tokens')
+    op.drop_table('revoked_tokens')
@@ -1,9 +1,10 @@
-from typing import Any
+from typing import Any, Iterator
 
+import freezegun
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from testcontainers.postgres import PostgresContainer
 
@@ -18,11 +19,17 @@ from joker_task.db.models import (
     Workbench,
     table_registry,
 )
+from joker_task.service.denylist import denylist
+from joker_task.service.principal import principal_cache
 from joker_task.service.security import (
     generate_access_token,
     get_hash_password,
 )
-from joker_task.settings import Settings
+from joker_task.settings import Settings, get_settings
+
+# frozen time would also jump the event loop clock and wake the app's
+# background jobs (archive_periodically) inside test client lifespans
+freezegun.configure(extend_ignore_list=['asyncio'])
 
 
 @pytest.fixture
@@ -30,6 +37,10 @@ def client(session):
     def get_session_override():
         return session
 
+    principal_cache.clear()
+    denylist.clear()
+    # a fresh database has no revocations to load
+    denylist.load([])
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
         yield client
@@ -56,6 +67,18 @@ async def session(engine):
         await conn.run_sync(table_registry.metadata.drop_all)
 
 
+@pytest.fixture
+def queries(engine) -> Iterator[list[str]]:
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, *args):  # noqa: PLR0913, PLR0917
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', record)
+    yield statements
+    event.remove(engine.sync_engine, 'before_cursor_execute', record)
+
+
 @pytest_asyncio.fixture
 async def users(session) -> list[dict[str, str]]:
     users = [
@@ -123,25 +146,13 @@ def auth_client_bob(client, users) -> TestClient:
 
 @pytest_asyncio.fixture
 async def tags(session: AsyncSession, users) -> list[dict[str, Any]]:
-    users_in_db = (
-        await session.scalars(select(User).order_by(User.email))
-    ).all()
-
-    tag_test_filters = Tag(
-        'test_filters', '#000000', users[0]['email'], users_in_db[0]
-    )
+    tag_test_filters = Tag('test_filters', '#000000', users[0]['email'])
 
-    tag_test_none = Tag(
-        'test_none', '#FFFFFF', users[0]['email'], users_in_db[0]
-    )
+    tag_test_none = Tag('test_none', '#FFFFFF', users[0]['email'])
 
-    tag_test_bob = Tag(
-        'test_bob', '#FF0000', users[1]['email'], users_in_db[1]
-    )
+    tag_test_bob = Tag('test_bob', '#FF0000', users[1]['email'])
 
-    tag_test_bob2 = Tag(
-        'test_bob2', '#FF0000', users[1]['email'], users_in_db[1]
-    )
+    tag_test_bob2 = Tag('test_bob2', '#FF0000', users[1]['email'])
 
     session.add(tag_test_filters)
     session.add(tag_test_none)
@@ -180,10 +191,6 @@ async def tags(session: AsyncSession, users) -> list[dict[str, Any]]:
 
 @pytest_asyncio.fixture
 async def workbenches(session: AsyncSession, users) -> list[dict[str, Any]]:
-    users_in_db = (
-        await session.scalars(select(User).order_by(User.email))
-    ).all()
-
     workbench1 = {
         'name': 'workbench1',
         'user_email': users[0]['email'],
@@ -208,19 +215,16 @@ async def workbenches(session: AsyncSession, users) -> list[dict[str, Any]]:
     workbench1_obj = Workbench(
         name=workbench1['name'],
         user_email=users[0]['email'],
-        user=users_in_db[0],
         columns=workbench1['columns'],
     )
     workbench2_obj = Workbench(
         name=workbench2['name'],
         user_email=users[0]['email'],
-        user=users_in_db[0],
         columns=workbench2['columns'],
     )
     workbench3_obj = Workbench(
         name=workbench3['name'],
         user_email=users[1]['email'],
-        user=users_in_db[1],
         columns=workbench3['columns'],
     )
     session.add(workbench1_obj)
@@ -233,10 +237,6 @@ async def workbenches(session: AsyncSession, users) -> list[dict[str, Any]]:
 
 @pytest_asyncio.fixture
 async def views(session: AsyncSession, users) -> list[dict[str, Any]]:
-    users_in_db = (
-        await session.scalars(select(User).order_by(User.email))
-    ).all()
-
     view1 = {
         'name': 'view1',
         'user_email': users[0]['email'],
@@ -263,22 +263,18 @@ async def views(session: AsyncSession, users) -> list[dict[str, Any]]:
     view1_obj = View(
         name=view1['name'],
         user_email=users[0]['email'],
-        user=users_in_db[0],
     )
     view2_obj = View(
         name=view2['name'],
         user_email=users[0]['email'],
-        user=users_in_db[0],
     )
     view3_obj = View(
         name=view_bob['name'],
         user_email=users[1]['email'],
-        user=users_in_db[1],
     )
     view4_obj = View(
         name=view_bob2['name'],
         user_email=users[1]['email'],
-        user=users_in_db[1],
     )
 
     session.add(view1_obj)
@@ -316,10 +312,6 @@ async def filters(session: AsyncSession, users, views) -> list[dict[str, Any]]:
 async def tasks(
     session: AsyncSession, users, tags, workbenches
 ) -> list[dict[str, Any]]:
-    users_in_db = (
-        await session.scalars(select(User).order_by(User.email))
-    ).all()
-
     (
         tag_test_filters,
         tag_test_none,
@@ -380,7 +372,6 @@ async def tasks(
 
     task1 = Task(
         user_email=list_task[0]['user_email'],
-        user=users_in_db[0],
         title=list_task[0]['title'],
         description=list_task[0]['description'],
         done=list_task[0]['done'],
@@ -393,7 +384,6 @@ async def tasks(
     )
     task2 = Task(
         user_email=list_task[1]['user_email'],
-        user=users_in_db[0],
         title=list_task[1]['title'],
         done=list_task[1]['done'],
         tags=list_task[1]['tags'],
@@ -406,7 +396,6 @@ async def tasks(
     )
     task3 = Task(
         user_email=list_task[2]['user_email'],
-        user=users_in_db[0],
         title=list_task[2]['title'],
         done=list_task[2]['done'],
         tags=list_task[2]['tags'],
@@ -419,7 +408,6 @@ async def tasks(
     )
     task4 = Task(
         user_email=list_task[3]['user_email'],
-        user=users_in_db[1],
         title=list_task[3]['title'],
         done=list_task[3]['done'],
         tags=[],
@@ -431,14 +419,13 @@ async def tasks(
         description=None,
     )
 
-    session.add(task1)
-    session.add(task2)
-    session.add(task3)
-    session.add(task4)
+    for task in (task1, task2, task3, task4):
+        task.tag_ids = sorted(tag.id_tag for tag in task.tags)
+        session.add(task)
     await session.commit()
     return list_task
 
 
 @pytest.fixture
 def settings() -> Settings:
-    return Settings()  # type: ignore
+    return get_settings().model_copy()
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from joker_task.db.models import Task
+from joker_task.service.archive_service import ArchiveService
+
+LONG_AGO = datetime(2020, 1, 1)
+
+
+async def finish(session: AsyncSession, *ids: int, at=LONG_AGO) -> None:
+    await session.execute(
+        update(Task)
+        .where(Task.id_task.in_(ids))
+        .values(done=True, updated_at=at)
+    )
+    await session.commit()
+
+
+async def archive(session: AsyncSession, batch_size: int = 1000) -> int:
+    archived = await ArchiveService(session).archive_done_tasks(
+        timedelta(days=30), batch_size
+    )
+    session.expire_all()
+    return archived
+
+
+def task_ids(client: TestClient, **params) -> list[int]:
+    rsp = client.get('/tasks/', params=params)
+    assert rsp.status_code == HTTPStatus.OK
+    return [task['id_task'] for task in rsp.json()['responses']]
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_only_old_done_tasks(session: AsyncSession, tasks):
+    await finish(session, 2, 3)
+    await finish(session, 1, at=datetime.now())
+
+    assert await archive(session, batch_size=1) == 2  # noqa: PLR2004
+
+    archived = await session.scalars(
+        select(Task.id_task)
+        .where(Task.archived_at.is_not(None))
+        .order_by(Task.id_task)
+    )
+    assert archived.all() == [2, 3]
+    assert await archive(session) == 0
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_reads_hot_set_by_default(
+    auth_client_alice: TestClient, session: AsyncSession, tasks
+):
+    await finish(session, 3)
+    await archive(session)
+
+    assert task_ids(auth_client_alice) == [1, 2]
+    assert task_ids(auth_client_alice, archived=True) == [3]
+    assert task_ids(auth_client_alice, done=True) == [3]
+    assert task_ids(auth_client_alice, done=True, archived=False) == []
+
+
+@pytest.mark.asyncio
+async def test_count_and_workbench_skip_archived_tasks(
+    auth_client_alice: TestClient, session: AsyncSession, tasks
+):
+    await finish(session, 3)
+    await archive(session)
+
+    rsp = auth_client_alice.get('/tasks/', params={'with_count': True})
+    assert rsp.json()['total'] == 2  # noqa: PLR2004
+
+    rsp = auth_client_alice.get('/workbenches/1')
+    assert [task['id_task'] for task in rsp.json()['tasks']] == [2]
+
+
+@pytest.mark.asyncio
+async def test_restore_task(
+    auth_client_alice: TestClient, session: AsyncSession, tasks
+):
+    await finish(session, 3)
+    await archive(session)
+
+    rsp = auth_client_alice.post('/tasks/3/restore')
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.json()['archived_at'] is None
+    assert task_ids(auth_client_alice) == [1, 2, 3]
+
+
+def test_restore_task_not_found(auth_client_alice: TestClient, tasks):
+    rsp = auth_client_alice.post('/tasks/4/restore')
+
+    assert rsp.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_search_reads_hot_set_by_default(
+    auth_client_alice: TestClient, session: AsyncSession, tasks
+):
+    await finish(session, 3)
+    await archive(session)
+
+    def found(**params) -> list[int]:
+        rsp = auth_client_alice.get('/tasks/search', params=params)
+        return [
+            result['task']['id_task'] for result in rsp.json()['responses']
+        ]
+
+    assert found(q='title') == []
+    assert found(q='title', archived=True) == [3]
+
+
+@pytest.mark.asyncio
+async def test_reopening_a_task_restores_it(
+    auth_client_alice: TestClient, session: AsyncSession, tasks
+):
+    await finish(session, 2, 3)
+    await archive(session)
+
+    rsp = auth_client_alice.patch('/tasks/3', json={'done': False})
+
+    assert rsp.json()['archived_at'] is None
+    assert task_ids(auth_client_alice) == [1, 3]
+
+    rsp = auth_client_alice.patch(
+        '/tasks/?done=true&archived=true', json={'done': False}
+    )
+
+    assert rsp.json() == {'affected': 1}
+    assert task_ids(auth_client_alice) == [1, 2, 3]
@@ -4,6 +4,8 @@ from http import HTTPStatus
 from fastapi.testclient import TestClient
 from freezegun import freeze_time
 
+from joker_task.service.denylist import denylist
+
 
 def test_create_user(client: TestClient):
     rsp = client.post(
@@ -97,6 +99,33 @@ def test_logout(auth_client_alice: TestClient):
     assert rsp.cookies.get('refresh_token') is None
 
 
+def test_logout_revokes_tokens(auth_client_alice: TestClient):
+    cookies = dict(auth_client_alice.cookies)
+    auth_client_alice.post('/logout/')
+
+    rsp = auth_client_alice.get('/tags/', cookies=cookies)
+    assert rsp.status_code == HTTPStatus.UNAUTHORIZED
+    assert rsp.json()['detail'] == 'invalid access token'
+
+    rsp = auth_client_alice.post('/refresh/', cookies=cookies)
+    assert rsp.status_code == HTTPStatus.UNAUTHORIZED
+    assert rsp.json()['detail'] == 'invalid refresh token'
+
+
+def test_logout_revokes_tokens_on_other_workers(
+    auth_client_alice: TestClient,
+):
+    cookies = dict(auth_client_alice.cookies)
+    auth_client_alice.post('/logout/')
+
+    # a worker that has not loaded the revocation yet asks the table
+    denylist.clear()
+    rsp = auth_client_alice.post('/refresh/', cookies=cookies)
+
+    assert rsp.status_code == HTTPStatus.UNAUTHORIZED
+    assert denylist.stats()['lookups'] == 1
+
+
 def test_update_user(auth_client_alice: TestClient):
     rsp = auth_client_alice.put(
         '/update_user/',
@@ -111,6 +140,20 @@ def test_update_user(auth_client_alice: TestClient):
     assert 'password' not in data
 
 
+def test_update_user_refreshes_cached_principal(
+    auth_client_alice: TestClient,
+):
+    for _ in range(2):
+        rsp = auth_client_alice.put(
+            '/update_user/',
+            json={'username': 'alice2', 'password': 'secret'},
+        )
+
+        # a stale principal would still be named alice and find its own
+        # row as a conflict
+        assert rsp.status_code == HTTPStatus.OK
+
+
 def test_update_user_conflict(auth_client_bob: TestClient):
     rsp = auth_client_bob.put(
         '/update_user/',
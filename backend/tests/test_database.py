@@ -0,0 +1,136 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from joker_task.app import app
+from joker_task.db import database
+from joker_task.db.database import engine_options, warm_pool
+from joker_task.db.pool import (
+    InstrumentedPool,
+    instrument,
+    pool_metrics,
+    pool_status,
+)
+from joker_task.settings import get_settings
+
+
+def test_engine_options_for_sqlite(settings):
+    settings.DATABASE_URL = 'sqlite+aiosqlite:///:memory:'
+
+    options = engine_options(settings)
+
+    assert 'pool_size' not in options
+    assert options['pool_pre_ping'] is settings.DB_POOL_PRE_PING
+
+
+def test_engine_options_for_asyncpg(settings):
+    settings.DATABASE_URL = 'postgresql+asyncpg://user:secret@db/joker'
+    settings.DB_POOL_SIZE = 7
+
+    options = engine_options(settings)
+
+    assert options['poolclass'] is InstrumentedPool
+    assert options['pool_size'] == 7  # noqa: PLR2004
+    assert options['connect_args'] == {
+        'prepared_statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE
+    }
+
+
+def test_engine_options_disables_psycopg_prepare(settings):
+    settings.DATABASE_URL = 'postgresql+psycopg://user:secret@db/joker'
+    settings.DB_STATEMENT_CACHE_SIZE = 0
+
+    options = engine_options(settings)
+
+    assert options['connect_args'] == {'prepare_threshold': None}
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_track_wait_checkout_and_timeouts(tmp_path):
+    engine = create_async_engine(
+        f'sqlite+aiosqlite:///{tmp_path / "pool.db"}',
+        poolclass=InstrumentedPool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    metrics = instrument(engine)
+
+    await warm_pool(engine, 1)
+
+    async with engine.connect():
+        with pytest.raises(TimeoutError):
+            async with engine.connect():
+                pass  # pragma: no cover
+
+    status = pool_status(engine)
+    await engine.dispose()
+    await warm_pool(engine, 1)
+
+    assert status['connects'] == 1
+    assert status['checkouts'] == status['checkins'] == 2  # noqa: PLR2004
+    assert status['timeouts'] == 1
+    assert status['in_use'] == 0
+    assert status['wait_max_ms'] >= 50  # noqa: PLR2004
+    assert status['size'] == 1
+    assert pool_metrics(engine) is metrics
+    assert metrics.connects == 2  # noqa: PLR2004
+    assert metrics.timeouts == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_are_kept_per_engine(tmp_path):
+    engines = [
+        create_async_engine(f'sqlite+aiosqlite:///{tmp_path / f"{n}.db"}')
+        for n in range(2)
+    ]
+    for engine in engines:
+        instrument(engine)
+
+    await warm_pool(engines[0], 1)
+    await warm_pool(engines[0], 1)
+    for engine in engines:
+        await engine.dispose()
+
+    assert pool_status(engines[0])['checkouts'] == 2  # noqa: PLR2004
+    assert pool_status(engines[1])['checkouts'] == 0
+
+
+def test_get_metrics(client):
+    rsp = client.get('/metrics/')
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert {
+        'pools',
+        'filter_cache',
+        'passwords',
+        'principals',
+        'tokens',
+        'denylist',
+    } <= set(rsp.json())
+    assert set(rsp.json()['pools']) == set(database.named_engines())
+    assert 'checkouts' in rsp.json()['pools']['default']
+
+
+@pytest.mark.parametrize(
+    ('token', 'prod', 'header', 'status'),
+    [
+        ('secret', False, None, HTTPStatus.UNAUTHORIZED),
+        ('secret', False, 'wrong', HTTPStatus.UNAUTHORIZED),
+        ('secret', True, 'secret', HTTPStatus.OK),
+        ('', True, None, HTTPStatus.NOT_FOUND),
+    ],
+)
+def test_get_metrics_is_gated(  # noqa: PLR0913, PLR0917
+    client, settings, token, prod, header, status
+):
+    settings.METRICS_TOKEN = token
+    settings.PROD = prod
+    app.dependency_overrides[get_settings] = lambda: settings
+
+    headers = {'X-Metrics-Token': header} if header else {}
+    rsp = client.get('/metrics/', headers=headers)
+
+    assert rsp.status_code == status
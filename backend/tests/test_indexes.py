@@ -0,0 +1,91 @@
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Select, func, select, text, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from joker_task.db.models import (
+    Filter,
+    Tag,
+    Task,
+    User,
+    View,
+    Workbench,
+    task_tag,
+    task_workbench,
+)
+from joker_task.schemas import FilterSchema
+from joker_task.service.task_collector import TaskCollector
+
+EMAIL = 'alice@example.com'
+USER = User(EMAIL, 'alice', 'secret')
+
+
+async def explain(session: AsyncSession, statement: Select) -> str:
+    dialect = session.get_bind().dialect
+    sql = statement.compile(
+        dialect=dialect, compile_kwargs={'literal_binds': True}
+    )
+
+    if dialect.name == 'postgresql':
+        # tiny test tables are cheaper to scan, so force the planner to
+        # show whether an index path exists at all
+        await session.execute(text('SET LOCAL enable_seqscan = off'))
+        rows = await session.execute(text(f'EXPLAIN {sql}'))
+    else:
+        rows = await session.execute(text(f'EXPLAIN QUERY PLAN {sql}'))
+
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def full_scans(plan: str) -> list[str]:
+    # json_each over one row's tag_ids shows up as a virtual table scan
+    return re.findall(
+        r'Seq Scan on \w+|^SCAN \w+\b(?! VIRTUAL TABLE)', plan, re.MULTILINE
+    )
+
+
+def collector_query(session: AsyncSession, **filters) -> Select:
+    return TaskCollector(session).make_filter_query(
+        USER, FilterSchema(**filters)
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'build',
+    [
+        lambda session: collector_query(session).order_by(Task.id_task),
+        lambda session: collector_query(session, done=True),
+        lambda session: collector_query(
+            session, reminder=(datetime(2026, 1, 1), datetime(2026, 2, 1))
+        ),
+        lambda session: collector_query(session, priority=(10, 50)),
+        lambda session: collector_query(session, tags=['a', 'b']),
+        lambda session: collector_query(session, tags_any=['a']),
+        lambda session: collector_query(session, archived=True),
+        lambda session: select(Task.id_task).where(
+            Task.done == true(),
+            Task.archived_at.is_(None),
+            Task.updated_at < datetime(2026, 1, 1),
+        ),
+        lambda session: select(func.max(Task.updated_at)).where(
+            Task.user_email == EMAIL
+        ),
+        lambda session: select(Tag).where(Tag.user_email == EMAIL),
+        lambda session: select(Workbench).where(Workbench.user_email == EMAIL),
+        lambda session: select(View).where(View.user_email == EMAIL),
+        lambda session: select(Filter).where(Filter.id_view == 1),
+        lambda session: select(task_tag.c.id_task).where(
+            task_tag.c.id_tag == 1
+        ),
+        lambda session: select(task_workbench.c.id_task).where(
+            task_workbench.c.id_workbench == 1
+        ),
+    ],
+)
+async def test_per_user_queries_use_indexes(session: AsyncSession, build):
+    plan = await explain(session, build(session))
+
+    assert full_scans(plan) == [], plan
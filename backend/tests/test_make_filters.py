@@ -1,6 +1,19 @@
 import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
 
-from joker_task.service.make_filters import factory_make_filter
+from joker_task.db.models import Tag, Task
+from joker_task.schemas import (
+    LOGIC_WITH_ANY_TAGS,
+    LOGIC_WITH_TAGS,
+    LOGIC_WITHOUT_TAGS,
+)
+from joker_task.service.filter_cache import FilterQueryCache
+from joker_task.service.make_filters import (
+    TAGS_INTERSECT_THRESHOLD,
+    FilterWithTags,
+    factory_make_filter,
+)
 
 
 def test_factory_make_filters_type_error():
@@ -13,3 +26,65 @@ def test_factory_make_filters_value_error():
         ValueError, match='value not found in dict_type_strategy'
     ):
         factory_make_filter('unknown_type')
+
+
+def test_filter_with_tags_picks_strategy_by_tag_count():
+    make_filter = FilterWithTags()
+    few = ['a'] * TAGS_INTERSECT_THRESHOLD
+    many = ['a'] * (TAGS_INTERSECT_THRESHOLD + 1)
+
+    few_sql = str(make_filter.make(select(Task), few, 'tags'))
+    many_sql = str(make_filter.make(select(Task), many, 'tags'))
+
+    assert 'INTERSECT' in few_sql
+    assert 'EXISTS' not in few_sql
+    assert many_sql.count('EXISTS') == len(many)
+    assert 'GROUP BY' not in few_sql + many_sql
+    assert make_filter.bind(many, 'tags') == {
+        f'filter_tags_{index}': 'a' for index in range(len(many))
+    }
+
+
+@pytest.mark.parametrize(
+    ('logic', 'postgresql_sql', 'sqlite_sql'),
+    [
+        (LOGIC_WITH_TAGS, 'tasks.tag_ids @> ARRAY[', 'INTERSECT'),
+        (LOGIC_WITH_ANY_TAGS, 'tasks.tag_ids && ARRAY(', 'EXISTS'),
+        (LOGIC_WITHOUT_TAGS, 'NOT (tasks.tag_ids && ARRAY(', 'NOT (EXISTS'),
+    ],
+)
+def test_tag_filters_pick_strategy_by_dialect(
+    logic, postgresql_sql, sqlite_sql
+):
+    make_filter = factory_make_filter(logic)
+    statement = make_filter.make(select(Task), ['a', 'b'], 'tags')
+
+    on_postgresql = str(statement.compile(dialect=postgresql.dialect()))
+    on_sqlite = str(statement.compile(dialect=sqlite.dialect()))
+
+    assert postgresql_sql in on_postgresql
+    assert 'task_tag' not in on_postgresql
+    assert sqlite_sql in on_sqlite
+    assert 'task_tag' in on_sqlite
+    assert 'json_each' not in on_sqlite
+
+
+def test_filter_query_cache_counts_hits_and_misses():
+    cache = FilterQueryCache(maxsize=1)
+    statement = select(Task)
+
+    assert cache.get_or_build('a', lambda: statement) is statement
+    assert cache.get_or_build('a', lambda: select(Tag)) is statement
+    assert cache.get_or_build('b', lambda: select(Tag)) is not statement
+    assert cache.get_or_build('a', lambda: statement) is statement
+    assert cache.stats() == {'hits': 1, 'misses': 3, 'size': 1, 'maxsize': 1}
+
+
+def test_filter_query_cache_disabled():
+    cache = FilterQueryCache(maxsize=0)
+
+    cache.get_or_build('a', lambda: select(Task))
+    cache.get_or_build('a', lambda: select(Task))
+
+    assert cache.stats()['misses'] == 2  # noqa: PLR2004
+    assert cache.stats()['size'] == 0
@@ -0,0 +1,150 @@
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import Connection, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import joker_task
+from joker_task.db.models import Tag, Task, User
+from joker_task.schemas import FilterSchema
+from joker_task.service.task_collector import TaskCollector
+
+MIGRATIONS = Path(__file__).parents[1] / 'migrations/versions'
+PARTITIONING = MIGRATIONS / 'c3f8a2d6e915_hash_partition_tasks.py'
+TAG_IDS = MIGRATIONS / 'd5a1c7e3f920_add_task_tag_ids.py'
+PARTITIONS = 4
+
+PARTITIONED_IDENTITY = """
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from joker_task.db.models import Task, User, table_registry
+
+engine = create_engine('sqlite://')
+table_registry.metadata.create_all(engine)
+statements = []
+event.listen(
+    engine, 'before_cursor_execute', lambda *args: statements.append(args[2])
+)
+
+with Session(engine, expire_on_commit=False) as session:
+    user = User('alice@example.com', 'alice', 'secret')
+    task = Task(
+        user_email=user.email, title='t', description=None,
+        done=False, tags=[], workbenches=[], reminder=None,
+        repetition=None, state=None,
+    )
+    session.add_all([user, task])
+    session.commit()
+    session.expunge_all()
+
+    task = session.get(Task, (task.id_task, user.email))
+    task.title = 'renamed'
+    session.commit()
+
+print(statements[-1])
+"""
+
+
+def load(path: Path) -> Any:
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    migration = importlib.util.module_from_spec(spec)  # type: ignore
+    spec.loader.exec_module(migration)  # type: ignore
+    return migration
+
+
+def partition(connection: Connection) -> None:
+    partitioning, tag_ids = load(PARTITIONING), load(TAG_IDS)
+
+    # the schema comes from the models, so replay the real revision
+    # order: tag_ids is added after tasks is partitioned
+    with Operations.context(MigrationContext.configure(connection)) as op:
+        for statement in tag_ids.POSTGRESQL_DOWNGRADE:
+            op.execute(statement)
+        partitioning._rebuild(PARTITIONS)
+        for statement in tag_ids.POSTGRESQL_UPGRADE:
+            op.execute(statement)
+        op.execute(tag_ids.POSTGRESQL_INDEX.format(''))
+
+
+@pytest.mark.asyncio
+async def test_partitioned_tasks_prune_to_one_partition(
+    session: AsyncSession, tasks
+):
+    if session.get_bind().dialect.name != 'postgresql':
+        pytest.skip('hash partitioning is postgres only')
+
+    connection = await session.connection()
+    await connection.run_sync(partition)
+    await session.commit()
+    user = User('alice@example.com', 'alice', 'secret')
+
+    statement = TaskCollector(session).make_filter_query(
+        user, FilterSchema(done=True)
+    )
+    sql = statement.compile(
+        dialect=session.get_bind().dialect,
+        compile_kwargs={'literal_binds': True},
+    )
+    plan = '\n'.join(
+        row[0] for row in await session.execute(text(f'EXPLAIN {sql}'))
+    )
+
+    assert len(set(re.findall(r'on (tasks_p\d+)', plan))) == 1, plan
+
+    session.add(
+        Task(
+            user_email=user.email,
+            title='after partitioning',
+            description=None,
+            done=False,
+            tags=[Tag('partitioned', None, user.email)],
+            workbenches=[],
+            reminder=None,
+            repetition=None,
+            state=None,
+        )
+    )
+    await session.commit()
+
+    titles = await session.scalars(
+        select(Task.title)
+        .where(Task.user_email == user.email)
+        .order_by(Task.id_task)
+    )
+    assert titles.all()[-1] == 'after partitioning'
+
+
+@pytest.mark.asyncio
+async def test_task_identity_is_the_table_key_by_default(
+    session: AsyncSession, tasks
+):
+    assert [column.name for column in inspect(Task).primary_key] == ['id_task']
+
+    task = await session.get(Task, tasks[0]['id_task'])
+
+    assert task is not None
+    assert task.title == tasks[0]['title']
+
+
+def test_partitioned_task_identity_includes_owner():
+    result = subprocess.run(
+        [sys.executable, '-c', PARTITIONED_IDENTITY],
+        env={**os.environ, 'TASKS_PARTITIONED': 'true'},
+        cwd=Path(joker_task.__file__).parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    update = result.stdout.strip()
+    assert update.startswith('UPDATE tasks SET title=')
+    assert 'WHERE tasks.id_task = ? AND tasks.user_email = ?' in update
@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+
+WRITES = [
+    ('post', '/tasks/', {'title': 'new', 'tags': [{'name': 'fresh'}]}),
+    (
+        'patch',
+        '/tasks/1',
+        {'title': 'renamed', 'tags_add': [{'name': 'other'}]},
+    ),
+    ('post', '/tags/', [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}]),
+    ('patch', '/tags/1', {'color_hex': '#123456'}),
+    ('post', '/workbenches/', {'name': 'board', 'columns': ['todo']}),
+    ('patch', '/workbenches/1', {'columns_add': ['doing']}),
+    ('post', '/views/', {'name': 'mine', 'filters': [{'title': 'x'}]}),
+    ('put', '/views/1', {'name': 'renamed'}),
+    ('post', '/views/1/filters', {'title': 'y'}),
+    ('patch', '/views/1/filters/1', {'title': 'z'}),
+    ('put', '/update_user/', {'username': 'alice2', 'password': 'secret'}),
+]
+
+
+ASSOCIATIONS = ('INSERT INTO task_tag', 'INSERT INTO task_workbench')
+VERSION_BUMP = 'UPDATE users SET data_version='
+
+
+def is_write(query: str) -> bool:
+    return query.startswith(('INSERT', 'UPDATE'))
+
+
+def is_row_write(query: str) -> bool:
+    return is_write(query) and not query.startswith((
+        *ASSOCIATIONS,
+        VERSION_BUMP,
+    ))
+
+
+@pytest.mark.parametrize(('method', 'url', 'body'), WRITES)
+def test_write_returns_generated_columns_without_reloading(  # noqa: PLR0913, PLR0917
+    auth_client_alice: TestClient,
+    tasks,
+    filters,
+    queries: list[str],
+    method: str,
+    url: str,
+    body,
+):
+    queries.clear()
+
+    rsp = auth_client_alice.request(method, url, json=body)
+
+    assert rsp.status_code in {HTTPStatus.OK, HTTPStatus.CREATED}, rsp.text
+    data = rsp.json()
+    for item in data if isinstance(data, list) else [data]:
+        assert all(
+            item[key] for key in ('created_at', 'updated_at') if key in item
+        )
+
+    last_write = max(i for i, query in enumerate(queries) if is_write(query))
+    assert not [q for q in queries[last_write:] if q.startswith('SELECT')]
+    assert all(
+        'RETURNING' in query for query in queries if is_row_write(query)
+    )
+
+
+def test_create_user_returns_generated_columns(
+    client: TestClient, queries: list[str]
+):
+    queries.clear()
+
+    rsp = client.post(
+        '/users/',
+        json={'email': 'new@example.com', 'username': 'new', 'password': 'x'},
+    )
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert queries[-1].startswith('INSERT INTO users')
+    assert 'RETURNING' in queries[-1]
@@ -0,0 +1,127 @@
+import time
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from fastapi import Request, Response
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from joker_task.app import app
+from joker_task.db import database
+from joker_task.db.models import Tag, User, table_registry
+from joker_task.db.routing import PRIMARY_COOKIE, ReplicaRouter, sticky_owner
+from joker_task.service.security import generate_access_token
+from joker_task.settings import Settings
+
+EMAIL = 'alice@example.com'
+
+
+async def seed(url: str, tag_name: str):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    async with AsyncSession(engine) as session:
+        user = User(EMAIL, 'alice', 'secret')
+        session.add(user)
+        session.add(Tag(tag_name, '#000000', EMAIL))
+        await session.commit()
+
+    return engine
+
+
+@pytest_asyncio.fixture
+async def replica_router(tmp_path, monkeypatch):
+    primary = await seed(f'sqlite+aiosqlite:///{tmp_path / "p.db"}', 'main')
+    replica = await seed(f'sqlite+aiosqlite:///{tmp_path / "r.db"}', 'copy')
+
+    router = ReplicaRouter(primary, [replica], sticky_seconds=60)
+    monkeypatch.setattr(database, 'router', router)
+    yield router
+
+    await router.dispose()
+
+
+@pytest.fixture
+def routed_client(replica_router):
+    app.dependency_overrides.clear()
+    with TestClient(app) as client:
+        client.cookies.set(
+            'access_token', generate_access_token({'sub': EMAIL})
+        )
+        yield client
+
+
+def tag_names(client: TestClient) -> list[str]:
+    rsp = client.get('/tags/')
+    assert rsp.status_code == HTTPStatus.OK
+    return [tag['name'] for tag in rsp.json()]
+
+
+def test_reads_go_to_replica(routed_client: TestClient):
+    assert tag_names(routed_client) == ['copy']
+    assert PRIMARY_COOKIE not in routed_client.cookies
+
+
+def test_reads_after_write_stick_to_primary(routed_client: TestClient):
+    rsp = routed_client.post(
+        '/tags/', json=[{'name': 'fresh', 'color_hex': '#FFFFFF'}]
+    )
+
+    assert rsp.status_code == HTTPStatus.CREATED
+    assert PRIMARY_COOKIE in rsp.cookies
+    assert tag_names(routed_client) == ['fresh', 'main']
+
+    routed_client.cookies.delete(PRIMARY_COOKIE)
+
+    assert tag_names(routed_client) == ['copy']
+
+
+def test_expired_stickiness_reads_replica(routed_client: TestClient):
+    routed_client.cookies.set(PRIMARY_COOKIE, f'1.0:{sticky_owner(EMAIL)}')
+
+    assert tag_names(routed_client) == ['copy']
+
+
+def test_stickiness_of_another_user_reads_replica(routed_client: TestClient):
+    until = time.time() + 60
+    routed_client.cookies.set(
+        PRIMARY_COOKIE, f'{until}:{sticky_owner("bob@example.com")}'
+    )
+
+    assert tag_names(routed_client) == ['copy']
+
+
+@pytest.mark.parametrize(
+    ('method', 'url'),
+    [('patch', '/tags/999'), ('post', '/logout/')],
+)
+def test_requests_that_write_no_user_data_do_not_stick(
+    routed_client: TestClient, method: str, url: str
+):
+    rsp = routed_client.request(method, url, json={'name': 'x'})
+
+    assert PRIMARY_COOKIE not in rsp.cookies
+
+
+def test_without_replicas_everything_uses_primary(replica_router):
+    router = ReplicaRouter(replica_router.primary, [], sticky_seconds=60)
+    request = Request({'type': 'http', 'method': 'GET', 'headers': []})
+    response = Response()
+
+    router.mark_write(request, response, EMAIL)
+
+    assert router.engine_for(request, EMAIL) is replica_router.primary
+    assert 'set-cookie' not in response.headers
+
+
+def test_replica_urls_from_comma_separated_env(monkeypatch):
+    monkeypatch.setenv(
+        'DATABASE_REPLICA_URLS', 'sqlite:///a.db, sqlite:///b.db'
+    )
+
+    assert Settings().DATABASE_REPLICA_URLS == [  # type: ignore
+        'sqlite:///a.db',
+        'sqlite:///b.db',
+    ]
@@ -1,20 +1,285 @@
+import asyncio
+import threading
+import time
 from datetime import datetime, timedelta
 from http import HTTPStatus
+from zoneinfo import ZoneInfo
 
+import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from freezegun import freeze_time
-from jwt import encode
-
+from jwt import ExpiredSignatureError, encode
+from sqlalchemy import event, select
+
+from joker_task.db.models import RevokedToken
+from joker_task.service.denylist import BloomFilter, Denylist, denylist
+from joker_task.service.password_pool import PasswordPool, password_pool
+from joker_task.service.principal import (
+    Principal,
+    PrincipalCache,
+    principal_cache,
+)
 from joker_task.service.security import (
+    check_password,
+    decode_token,
+    generate_access_token,
     get_hash_password,
+    hash_password,
+    load_revocations,
+    prune_revocations,
     verify_password,
 )
+from joker_task.service.token_cache import TokenCache, token_cache
+from joker_task.settings import get_settings
 
 
 def test_get_and_verify_password():
     assert verify_password('oi', get_hash_password('oi'))
 
 
+@pytest.mark.asyncio
+async def test_hash_and_check_password_in_pool():
+    completed = password_pool.completed
+
+    hashed = await hash_password('oi')
+
+    assert await check_password('oi', hashed)
+    assert not await check_password('tchau', hashed)
+    assert password_pool.completed == completed + 3
+    assert password_pool.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_password_pool_keeps_event_loop_free():
+    pool = PasswordPool(workers=1, queue_limit=0)
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    await pool.run(time.sleep, 0.2)
+    ticker.cancel()
+
+    assert ticks >= 10  # noqa: PLR2004
+    assert pool.stats()['run_max_ms'] >= 200  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_password_pool_rejects_past_queue_limit():
+    pool = PasswordPool(workers=1, queue_limit=1)
+    release = threading.Event()
+
+    running = [asyncio.create_task(pool.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(HTTPException) as error:
+        await pool.run(release.wait)
+    release.set()
+    await asyncio.gather(*running)
+
+    assert error.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert pool.stats()['rejected'] == 1
+    assert pool.stats()['pending_max'] == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_password_pool_counts_work_of_cancelled_callers():
+    pool = PasswordPool(workers=1, queue_limit=0)
+    release = threading.Event()
+
+    caller = asyncio.create_task(pool.run(release.wait))
+    await asyncio.sleep(0.05)
+    caller.cancel()
+    await asyncio.sleep(0)
+
+    assert pool.pending == 1
+    with pytest.raises(HTTPException):
+        await pool.run(release.wait)
+
+    release.set()
+    pool.shutdown()
+    assert pool.pending == 0
+    assert pool.completed == 1
+
+
+def test_principal_cache_expires_and_evicts():
+    cache = PrincipalCache(maxsize=2, ttl=60)
+    alice = Principal('alice@example.com', 'alice')
+    bob = Principal('bob@example.com', 'bob')
+
+    with freeze_time('2026-01-01 00:00:00') as frozen:
+        cache.put(alice, 0.002)
+        cache.put(bob, 0.002)
+        assert cache.get(alice.email) == alice
+        cache.put(Principal('carol@example.com', 'carol'), 0.002)
+
+        assert cache.get(bob.email) is None
+        frozen.tick(61)
+        assert cache.get(alice.email) is None
+
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2  # noqa: PLR2004
+    assert cache.stats()['size'] == 1
+
+
+def test_get_user_serves_cached_principal(
+    auth_client_alice: TestClient, engine
+):
+    statements = []
+
+    def count(conn, cursor, statement, *args):  # noqa: PLR0913, PLR0917
+        statements.append(statement)
+
+    auth_client_alice.get('/tags/')
+    event.listen(engine.sync_engine, 'before_cursor_execute', count)
+    rsp = auth_client_alice.get('/tags/')
+    event.remove(engine.sync_engine, 'before_cursor_execute', count)
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert not [s for s in statements if 'users.username' in s]
+    assert principal_cache.stats()['hits'] == 1
+    assert principal_cache.stats()['misses'] == 1
+
+
+def test_stateless_principal_comes_from_the_token(
+    client: TestClient, users, engine, monkeypatch
+):
+    monkeypatch.setattr(get_settings(), 'STATELESS_PRINCIPAL', True)
+    client.post(
+        '/login/',
+        data={'username': users[0]['email'], 'password': users[0]['password']},
+    )
+    statements = []
+
+    def count(conn, cursor, statement, *args):  # noqa: PLR0913, PLR0917
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', count)
+    rsp = client.get('/tasks/', params={'limit': 10})
+    event.remove(engine.sync_engine, 'before_cursor_execute', count)
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert not [s for s in statements if 'users.username' in s]
+    assert not [s for s in statements if 'revoked_tokens' in s]
+    assert principal_cache.stats()['misses'] == 0
+
+
+def test_access_token_has_no_username_by_default():
+    token = generate_access_token({
+        'sub': 'alice@example.com',
+        'username': 'a',
+    })
+
+    assert 'username' not in decode_token(token, get_settings())
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    for index in range(1000):
+        bloom.add(f'revoked-{index}')
+
+    assert all(f'revoked-{index}' in bloom for index in range(1000))
+    false_positives = sum(f'live-{index}' in bloom for index in range(10000))
+    assert false_positives < 300  # noqa: PLR2004
+
+
+def test_denylist_asks_the_table_only_on_filter_hits():
+    denylist = Denylist()
+    exp = int(time.time()) + 60
+
+    assert denylist.check('revoked') is None
+    denylist.load(['revoked'])
+
+    assert denylist.check('revoked') is None
+    assert denylist.check('live') is False
+    denylist.remember('revoked', exp, True)
+    assert denylist.check('revoked') is True
+    denylist.revoke('local', exp)
+    assert denylist.check('local') is True
+    assert denylist.stats()['lookups'] == 2  # noqa: PLR2004
+
+
+def test_denylist_keeps_no_negatives_without_a_filter():
+    denylist = Denylist()
+    exp = int(time.time()) + 60
+
+    denylist.remember('live', exp, False)
+    assert denylist.check('live') is None
+
+    # a filter hit that the table answered stays answered until a load
+    denylist.load(['live'])
+    denylist.remember('live', exp, False)
+    assert denylist.check('live') is False
+
+
+@pytest.mark.asyncio
+async def test_load_revocations_skips_expired(session, engine, queries):
+    now = datetime.now(ZoneInfo('UTC')).replace(tzinfo=None)
+    session.add_all([
+        RevokedToken('live', now + timedelta(hours=1), 'alice@example.com'),
+        RevokedToken('expired', now - timedelta(hours=1), 'alice@example.com'),
+    ])
+    await session.commit()
+    queries.clear()
+
+    await load_revocations([engine])
+
+    assert denylist.stats()['loaded'] == 1
+    assert denylist.check('live') is None
+    assert all(statement.startswith('SELECT') for statement in queries)
+
+
+@pytest.mark.asyncio
+async def test_prune_revocations_deletes_expired(session, engine):
+    now = datetime.now(ZoneInfo('UTC')).replace(tzinfo=None)
+    session.add_all([
+        RevokedToken('live', now + timedelta(hours=1), 'alice@example.com'),
+        RevokedToken('expired', now - timedelta(hours=1), 'alice@example.com'),
+    ])
+    await session.commit()
+
+    assert await prune_revocations(engine) == 1
+    jtis = await session.scalars(select(RevokedToken.jti))
+    assert jtis.all() == ['live']
+
+
+def test_token_cache_drops_expired_payloads(settings):
+    cache = TokenCache()
+
+    with freeze_time('2026-01-01 00:00:00') as frozen:
+        # exp is 2026-01-01 00:01:00 UTC
+        cache.put(
+            'token', settings, {'sub': 'alice@example.com', 'exp': 1767225660}
+        )
+        cache.put('no-exp', settings, {'sub': 'alice@example.com'})
+
+        assert cache.get('token', settings)['sub'] == 'alice@example.com'
+        assert cache.get('no-exp', settings) is None
+        frozen.tick(60)
+        assert cache.get('token', settings) is None
+
+    assert cache.stats()['size'] == 0
+
+
+def test_decode_token_never_serves_expired_payload():
+    settings = get_settings()
+
+    with freeze_time('2026-01-01 00:00:00') as frozen:
+        token = generate_access_token({'sub': 'alice@example.com'})
+        decode_token(token, settings)
+        assert decode_token(token, settings)['sub'] == 'alice@example.com'
+        assert token_cache.get(token, settings) is not None
+
+        frozen.tick(settings.access_token_delta)
+        with pytest.raises(ExpiredSignatureError):
+            decode_token(token, settings)
+
+
 def test_access_token_without_user(client: TestClient, settings):
     token = encode(
         {'exp': datetime.now() + timedelta(days=1), 'type': 'access'},
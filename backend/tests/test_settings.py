@@ -0,0 +1,129 @@
+import asyncio
+import os
+import signal
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from loguru import logger
+
+from joker_task.app import app, watch_sighup
+from joker_task.service.password_pool import password_pool
+from joker_task.service.principal import principal_cache
+from joker_task.service.token_cache import token_cache
+from joker_task.settings import (
+    RESTART_SETTINGS,
+    Settings,
+    get_settings,
+    reload_settings,
+)
+
+
+@pytest.fixture
+def fresh_settings():
+    get_settings.cache_clear()
+    yield
+    # runs after monkeypatch restored the environment, which puts the
+    # caches and pools resized by a test back as well
+    reload_settings()
+
+
+def test_get_settings_is_cached(fresh_settings):
+    assert get_settings() is get_settings()
+
+
+def test_parsed_forms_are_precomputed(fresh_settings):
+    settings = get_settings()
+
+    assert settings.access_token_delta == timedelta(
+        minutes=settings.ACCESS_TOKEN_EXPIRE
+    )
+    assert settings.refresh_token_delta == timedelta(
+        minutes=settings.REFRESH_TOKEN_EXPIRE
+    )
+    assert settings.signing_key == settings.SECRET_KEY.encode()
+    assert settings.algorithms == [settings.ALGORITHM]
+    assert {'access_token_delta', 'signing_key'} <= set(vars(settings))
+
+
+def test_reload_settings_reads_environment_again(fresh_settings, monkeypatch):
+    before = get_settings()
+    monkeypatch.setenv('ACCESS_TOKEN_EXPIRE', '1')
+
+    after = reload_settings()
+
+    assert after is not before
+    assert after is get_settings()
+    assert after.access_token_delta == timedelta(minutes=1)
+
+
+def test_reload_settings_resizes_caches_and_pools(fresh_settings, monkeypatch):
+    monkeypatch.setenv('TOKEN_CACHE_SIZE', '7')
+    monkeypatch.setenv('PRINCIPAL_CACHE_SIZE', '5')
+    monkeypatch.setenv('PRINCIPAL_CACHE_TTL', '1.5')
+    monkeypatch.setenv('PASSWORD_WORKERS', '3')
+
+    reload_settings()
+
+    assert token_cache.maxsize == 7  # noqa: PLR2004
+    assert (principal_cache.maxsize, principal_cache.ttl) == (5, 1.5)
+    assert password_pool.stats()['workers'] == 3  # noqa: PLR2004
+
+
+def test_reload_settings_warns_about_restart_settings(
+    fresh_settings, monkeypatch
+):
+    messages: list[str] = []
+    handler = logger.add(messages.append, level='WARNING')
+    assert get_settings().DB_POOL_SIZE != 3  # noqa: PLR2004
+    monkeypatch.setenv('DB_POOL_SIZE', '3')
+
+    reload_settings()
+    logger.remove(handler)
+
+    assert len(messages) == 1
+    assert 'restart to apply: DB_POOL_SIZE' in messages[0]
+    assert 'DB_POOL_SIZE' in RESTART_SETTINGS
+
+
+@pytest.mark.asyncio
+async def test_sighup_reloads_settings(fresh_settings):
+    before = get_settings()
+
+    assert watch_sighup()
+    os.kill(os.getpid(), signal.SIGHUP)
+    await asyncio.sleep(0.05)
+    asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+
+    assert get_settings() is not before
+
+
+def test_rotated_secret_rejects_old_tokens(client: TestClient, users):
+    cookies = {'access_token': users[0]['access_token']}
+    assert client.get('/tasks/', cookies=cookies).status_code == HTTPStatus.OK
+
+    settings = Settings(SECRET_KEY='rotated')  # type: ignore
+    app.dependency_overrides[get_settings] = lambda: settings
+
+    rsp = client.put(
+        '/update_user/',
+        json={'username': 'alice', 'password': 'secret'},
+        cookies=cookies,
+    )
+
+    assert rsp.status_code == HTTPStatus.UNAUTHORIZED
+    assert rsp.json()['detail'] == 'invalid access token'
+
+
+def test_reloaded_secret_rejects_cached_tokens(
+    fresh_settings, monkeypatch, client: TestClient, users
+):
+    cookies = {'access_token': users[0]['access_token']}
+    assert client.get('/tasks/', cookies=cookies).status_code == HTTPStatus.OK
+
+    monkeypatch.setenv('SECRET_KEY', 'rotated')
+    reload_settings()
+    rsp = client.get('/tasks/', cookies=cookies)
+
+    assert rsp.status_code == HTTPStatus.UNAUTHORIZED
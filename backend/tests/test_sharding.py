@@ -0,0 +1,280 @@
+from http import HTTPStatus
+from itertools import count
+
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from joker_task.app import app
+from joker_task.db import database
+from joker_task.db.models import (
+    Filter,
+    RevokedToken,
+    Task,
+    User,
+    View,
+    table_registry,
+    task_tag,
+)
+from joker_task.db.routing import ReplicaRouter
+from joker_task.db.shard_move import move_user, rebalance
+from joker_task.db.sharding import HashRing, ShardMap
+from joker_task.router import auth
+from joker_task.service.denylist import denylist
+from joker_task.settings import Settings
+
+SHARDS = ['default', 'b', 'c']
+KEYS = [f'user{n}@example.com' for n in range(2000)]
+
+
+def test_hash_ring_spreads_keys():
+    ring = HashRing(SHARDS, 128)
+    shares = {name: 0 for name in SHARDS}
+    for key in KEYS:
+        shares[ring.node_for(key)] += 1
+
+    assert min(shares.values()) > len(KEYS) * 0.2  # noqa: PLR2004
+
+
+def test_hash_ring_growth_only_moves_keys_to_new_node():
+    before = HashRing(SHARDS, 128)
+    after = HashRing([*SHARDS, 'd'], 128)
+
+    moved = [
+        key for key in KEYS if before.node_for(key) != after.node_for(key)
+    ]
+
+    assert {after.node_for(key) for key in moved} == {'d'}
+    assert len(moved) < len(KEYS) * 0.4  # noqa: PLR2004
+
+
+@pytest_asyncio.fixture
+async def shards(tmp_path, monkeypatch):
+    routers = {}
+    for name in SHARDS:
+        engine = create_async_engine(
+            f'sqlite+aiosqlite:///{tmp_path / f"{name}.db"}'
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(table_registry.metadata.create_all)
+        routers[name] = ReplicaRouter(engine, [], sticky_seconds=0)
+
+    shards = ShardMap(routers, 128)
+    monkeypatch.setattr(database, 'shards', shards)
+    yield shards
+
+    await shards.dispose()
+
+
+@pytest.fixture
+def sharded_client(shards):
+    app.dependency_overrides.clear()
+    with TestClient(app) as client:
+        yield client
+
+
+def emails_on_distinct_shards(shards: ShardMap) -> tuple[str, str]:
+    first = 'alice@example.com'
+    for n in count():
+        other = f'user{n}@example.com'
+        if shards.shard_for(other) != shards.shard_for(first):
+            return first, other
+    raise AssertionError  # pragma: no cover
+
+
+def sign_up(client: TestClient, email: str, username: str) -> None:
+    rsp = client.post(
+        '/users/',
+        json={'email': email, 'username': username, 'password': 'secret'},
+    )
+    assert rsp.status_code == HTTPStatus.OK
+    rsp = client.post('/login', data={'username': email, 'password': 'secret'})
+    assert rsp.status_code == HTTPStatus.OK
+    client.cookies.update(rsp.cookies)
+
+
+async def users_by_shard(shards: ShardMap) -> dict[str, list[str]]:
+    result = {}
+    for name, router in shards.routers.items():
+        async with router.primary.connect() as conn:
+            emails = await conn.scalars(
+                select(User.email).order_by(User.email)
+            )
+            result[name] = emails.all()
+    return result
+
+
+async def no_conflict(email, statement):
+    return None
+
+
+@pytest.mark.asyncio
+async def test_users_are_routed_to_their_shard(
+    sharded_client: TestClient, shards: ShardMap
+):
+    alice, other = emails_on_distinct_shards(shards)
+
+    sign_up(sharded_client, alice, 'alice')
+    sharded_client.post('/tags/', json=[{'name': 'alice tag'}])
+    sign_up(sharded_client, other, 'other')
+    sharded_client.post('/tags/', json=[{'name': 'other tag'}])
+
+    placed = await users_by_shard(shards)
+    assert placed[shards.shard_for(alice)] == [alice]
+    assert placed[shards.shard_for(other)] == [other]
+
+    rsp = sharded_client.get('/tags/')
+    assert [tag['name'] for tag in rsp.json()] == ['other tag']
+
+
+def test_usernames_are_unique_across_shards(
+    sharded_client: TestClient, shards: ShardMap
+):
+    alice, other = emails_on_distinct_shards(shards)
+    sign_up(sharded_client, alice, 'alice')
+
+    rsp = sharded_client.post(
+        '/users/',
+        json={'email': other, 'username': 'alice', 'password': 'secret'},
+    )
+
+    assert rsp.status_code == HTTPStatus.CONFLICT
+
+
+@pytest.mark.asyncio
+async def test_username_index_holds_when_sign_ups_race(
+    sharded_client: TestClient, shards: ShardMap, monkeypatch
+):
+    alice, other = emails_on_distinct_shards(shards)
+    # two sign ups that each check the other shards before either commits
+    monkeypatch.setattr(auth, 'scalar_on_other_shards', no_conflict)
+    sign_up(sharded_client, alice, 'alice')
+
+    rsp = sharded_client.post(
+        '/users/',
+        json={'email': other, 'username': 'alice', 'password': 'secret'},
+    )
+
+    assert rsp.status_code == HTTPStatus.CONFLICT
+    assert other not in (await users_by_shard(shards))[shards.shard_for(other)]
+
+
+def test_renaming_releases_the_old_username(
+    sharded_client: TestClient, shards: ShardMap
+):
+    alice, other = emails_on_distinct_shards(shards)
+    sign_up(sharded_client, alice, 'alice')
+
+    rsp = sharded_client.put(
+        '/update_user/', json={'username': 'alice2', 'password': 'secret'}
+    )
+    assert rsp.status_code == HTTPStatus.OK
+
+    sign_up(sharded_client, other, 'alice')
+    rsp = sharded_client.post(
+        '/users/',
+        json={'email': 'x@example.com', 'username': 'alice2', 'password': 'x'},
+    )
+
+    assert rsp.status_code == HTTPStatus.CONFLICT
+
+
+@pytest.mark.asyncio
+async def test_move_user_and_rebalance(
+    sharded_client: TestClient, shards: ShardMap
+):
+    email = 'alice@example.com'
+    home = shards.shard_for(email)
+    away = next(name for name in SHARDS if name != home)
+
+    sign_up(sharded_client, 'bob@example.com', 'bob')
+    sharded_client.post('/tags/', json=[{'name': 'bob tag'}])
+    sign_up(sharded_client, email, 'alice')
+    sharded_client.post('/workbenches/', json={'name': 'b', 'columns': ['x']})
+    sharded_client.post(
+        '/tasks/',
+        json={
+            'title': 'moving',
+            'tags': [{'name': 'one'}, {'name': 'two'}],
+            'workbenches': [1],
+        },
+    )
+    sharded_client.post(
+        '/views/', json={'name': 'mine', 'filters': [{'tags': ['one']}]}
+    )
+    before = sharded_client.get('/tasks/').json()['responses']
+    assert len(before) == 1
+
+    moved = await move_user(
+        email, shards.routers[home].primary, shards.routers[away].primary
+    )
+
+    assert moved == {'tags': 2, 'workbenches': 1, 'tasks': 1, 'views': 1}
+    assert email not in (await users_by_shard(shards))[home]
+    async with shards.routers[away].primary.connect() as conn:
+        task = (await conn.execute(select(Task.id_task, Task.tag_ids))).one()
+        links = await conn.scalars(
+            select(task_tag.c.id_tag).where(task_tag.c.id_task == task.id_task)
+        )
+        assert sorted(task.tag_ids) == sorted(links)
+        assert await conn.scalar(select(func.count()).select_from(Filter))
+        assert await conn.scalar(select(func.count()).select_from(View))
+
+    assert await rebalance(shards, dry_run=True) == 1
+    assert await rebalance(shards) == 1
+    assert await rebalance(shards) == 0
+
+    after = sharded_client.get('/tasks/', params={'tags': ['one']})
+    assert [task['title'] for task in after.json()['responses']] == [
+        task['title'] for task in before
+    ]
+
+
+@pytest.mark.asyncio
+async def test_move_user_keeps_revoked_tokens(
+    sharded_client: TestClient, shards: ShardMap
+):
+    email = 'alice@example.com'
+    home = shards.shard_for(email)
+    away = next(name for name in SHARDS if name != home)
+
+    sign_up(sharded_client, email, 'alice')
+    cookies = dict(sharded_client.cookies)
+    sharded_client.post('/logout/')
+
+    await move_user(
+        email, shards.routers[home].primary, shards.routers[away].primary
+    )
+    async with shards.routers[away].primary.connect() as conn:
+        moved = await conn.scalars(
+            select(RevokedToken.jti).where(RevokedToken.user_email == email)
+        )
+        assert len(moved.all()) == 2  # noqa: PLR2004
+    assert await rebalance(shards) == 1
+
+    # a worker that has not loaded the revocations asks the owner's shard
+    denylist.clear()
+    rsp = sharded_client.post('/refresh/', cookies=cookies)
+
+    assert rsp.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_shard_urls_from_comma_separated_env(monkeypatch):
+    monkeypatch.setenv(
+        'DATABASE_SHARD_URLS',
+        'b=postgresql://h/b?sslmode=require, c=sqlite:///c.db',
+    )
+
+    assert Settings().DATABASE_SHARD_URLS == {  # type: ignore
+        'b': 'postgresql://h/b?sslmode=require',
+        'c': 'sqlite:///c.db',
+    }
+
+
+def test_default_shard_name_is_reserved(settings):
+    settings.DATABASE_SHARD_URLS = {'default': 'sqlite:///x.db'}
+
+    with pytest.raises(ValueError, match='DATABASE_URL'):
+        database.create_shards(settings, database.router)
@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from joker_task.db.models import Task, task_tag
+
+
+async def tag_ids(session: AsyncSession) -> dict[int, list[int]]:
+    session.expire_all()
+    rows = await session.execute(select(Task.id_task, Task.tag_ids))
+    return {id_task: sorted(ids) for id_task, ids in rows}
+
+
+async def task_tag_ids(session: AsyncSession) -> dict[int, list[int]]:
+    tasks = await session.scalars(select(Task.id_task))
+    result: dict[int, list[int]] = {id_task: [] for id_task in tasks}
+    for id_task, id_tag in await session.execute(
+        select(task_tag.c.id_task, task_tag.c.id_tag).order_by(
+            task_tag.c.id_tag
+        )
+    ):
+        result[id_task].append(id_tag)
+    return result
+
+
+@pytest.mark.asyncio
+async def test_tag_ids_follow_task_tag_on_writes(
+    auth_client_alice: TestClient, session: AsyncSession, tasks
+):
+    rsp = auth_client_alice.post(
+        '/tasks/',
+        json={
+            'title': 'tagged',
+            'tags': [{'name': 'test_none'}, {'name': 'brand_new'}],
+        },
+    )
+    assert rsp.status_code == HTTPStatus.CREATED
+
+    rsp = auth_client_alice.patch(
+        '/tasks/1',
+        json={
+            'tags_add': [{'name': 'another_new'}],
+            'tags_remove': [{'name': 'test_filters'}],
+        },
+    )
+    assert rsp.status_code == HTTPStatus.OK
+
+    rsp = auth_client_alice.post(
+        '/tasks/bulk',
+        json=[
+            {'title': 'bulk', 'tags': [{'name': 'test_filters'}]},
+            {'title': 'bulk new', 'tags': [{'name': 'bulk_tag'}]},
+        ],
+    )
+    assert rsp.status_code == HTTPStatus.OK
+
+    denormalized = await tag_ids(session)
+    assert denormalized == await task_tag_ids(session)
+    assert all(denormalized[id_task] for id_task in (1, 5, 6, 7))
+
+
+@pytest.mark.asyncio
+async def test_delete_tag_removes_it_from_tag_ids(
+    auth_client_alice: TestClient, session: AsyncSession, tasks
+):
+    rsp = auth_client_alice.delete('/tags/1')
+    assert rsp.status_code == HTTPStatus.NO_CONTENT
+
+    denormalized = await tag_ids(session)
+    assert denormalized == await task_tag_ids(session)
+    assert denormalized[1] == [2]
+    assert denormalized[2] == []
+
+
+@pytest.mark.parametrize(
+    ('params', 'expected'),
+    [
+        ({'tags': ['test_filters', 'test_none']}, [1]),
+        ({'tags': ['test_filters', 'missing']}, []),
+        ({'tags_any': ['test_none', 'missing']}, [1, 3]),
+        ({'tags_none': ['test_filters']}, [3]),
+    ],
+)
+def test_tag_filters_match_on_tag_ids(
+    auth_client_alice: TestClient, tasks, params, expected
+):
+    rsp = auth_client_alice.get('/tasks/', params=params)
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert [task['id_task'] for task in rsp.json()['responses']] == expected
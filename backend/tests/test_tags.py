@@ -8,7 +8,7 @@ from freezegun import freeze_time
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from joker_task.db.models import Tag
+from joker_task.db.models import Tag, User
 
 
 @pytest.mark.asyncio
@@ -158,6 +158,52 @@ async def test_update_at_tag(
     )
 
 
+def test_list_tags_not_modified(auth_client_alice: TestClient, tags):
+    etag = auth_client_alice.get('/tags/').headers['etag']
+
+    rsp = auth_client_alice.get('/tags/', headers={'If-None-Match': etag})
+
+    assert rsp.status_code == HTTPStatus.NOT_MODIFIED
+    assert rsp.headers['etag'] == etag
+    assert not rsp.content
+
+    auth_client_alice.post(
+        '/tags', json=[{'name': 'new tag', 'color_hex': '#000000'}]
+    )
+
+    rsp = auth_client_alice.get('/tags/', headers={'If-None-Match': etag})
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.headers['etag'] != etag
+
+
+@pytest.mark.asyncio
+async def test_list_tags_modified_in_the_same_second(
+    auth_client_alice: TestClient, session: AsyncSession, tags
+):
+    etag = auth_client_alice.get('/tags/').headers['etag']
+    version = await session.scalar(
+        select(User.data_version).where(User.email == tags[0]['user_email'])
+    )
+
+    auth_client_alice.patch(
+        f'/tags/{tags[0]["id_tag"]}',
+        json={'name': 'renamed', 'color_hex': '#FFFFFF'},
+    )
+    rsp = auth_client_alice.get('/tags/', headers={'If-None-Match': etag})
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.headers['etag'] != etag
+    assert (
+        await session.scalar(
+            select(User.data_version).where(
+                User.email == tags[0]['user_email']
+            )
+        )
+        == version + 1
+    )
+
+
 def test_update_tag_conflict(auth_client_bob: TestClient, tags):
     rsp = auth_client_bob.patch(
         f'/tags/{tags[2]["id_tag"]}',
@@ -204,3 +250,16 @@ async def test_delete_tag_not_found_with_incorrect_user(
     )
 
     assert rsp.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_list_tags_does_not_load_tasks(
+    auth_client_alice: TestClient, tasks, queries: list[str]
+):
+    queries.clear()
+
+    rsp = auth_client_alice.get('/tags/')
+
+    assert rsp.status_code == HTTPStatus.OK
+    # user, etag, tags
+    assert len(queries) == 3  # noqa: PLR2004
+    assert not [query for query in queries if 'task_tag' in query]
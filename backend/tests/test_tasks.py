@@ -5,11 +5,11 @@ from zoneinfo import ZoneInfo
 import pytest
 from fastapi.testclient import TestClient
 from freezegun import freeze_time
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from joker_task.db.models import Task
+from joker_task.db.models import Task, task_tag
 
 
 @pytest.mark.asyncio
@@ -163,6 +163,7 @@ async def test_update_task(
     data.pop('created_at')
     data.pop('id_task')
     data.pop('user_email')
+    assert data.pop('archived_at') is None
     rsp_tags = data.pop('tags')
 
     espec_tags = [
@@ -218,3 +219,298 @@ async def test_delete_task(
     is_none = await session.scalar(select(Task).where(Task.id_task == 1))
 
     assert is_none is None
+
+
+@pytest.mark.asyncio
+async def test_create_tasks_bulk(
+    auth_client_alice: TestClient, session: AsyncSession, tags, workbenches
+):
+    rsp = auth_client_alice.post(
+        '/tasks/bulk',
+        json=[
+            {
+                'title': 'bulk 1',
+                'tags': [{'name': 'test_filters'}, {'name': 'new_tag'}],
+                'workbenches': [1],
+            },
+            {'title': 'bulk 2', 'tags': [{'name': 'new_tag'}]},
+            {'title': 'bulk 3', 'workbenches': [1, 2], 'done': True},
+        ],
+    )
+
+    assert rsp.status_code == HTTPStatus.OK
+
+    data = rsp.json()['responses']
+
+    assert [item['status_code'] for item in data] == [HTTPStatus.CREATED] * 3
+    assert [item['task']['title'] for item in data] == [
+        'bulk 1',
+        'bulk 2',
+        'bulk 3',
+    ]
+    assert sorted(tag['name'] for tag in data[0]['task']['tags']) == [
+        'new_tag',
+        'test_filters',
+    ]
+    assert data[0]['task']['workbenches'] == [1]
+    assert data[1]['task']['tags'][0]['name'] == 'new_tag'
+    assert data[2]['task']['done'] is True
+    assert data[2]['task']['workbenches'] == [1, 2]
+
+    tasks_db = (
+        await session.scalars(
+            select(Task)
+            .where(Task.title.like('bulk%'))
+            .order_by(Task.id_task)
+            .options(selectinload(Task.tags))
+            .execution_options(populate_existing=True)
+        )
+    ).all()
+
+    assert [task.title for task in tasks_db] == ['bulk 1', 'bulk 2', 'bulk 3']
+    new_tag_ids = {
+        tag.id_tag
+        for task in tasks_db[:2]
+        for tag in task.tags
+        if tag.name == 'new_tag'
+    }
+    assert len(new_tag_ids) == 1
+
+
+def test_create_tasks_bulk_reports_failures_per_item(
+    auth_client_alice: TestClient, tags, workbenches
+):
+    rsp = auth_client_alice.post(
+        '/tasks/bulk',
+        json=[
+            {'title': 'ok'},
+            {'title': 'bad workbench', 'workbenches': [3]},
+            {'title': 'bad color', 'tags': [{'name': 'x', 'color_hex': 'x'}]},
+            {'title': 'dup', 'tags': [{'name': 'a'}, {'name': 'a'}]},
+        ],
+    )
+
+    assert rsp.status_code == HTTPStatus.OK
+
+    data = rsp.json()['responses']
+
+    assert [item['status_code'] for item in data] == [
+        HTTPStatus.CREATED,
+        HTTPStatus.NOT_FOUND,
+        HTTPStatus.BAD_REQUEST,
+        HTTPStatus.BAD_REQUEST,
+    ]
+    assert data[0]['task']['title'] == 'ok'
+    assert data[1]['detail'] == 'workbench with id: 3, not found'
+    assert data[2]['detail'] == 'invalid color_hex format'
+    assert data[3]['detail'] == 'duplicate tag names in request'
+    assert all(item['task'] is None for item in data[1:])
+
+
+def test_create_tasks_bulk_all_invalid(auth_client_alice: TestClient, users):
+    rsp = auth_client_alice.post(
+        '/tasks/bulk', json=[{'title': 'bad', 'workbenches': [42]}]
+    )
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.json()['responses'][0]['status_code'] == HTTPStatus.NOT_FOUND
+
+
+def test_create_tasks_bulk_too_large(
+    auth_client_alice: TestClient, users, monkeypatch
+):
+    monkeypatch.setattr(
+        'joker_task.service.task_bulk_service.MAX_BULK_SIZE', 1
+    )
+
+    rsp = auth_client_alice.post(
+        '/tasks/bulk', json=[{'title': 'a'}, {'title': 'b'}]
+    )
+
+    assert rsp.status_code == HTTPStatus.BAD_REQUEST
+    assert rsp.json()['detail'] == 'at most 1 tasks per request'
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_by_filter(
+    auth_client_alice: TestClient, session: AsyncSession, tasks
+):
+    rsp = auth_client_alice.patch(
+        '/tasks/?state=ToDo&state=InProgress',
+        json={'done': True, 'state': 'Done'},
+    )
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.json() == {'affected': 2}
+
+    tasks_db = (
+        await session.scalars(
+            select(Task)
+            .order_by(Task.id_task)
+            .execution_options(populate_existing=True)
+        )
+    ).all()
+
+    assert [(task.done, task.state) for task in tasks_db] == [
+        (True, 'Done'),
+        (True, 'Done'),
+        (False, 'Done'),
+        (True, 'Done'),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_by_filter_with_done_false(
+    auth_client_alice: TestClient, session: AsyncSession, tasks
+):
+    await session.execute(
+        update(Task).where(Task.id_task == 1).values(done=True)
+    )
+    await session.commit()
+
+    rsp = auth_client_alice.patch(
+        '/tasks/?done=false&title=%25test%25', json={'priority': 1}
+    )
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.json() == {'affected': 1}
+
+    priorities = (
+        await session.execute(
+            select(Task.id_task, Task.priority)
+            .order_by(Task.id_task)
+            .execution_options(populate_existing=True)
+        )
+    ).all()
+
+    assert priorities == [(1, 50), (2, 1), (3, 100), (4, 55)]
+
+
+def test_update_tasks_by_filter_with_tags(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.patch(
+        '/tasks/?tags=test_filters&tags=test_none', json={'priority': 1}
+    )
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.json() == {'affected': 1}
+
+    rsp = auth_client_alice.get('/tasks/1')
+
+    assert rsp.json()['priority'] == 1
+
+
+def test_update_tasks_by_filter_without_filter(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.patch('/tasks/', json={'done': True})
+
+    assert rsp.status_code == HTTPStatus.BAD_REQUEST
+    assert rsp.json()['detail'] == 'at least one filter is required'
+
+
+def test_update_tasks_by_filter_changes_etag(
+    auth_client_alice: TestClient, tasks
+):
+    etag = auth_client_alice.get('/tasks/').headers['etag']
+
+    rsp = auth_client_alice.patch('/tasks/?state=ToDo', json={'priority': 1})
+    assert rsp.json() == {'affected': 1}
+
+    rsp = auth_client_alice.get('/tasks/', headers={'If-None-Match': etag})
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.headers['etag'] != etag
+
+
+def test_update_tasks_by_filter_without_values(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.patch('/tasks/?done=false', json={})
+
+    assert rsp.status_code == HTTPStatus.BAD_REQUEST
+    assert rsp.json()['detail'] == 'nothing to update'
+
+
+@pytest.mark.asyncio
+async def test_delete_tasks_by_filter(
+    auth_client_alice: TestClient, session: AsyncSession, tasks
+):
+    rsp = auth_client_alice.delete('/tasks/?tags=test_filters')
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.json() == {'affected': 2}
+
+    ids = (await session.scalars(select(Task.id_task))).all()
+
+    assert sorted(ids) == [3, 4]
+
+    rsp = auth_client_alice.get('/tasks/')
+
+    assert [task['id_task'] for task in rsp.json()['responses']] == [3]
+
+
+@pytest.mark.asyncio
+async def test_delete_tasks_by_filter_with_done_false(
+    auth_client_alice: TestClient, session: AsyncSession, tasks
+):
+    await session.execute(
+        update(Task).where(Task.id_task == 1).values(done=True)
+    )
+    await session.commit()
+
+    rsp = auth_client_alice.delete('/tasks/?done=false&title=%25test%25')
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.json() == {'affected': 1}
+
+    ids = (await session.scalars(select(Task.id_task))).all()
+    tagged = (await session.scalars(select(task_tag.c.id_task))).all()
+
+    assert sorted(ids) == [1, 3, 4]
+    assert sorted(set(tagged)) == [1, 3]
+
+
+def test_delete_tasks_by_filter_does_not_touch_other_users(
+    auth_client_bob: TestClient, tasks
+):
+    rsp = auth_client_bob.delete('/tasks/?title=test')
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.json() == {'affected': 1}
+
+
+def test_delete_tasks_by_filter_without_filter(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.delete('/tasks/?limit=10')
+
+    assert rsp.status_code == HTTPStatus.BAD_REQUEST
+    assert rsp.json()['detail'] == 'at least one filter is required'
+
+
+def test_create_task_does_not_load_tagged_tasks(
+    auth_client_alice: TestClient, tasks, queries: list[str]
+):
+    queries.clear()
+
+    rsp = auth_client_alice.post(
+        '/tasks/',
+        json={
+            'title': 'new task',
+            'tags': [{'name': 'test_filters'}, {'name': 'brand new'}],
+            'workbenches': [1],
+        },
+    )
+
+    assert rsp.status_code == HTTPStatus.CREATED
+    assert not [
+        query
+        for query in queries
+        if query.startswith('SELECT') and 'JOIN tasks' in query
+    ]
+    # user, 2 tag lookups, tag insert, workbenches, task insert,
+    # 2 association inserts and the data version bump; generated
+    # columns come back via RETURNING
+    assert len(queries) == 9  # noqa: PLR2004
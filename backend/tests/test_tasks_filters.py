@@ -1,6 +1,12 @@
+import base64
+import json
 from http import HTTPStatus
 
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from joker_task.service.filter_cache import filter_query_cache
 
 
 def test_get_task_by_id_not_found(auth_client_bob: TestClient, tasks):
@@ -100,3 +106,406 @@ def test_get_task_by_filter_with_tag(auth_client_alice: TestClient, tasks):
         assert sorted([
             tag['name'] for tag in data['responses'][1]['tags']
         ]) == sorted([tag.name for tag in tasks[0]['tags']])
+
+
+def test_get_task_by_filter_with_all_tags(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.get('/tasks?tags=test_filters&tags=test_none')
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert [task['id_task'] for task in rsp.json()['responses']] == [1]
+
+
+def test_get_task_by_filter_with_many_tags(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.get(
+        '/tasks?tags=test_filters&tags=test_none'
+        + '&tags=test_filters&tags=test_none'
+    )
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert [task['id_task'] for task in rsp.json()['responses']] == [1]
+
+
+def test_get_task_by_filter_with_any_tags(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.get('/tasks?tags_any=test_none&tags_any=unknown')
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert [task['id_task'] for task in rsp.json()['responses']] == [1, 3]
+
+
+def test_get_task_by_filter_without_tags(auth_client_alice: TestClient, tasks):
+    rsp = auth_client_alice.get(
+        '/tasks?tags_none=test_none&tags_any=test_filters'
+    )
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert [task['id_task'] for task in rsp.json()['responses']] == [2]
+
+
+def test_get_task_by_filter_ignores_other_users_tags(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.get('/tasks?tags_any=test_bob')
+
+    assert rsp.json()['responses'] == []
+
+
+def test_get_tasks_with_limit_returns_next_cursor(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.get('/tasks?limit=2')
+
+    assert rsp.status_code == HTTPStatus.OK
+
+    data = rsp.json()
+
+    assert [task['id_task'] for task in data['responses']] == [1, 2]
+    assert data['next_cursor'] is not None
+
+    rsp = auth_client_alice.get(f'/tasks?limit=2&cursor={data["next_cursor"]}')
+
+    assert rsp.status_code == HTTPStatus.OK
+
+    data = rsp.json()
+
+    assert [task['id_task'] for task in data['responses']] == [3]
+    assert data['next_cursor'] is None
+
+
+def test_get_tasks_with_cursor_ordered_by_priority(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.get('/tasks?limit=1&order_by=priority')
+    data = rsp.json()
+
+    assert [task['priority'] for task in data['responses']] == [50]
+
+    rsp = auth_client_alice.get(
+        '/tasks?limit=2&order_by=priority' + f'&cursor={data["next_cursor"]}'
+    )
+
+    assert rsp.status_code == HTTPStatus.OK
+
+    data = rsp.json()
+
+    assert [task['priority'] for task in data['responses']] == [60, 100]
+    assert data['next_cursor'] is None
+
+
+def test_get_tasks_with_legacy_offset(auth_client_alice: TestClient, tasks):
+    rsp = auth_client_alice.get('/tasks?offset=1&limit=1')
+
+    assert rsp.status_code == HTTPStatus.OK
+
+    data = rsp.json()
+
+    assert [task['id_task'] for task in data['responses']] == [2]
+    assert data['next_cursor'] is not None
+
+
+def test_get_tasks_limit_is_capped(
+    auth_client_alice: TestClient, tasks, monkeypatch
+):
+    max_page_size = 2
+    monkeypatch.setattr(
+        'joker_task.service.pagination.MAX_PAGE_SIZE', max_page_size
+    )
+
+    rsp = auth_client_alice.get('/tasks?limit=100000')
+
+    assert rsp.status_code == HTTPStatus.OK
+
+    data = rsp.json()
+
+    assert len(data['responses']) == max_page_size
+    assert data['next_cursor'] is not None
+
+
+def test_get_tasks_invalid_cursor(auth_client_alice: TestClient, tasks):
+    rsp = auth_client_alice.get('/tasks?cursor=not-a-cursor')
+
+    assert rsp.status_code == HTTPStatus.BAD_REQUEST
+    assert rsp.json()['detail'] == 'invalid cursor'
+
+
+def test_get_tasks_cursor_from_other_order(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.get('/tasks?limit=1')
+    cursor = rsp.json()['next_cursor']
+
+    rsp = auth_client_alice.get(f'/tasks?order_by=priority&cursor={cursor}')
+
+    assert rsp.status_code == HTTPStatus.BAD_REQUEST
+    assert rsp.json()['detail'] == 'invalid cursor'
+
+
+@pytest.mark.parametrize(
+    'raw',
+    [
+        ['priority', 'abc', 1],
+        ['priority', True, 1],
+        ['priority', 1, '1'],
+        ['id_task', 1.5, 1],
+    ],
+)
+def test_get_tasks_cursor_with_wrong_types(
+    auth_client_alice: TestClient, tasks, raw
+):
+    cursor = base64.urlsafe_b64encode(json.dumps(raw).encode()).decode()
+
+    rsp = auth_client_alice.get(
+        '/tasks', params={'order_by': raw[0], 'cursor': cursor}
+    )
+
+    assert rsp.status_code == HTTPStatus.BAD_REQUEST
+    assert rsp.json()['detail'] == 'invalid cursor'
+
+
+def test_get_tasks_stream_ndjson(auth_client_alice: TestClient, tasks):
+    rsp = auth_client_alice.get(
+        '/tasks?title=%tes%', headers={'Accept': 'application/x-ndjson'}
+    )
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.headers['content-type'].startswith('application/x-ndjson')
+
+    lines = [json.loads(line) for line in rsp.text.splitlines()]
+
+    assert [task['id_task'] for task in lines] == [1, 2]
+    assert {tag['name'] for tag in lines[0]['tags']} == {
+        tag.name for tag in tasks[0]['tags']
+    }
+
+
+def test_get_tasks_stream_json_array(auth_client_alice: TestClient, tasks):
+    rsp = auth_client_alice.get('/tasks?stream=1&order_by=priority')
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert [task['priority'] for task in rsp.json()] == [50, 60, 100]
+
+
+def test_get_tasks_stream_empty(auth_client_bob: TestClient, tasks):
+    rsp = auth_client_bob.get('/tasks?stream=1&title=nothing')
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.json() == []
+
+
+def test_get_tasks_reuses_cached_query_for_same_shape(
+    auth_client_alice: TestClient, tasks
+):
+    filter_query_cache.clear()
+
+    auth_client_alice.get('/tasks?title=%tes%&tags=test_filters')
+    auth_client_alice.get('/tasks?title=title&tags=test_none')
+    rsp = auth_client_alice.get('/tasks?title=%&tags=test_none&tags=x')
+
+    assert rsp.json()['responses'] == []
+    assert filter_query_cache.stats()['hits'] == 1
+    assert filter_query_cache.stats()['misses'] == 2  # noqa: PLR2004
+
+
+def test_get_tasks_with_count(auth_client_alice: TestClient, tasks):
+    rsp = auth_client_alice.get('/tasks?limit=1&with_count=true')
+
+    assert rsp.status_code == HTTPStatus.OK
+
+    data = rsp.json()
+
+    assert len(data['responses']) == 1
+    assert data['total'] == 3  # noqa: PLR2004
+    assert data['facets'] is None
+
+
+def test_get_tasks_with_facets(auth_client_alice: TestClient, tasks):
+    rsp = auth_client_alice.get(
+        '/tasks?limit=1&facets=state&facets=done'
+        + '&facets=tags&facets=workbenches'
+    )
+
+    assert rsp.status_code == HTTPStatus.OK
+
+    data = rsp.json()
+
+    assert data['total'] == 3  # noqa: PLR2004
+    assert data['facets'] == {
+        'state': {'InProgress': 1, 'ToDo': 1, 'Done': 1},
+        'done': {'false': 3},
+        'tags': {'test_filters': 2, 'test_none': 2},
+        'workbenches': {'1': 2, '2': 2},
+    }
+
+
+def test_get_tasks_with_facets_and_filter(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.get('/tasks?tags=test_filters&facets=tags')
+
+    assert rsp.status_code == HTTPStatus.OK
+
+    data = rsp.json()
+
+    assert data['total'] == 2  # noqa: PLR2004
+    assert data['facets'] == {'tags': {'test_filters': 2, 'test_none': 1}}
+
+
+def test_get_tasks_with_sparse_fields(
+    auth_client_alice: TestClient, tasks, engine
+):
+    statements = []
+
+    def count(conn, cursor, statement, *args):  # noqa: PLR0913, PLR0917
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', count)
+    rsp = auth_client_alice.get('/tasks?fields=title,done&title=test')
+    event.remove(engine.sync_engine, 'before_cursor_execute', count)
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.json()['responses'] == [
+        {'id_task': 1, 'title': 'test', 'done': False}
+    ]
+    task_selects = [
+        s for s in statements if 'FROM tasks' in s and 'tasks.id_task' in s
+    ]
+    assert len(task_selects) == 1
+    assert 'description' not in task_selects[0]
+    assert not [s for s in statements if 'task_tag' in s]
+
+
+def test_get_tasks_with_include(auth_client_alice: TestClient, tasks):
+    rsp = auth_client_alice.get('/tasks?include=tags&fields=title')
+
+    assert rsp.status_code == HTTPStatus.OK
+
+    data = rsp.json()['responses']
+
+    assert set(data[0]) == {'id_task', 'title', 'tags'}
+    assert {tag['name'] for tag in data[0]['tags']} == {
+        tag.name for tag in tasks[0]['tags']
+    }
+
+
+def test_get_tasks_with_include_only(auth_client_alice: TestClient, tasks):
+    rsp = auth_client_alice.get('/tasks?include=workbenches')
+
+    assert rsp.status_code == HTTPStatus.OK
+
+    data = rsp.json()['responses'][0]
+
+    assert 'tags' not in data
+    assert data['workbenches'] == [2]
+    assert data['description'] == tasks[0]['description']
+
+
+def test_get_task_by_id_with_sparse_fields(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.get('/tasks/2?fields=priority&fields=state')
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.json() == {'id_task': 2, 'priority': 60, 'state': 'ToDo'}
+
+
+def test_get_tasks_with_unknown_field(auth_client_alice: TestClient, tasks):
+    rsp = auth_client_alice.get('/tasks?fields=title,password')
+
+    assert rsp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_get_tasks_stream_with_sparse_fields(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.get('/tasks?stream=1&fields=title')
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.json() == [
+        {'id_task': 1, 'title': 'test'},
+        {'id_task': 2, 'title': 'a other test'},
+        {'id_task': 3, 'title': 'title'},
+    ]
+
+
+def test_get_tasks_not_modified(auth_client_alice: TestClient, engine, tasks):
+    etag = auth_client_alice.get('/tasks').headers['etag']
+    statements = []
+
+    def count(conn, cursor, statement, *args):  # noqa: PLR0913, PLR0917
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', count)
+    rsp = auth_client_alice.get('/tasks', headers={'If-None-Match': etag})
+    event.remove(engine.sync_engine, 'before_cursor_execute', count)
+
+    assert rsp.status_code == HTTPStatus.NOT_MODIFIED
+    assert rsp.headers['etag'] == etag
+    assert not rsp.content
+    assert not [s for s in statements if 'tasks.id_task' in s]
+
+    rsp = auth_client_alice.get(
+        '/tasks?stream=true', headers={'If-None-Match': etag}
+    )
+
+    assert rsp.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_get_tasks_etag_changes_after_write(
+    auth_client_alice: TestClient, tasks
+):
+    etag = auth_client_alice.get('/tasks').headers['etag']
+
+    auth_client_alice.delete('/tasks/1')
+
+    rsp = auth_client_alice.get('/tasks', headers={'If-None-Match': etag})
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.headers['etag'] != etag
+    assert rsp.headers['cache-control'] == 'private, no-cache'
+
+
+def test_search_tasks_ranks_matches(auth_client_alice: TestClient, tasks):
+    rsp = auth_client_alice.get('/tasks/search?q=TEST')
+
+    assert rsp.status_code == HTTPStatus.OK
+
+    data = rsp.json()['responses']
+
+    assert [result['task']['id_task'] for result in data] == [1, 2]
+    assert data[0]['rank'] >= data[1]['rank']
+    assert '<mark>test</mark>' in data[0]['snippet']
+
+
+def test_search_tasks_follows_updates(auth_client_alice: TestClient, tasks):
+    auth_client_alice.patch('/tasks/3', json={'title': 'Groceries list'})
+
+    rsp = auth_client_alice.get('/tasks/search?q=groceries')
+
+    assert [
+        result['task']['id_task'] for result in rsp.json()['responses']
+    ] == [3]
+
+    auth_client_alice.delete('/tasks/3')
+
+    rsp = auth_client_alice.get('/tasks/search?q=groceries')
+
+    assert rsp.json()['responses'] == []
+
+
+def test_search_tasks_escapes_query_syntax(
+    auth_client_alice: TestClient, tasks
+):
+    rsp = auth_client_alice.get('/tasks/search', params={'q': 'test" OR *'})
+
+    assert rsp.status_code == HTTPStatus.OK
+
+
+def test_search_tasks_requires_q(auth_client_alice: TestClient, tasks):
+    rsp = auth_client_alice.get('/tasks/search?q=')
+
+    assert rsp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
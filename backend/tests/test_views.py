@@ -236,6 +236,29 @@ def test_get_view_tasks(
     assert data['2'][0]['title'] == 'title'
 
 
+def test_get_view_tasks_not_modified(
+    auth_client_alice: TestClient,
+    views: list[dict],
+    filters: list[dict],
+    tasks: list[dict],
+):
+    url = f'/views/{views[0]["id_view"]}/tasks'
+    etag = auth_client_alice.get(url).headers['etag']
+
+    rsp = auth_client_alice.get(url, headers={'If-None-Match': etag})
+
+    assert rsp.status_code == HTTPStatus.NOT_MODIFIED
+    assert rsp.headers['etag'] == etag
+    assert not rsp.content
+
+    auth_client_alice.delete(f'/views/{views[0]["id_view"]}/filters/1')
+
+    rsp = auth_client_alice.get(url, headers={'If-None-Match': etag})
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.headers['etag'] != etag
+
+
 @pytest.mark.asyncio
 async def test_update_view(
     auth_client_alice: TestClient,
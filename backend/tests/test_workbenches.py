@@ -221,6 +221,28 @@ async def test_updated_at_workbench(
     assert expected.startswith(workbench_db.updated_at.isoformat()[0:16])
 
 
+def test_list_workbenches_not_modified(
+    auth_client_alice: TestClient, workbenches
+):
+    etag = auth_client_alice.get('/workbenches/').headers['etag']
+
+    rsp = auth_client_alice.get(
+        '/workbenches/', headers={'If-None-Match': etag}
+    )
+
+    assert rsp.status_code == HTTPStatus.NOT_MODIFIED
+    assert rsp.headers['etag'] == etag
+
+    auth_client_alice.delete('/workbenches/1')
+
+    rsp = auth_client_alice.get(
+        '/workbenches/', headers={'If-None-Match': etag}
+    )
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert rsp.headers['etag'] != etag
+
+
 @pytest.mark.asyncio
 async def test_delete_workbench(
     auth_client_alice: TestClient, session: AsyncSession, workbenches
@@ -236,3 +258,16 @@ async def test_delete_workbench(
     )
 
     assert workbench_db is None
+
+
+def test_get_workbench_loads_only_what_it_maps(
+    auth_client_alice: TestClient, tasks, queries: list[str]
+):
+    queries.clear()
+
+    rsp = auth_client_alice.get('/workbenches/1')
+
+    assert rsp.status_code == HTTPStatus.OK
+    assert len(rsp.json()['tasks']) == 2  # noqa: PLR2004
+    # user, workbench, its tasks, their tags, their workbenches
+    assert len(queries) == 5  # noqa: PLR2004